@@ -1,5 +1,8 @@
 # -- Imports --------------------------------------------------------------------------
 
+from typing import (
+    List
+)
 from sanic import __version__
 from sys import version_info
 from .. import moca_modules as mzk
@@ -59,16 +62,10 @@ def reset_system() -> None:
     )
 
 
-@console.command('__run', hidden=True)
-def run_server(name: str) -> None:
-    """Run server."""
-    config = core.LOG_CONFIG.get(name)
-    if config is None:
-        mzk.print_error(f'Unknown log config. <{name}>')
-        mzk.sys_exit(1)
+def _run_logs(names: List[str]) -> None:
     try:
         from ..server import run_app
-        run_app(name, config['host'], int(config['port']), config['use_ipv6'], config['file'], config['level'])
+        run_app(names)
     except (KeyboardInterrupt, SystemExit):
         raise
     except Exception as error:
@@ -78,6 +75,25 @@ def run_server(name: str) -> None:
         mzk.append_str_to_file(core.LOG_DIR.joinpath('critical.log'), mzk.format_exc())
 
 
+@console.command('__run', hidden=True)
+def run_server(name: str) -> None:
+    """Run server."""
+    if core.LOG_CONFIG.get(name) is None:
+        mzk.print_error(f'Unknown log config. <{name}>')
+        mzk.sys_exit(1)
+    _run_logs([name])
+
+
+@console.command('__run_all', hidden=True)
+def run_all_server() -> None:
+    """Run server for all enabled logs in a single process."""
+    names = [name for name in core.LOG_CONFIG if core.LOG_CONFIG[name].get('status', True)]
+    if len(names) == 0:
+        mzk.print_error('No enabled log config.')
+        mzk.sys_exit(1)
+    _run_logs(names)
+
+
 @console.command('run')
 def run(name: str, sleep: float = 0) -> None:
     """Run MocaFileLog."""
@@ -108,9 +124,15 @@ def run(name: str, sleep: float = 0) -> None:
 
 
 @console.command('start')
-def start(sleep: float = 0) -> None:
-    """Run MocaFileLog in background."""
+def start(sleep: float = 0, single_process: bool = False) -> None:
+    """Run MocaFileLog in background. If single_process is True, all enabled logs are served by one process."""
     mzk.sleep(sleep)
+    if single_process:
+        mzk.call(
+            f'nohup {mzk.executable} {core.TOP_DIR.joinpath("moca.py")} __run_all &> /dev/null &',
+            shell=True
+        )
+        return None
     for name in core.LOG_CONFIG:
         if core.LOG_CONFIG[name].get('status', True):
             mzk.call(
@@ -61,15 +61,17 @@ tzlocal
 
 if __config.__LOAD_FILE__:
     from .moca_file import (
-        MocaDirectoryCache, MocaFileAppendController, MocaFileCacheController, MocaSynchronizedBinaryFile,
-        MocaSynchronizedJSONDictFile, MocaSynchronizedJSONFile, MocaSynchronizedJSONListFile, MocaSynchronizedTextFile,
+        MocaDirectoryCache, MocaDropQueue, MocaFileAppendController, MocaFileCacheController,
+        MocaSynchronizedBinaryFile, MocaSynchronizedJSONDictFile, MocaSynchronizedJSONFile, MocaSynchronizedJSONListFile,
+        MocaSynchronizedTextFile,
         MocaWriteFileController, MocaWriteEncryptedFileController, get_str_from_file, get_str_from_file_with_cache,
         aio_get_str_from_file, aio_get_str_from_file_with_cache, get_mime_type, get_mime_type_with_cache, get_timestamp,
         get_bytes_from_file, get_bytes_from_file_with_cache,
         aio_get_bytes_from_file, aio_get_bytes_from_file_with_cache, write_str_to_file, aio_write_str_to_file,
         write_bytes_to_file, aio_write_bytes_to_file, append_str_to_file, aio_append_str_to_file, load_json_from_file,
         load_json_from_file_with_cache, aio_load_json_from_file, aio_load_json_from_file_with_cache,
-        dump_json_to_file, aio_dump_json_to_file, get_last_line, get_str_from_end_of_file
+        dump_json_to_file, aio_dump_json_to_file, get_last_line, get_str_from_end_of_file, open_compressed_file,
+        compress_file, iter_lines_reverse
     )
 
 """
@@ -95,6 +97,8 @@ python-magic
         pip install python-magic-bin
     macOS
         brew install libmagic 
+zstandard (optional)
+    Zstandard bindings for Python, only required by zstd compression.
 """
 
 # -------------------------------------------------------------------------- moca_file --
@@ -103,18 +107,26 @@ python-magic
 
 if __config.__LOAD_LOG__:
     from .moca_log import (
-        LogLevel, MocaFileLog, MocaAsyncFileLog
+        LogLevel, MocaFileLog, MocaAsyncFileLog, MocaLogRecord, MocaLogCodec, MocaLogWriterProcess, MocaLogChannel,
+        MocaFileLogClient, MocaLogClientBase, MocaLogClient, MocaAsyncLogClient, MocaLogHandler, MocaLogSearch
     )
 
 """
 This is a simple logging module.
 MocaFileLog can write logs in other thread, to return the response more quickly.
 MocaAsyncFileLog can write logs use asyncio.
+MocaLogWriterProcess writes a log file in a dedicated process, and MocaFileLogClient sends logs to it from other processes.
+MocaLogClient and MocaAsyncLogClient send logs to a MocaFileLog server in batches, MocaLogHandler is the handler of the logging module.
+MocaLogSearch searches the log files in parallel with worker processes.
 
 Requirements
 ------------
 aiofiles
     aiofiles is an Apache2 licensed library, written in Python, for handling local disk files in asyncio applications.
+requests
+    Requests is an elegant and simple HTTP library for Python, used by MocaLogClient.
+aiohttp
+    Asynchronous HTTP Client/Server for asyncio and Python, used by MocaAsyncLogClient.
 """
 
 # -------------------------------------------------------------------------- moca_log --
@@ -198,7 +210,7 @@ if __config.__LOAD_UTILS__:
         aio_wget, wstatus, aio_wstatus, disk_speed, check_hash, get_time_string, print_with_color, add_extension,
         add_dot_jpg, add_dot_jpeg, add_dot_gif, add_dot_txt, add_dot_png, add_dot_csv, add_dot_rtf, add_dot_pdf,
         add_dot_md, add_dot_log, add_dot_json, add_dot_py, add_dot_cache, add_dot_pickle, add_dot_js, add_dot_css,
-        add_dot_html, set_interval, set_timeout, on_other_thread, is_hiragana, is_katakana,
+        add_dot_html, set_interval, set_timeout, on_other_thread, is_hiragana, is_katakana, format_timestamp,
         is_small_hiragana, is_small_katakana, hiragana_to_katakana, katakana_to_hiragana, check_length,
         dump_json_beautiful,
         dumps_json_beautiful, contains_upper, contains_lower, contains_alpha, contains_digit, contains_symbol,
@@ -575,7 +587,8 @@ plyvel
 
 if __config.__LOAD_SANIC__:
     from .moca_sanic import (
-        MocaSanic, get_remote_address, get_args, write_cookie
+        MocaSanic, MocaBodyDecoder, get_remote_address, get_args, write_cookie,
+        get_body_data, is_msgpack, accepts_msgpack, msgpack_response, msgpack_flag
     )
 
 """
@@ -589,6 +602,10 @@ sanic-plugins-framework
     Easily create Plugins for Sanic!
 ujson           
     UltraJSON is an ultra fast JSON encoder and decoder written in pure C with bindings for Python 3.5+.
+zstandard (optional)
+    Zstandard bindings for Python, MocaBodyDecoder need it to decompress zstd request body.
+msgpack (optional)
+    MessagePack serializer, get_args need it to decode application/msgpack request body, otherwise it returns 415.
 """
 
 # -------------------------------------------------------------------------- moca_sanic --
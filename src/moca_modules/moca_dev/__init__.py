@@ -4,6 +4,7 @@ from benchmarker import Benchmarker, BenchmarkerError
 from .compress_test import compress_test
 from .json_test import json_test
 from .benchmark import string_bench
+from .log_bench import location_bench, batch_bench, socket_bench, writer_bench, codec_bench
 from .bench_funcs import (
     fibonacci_loop, fibonacci_sym, fibonacci_recursion,
     fibonacci_list_loop, fibonacci_list_sym, fibonacci_list_recursion
@@ -28,6 +29,8 @@ python-rapidjson
     Python wrapper around rapidjson
 brotli
     Brotli compression format
+msgpack (optional)
+    MessagePack serializer, codec_bench compare it with the json modules.
 sympy
     A computer algebra system written in pure Python
 """
@@ -0,0 +1,228 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Optional, Tuple
+)
+from socket import socket, AF_INET, AF_UNIX, SOCK_STREAM, IPPROTO_TCP, TCP_NODELAY
+from multiprocessing import Process
+from json import dumps, loads
+from orjson import dumps as orjson_dumps, loads as orjson_loads
+from time import perf_counter, sleep
+from benchmarker import Benchmarker
+from ..moca_core import TMP_DIR, CPU_COUNT
+from ..moca_log import MocaFileLog, MocaLogWriterProcess, MocaFileLogClient
+try:
+    from msgpack import packb, unpackb
+    msgpack_flag = True
+except (ImportError, ModuleNotFoundError):
+    msgpack_flag = False
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- PublicFunctions --------------------------------------------------------------------------
+
+
+def location_bench(loop: int = 100 * 1000) -> None:
+    """
+    Compare the location modes of MocaFileLog, and print the results.
+    https://pythonhosted.org/Benchmarker/
+    """
+    logs = {
+        mode: MocaFileLog(TMP_DIR.joinpath(f'location_bench_{mode}.log'), location_mode=mode)
+        for mode in MocaFileLog.LOCATION_MODES
+    }
+    with Benchmarker(loop, width=30) as bench:
+
+        @bench('empty-loop')
+        def _(bm):
+            for i in bm:
+                pass
+
+        for mode, log in logs.items():
+
+            @bench(f'location({mode})')
+            def _(bm, log=log):
+                for i in bm:
+                    log.write_log('Haruhi, Mikuru, Yuki, Itsuki, Kyon', 1)
+    for log in logs.values():
+        log.clear_log()
+
+
+def batch_bench(loop: int = 1000) -> None:
+    """
+    Compare write_log loop and write_logs of MocaFileLog, 10, 100 and 1000 logs per batch, and print the results.
+    https://pythonhosted.org/Benchmarker/
+    """
+    log = MocaFileLog(TMP_DIR.joinpath('batch_bench.log'), location_mode=MocaFileLog.LOCATION_STATIC)
+    with Benchmarker(loop, width=30) as bench:
+
+        @bench('empty-loop')
+        def _(bm):
+            for i in bm:
+                pass
+
+        for size in (10, 100, 1000):
+            records = [(i % 5, 'Haruhi, Mikuru, Yuki, Itsuki, Kyon') for i in range(size)]
+
+            @bench(f'write_log({size})')
+            def _(bm, records=records):
+                for i in bm:
+                    for level, message in records:
+                        log.write_log(message, level)
+
+            @bench(f'write_logs({size})')
+            def _(bm, records=records):
+                for i in bm:
+                    log.write_logs(records)
+    log.clear_log()
+
+
+def _http_get(sock: socket, request: bytes) -> bytes:
+    """Send a keep-alive request, and read the response."""
+    sock.sendall(request)
+    data = b''
+    while b'\r\n\r\n' not in data:
+        data += sock.recv(65536)
+    head, body = data.split(b'\r\n\r\n', 1)
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    while len(body) < length:
+        body += sock.recv(65536)
+    return body
+
+
+def socket_bench(
+        host: str = '127.0.0.1',
+        port: int = 5700,
+        unix: Optional[str] = None,
+        path: str = '/status',
+        loop: int = 10 * 1000
+) -> None:
+    """
+    Compare the request latency of TCP loopback and unix domain socket, and print the results.
+    Please run two MocaFileLog servers at first, one listens on host:port, the other listens on the unix socket.
+    https://pythonhosted.org/Benchmarker/
+    """
+    request = f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n'.encode()
+    tcp = socket(AF_INET, SOCK_STREAM)
+    tcp.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+    tcp.connect((host, port))
+    uds: Optional[socket] = None
+    if unix is not None:
+        uds = socket(AF_UNIX, SOCK_STREAM)
+        uds.connect(unix)
+    with Benchmarker(loop, width=30) as bench:
+
+        @bench('empty-loop')
+        def _(bm):
+            for i in bm:
+                pass
+
+        @bench(f'tcp({host}:{port})')
+        def _(bm):
+            for i in bm:
+                _http_get(tcp, request)
+
+        if uds is not None:
+
+            @bench(f'unix({unix})')
+            def _(bm):
+                for i in bm:
+                    _http_get(uds, request)
+    tcp.close()
+    if uds is not None:
+        uds.close()
+
+
+def _ingest(writer: MocaLogWriterProcess, body: bytes, loop: int) -> None:
+    """The work of a server worker, parse the request body and send the rendered logs to the writer."""
+    log = MocaFileLogClient(writer, 0, overflow=MocaFileLog.OVERFLOW_BLOCK, location_mode=MocaFileLog.LOCATION_STATIC)
+    for _ in range(loop):
+        log.write_logs([(item['level'], item['message']) for item in loads(body)['logs']])
+
+
+def writer_bench(workers: Tuple[int, ...] = (1, 2, 4, 8), loop: int = 2000, batch: int = 50) -> None:
+    """
+    Measure the ingest throughput of N worker processes that share a dedicated writer process, and print the curve.
+    Every worker parses `loop` JSON bodies of `batch` logs, renders the logs and sends them to the writer.
+    The throughput can scale until the writer process or the number of CPU cores is the bottleneck.
+    """
+    body = dumps({'logs': [{'level': i % 5, 'message': 'Haruhi, Mikuru, Yuki, Itsuki, Kyon'} for i in range(batch)]})
+    path = TMP_DIR.joinpath('writer_bench.log')
+    print(f'cpu cores: {CPU_COUNT}, logs per worker: {loop * batch}')
+    print(f"{'workers':>8} {'seconds':>10} {'logs/s':>12} {'speedup':>8}")
+    base: Optional[float] = None
+    for count in workers:
+        writer = MocaLogWriterProcess(path, maxsize=100000)
+        writer.start()
+        start = perf_counter()
+        processes = [Process(target=_ingest, args=(writer, body.encode(), loop)) for _ in range(count)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        while writer.channel.qsize() > 0:  # the writer has taken all logs.
+            sleep(0.001)
+        seconds = perf_counter() - start
+        writer.stop()
+        rate = count * loop * batch / seconds
+        base = base or rate
+        print(f'{count:>8} {seconds:>10.3f} {rate:>12.0f} {rate / base:>8.2f}')
+        path.unlink(missing_ok=True)
+
+
+def codec_bench(sizes: Tuple[int, ...] = (10, 100, 1000), loop: int = 1000) -> None:
+    """
+    Compare json, orjson and msgpack on the request bodies of /save-logs, and print the results and the body sizes.
+    Every benchmark encodes and decodes a batch of `size` logs, the messages are similar to access logs and tracebacks.
+    https://pythonhosted.org/Benchmarker/
+    """
+    codecs = [
+        ('json', lambda obj: dumps(obj, ensure_ascii=False).encode(), loads),
+        ('orjson', orjson_dumps, orjson_loads),
+    ]
+    if msgpack_flag:
+        codecs.append(('msgpack', packb, lambda data: unpackb(data, raw=False)))
+    else:
+        print('msgpack is not installed.')
+    messages = (
+        '127.0.0.1 - - "GET /moca-file-log/sample1/get-latest-logs HTTP/1.1" 200 18342 0.0042',
+        'user login succeeded. <user_id: 1024, session: 6f1e0c2a-9b3d-4c55-8e07-2a4f90b7d1e3>',
+        'Traceback (most recent call last):\n  File "app.py", line 42, in handler\n'
+        '    result = process(request)\nValueError: level parameter only supports 0, 1, 2, 3, 4.',
+        'ハルヒ、みくる、長門、古泉、キョン',
+        'cache miss.',
+    )
+    bodies = {
+        size: {
+            'api_key': 'a' * 64,
+            'logs': [{'level': i % 5, 'message': messages[i % len(messages)]} for i in range(size)],
+        }
+        for size in sizes
+    }
+    for size, body in bodies.items():
+        print(f'body size ({size} logs): ' + ', '.join(f'{name} {len(dump(body))} bytes' for name, dump, _ in codecs))
+    with Benchmarker(loop, width=30) as bench:
+
+        @bench('empty-loop')
+        def _(bm):
+            for i in bm:
+                pass
+
+        for size, body in bodies.items():
+            for name, dump, load in codecs:
+                data = dump(body)
+
+                @bench(f'{name} dumps({size})')
+                def _(bm, dump=dump, body=body):
+                    for i in bm:
+                        dump(body)
+
+                @bench(f'{name} loads({size})')
+                def _(bm, load=load, data=data):
+                    for i in bm:
+                        load(data)
+
+# -------------------------------------------------------------------------- PublicFunctions --
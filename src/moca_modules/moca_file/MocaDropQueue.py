@@ -0,0 +1,93 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Any, Callable, Dict, Optional
+)
+from queue import Queue
+from collections import deque
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaDropQueue --------------------------------------------------------------------------
+
+
+class MocaDropQueue(Queue):
+    """
+    A FIFO queue that can drop a queued item in O(1), it is used by the drop policies of MocaFileAppendController.
+    The items are kept in one deque per priority with a sequence number, get returns the oldest head of the deques,
+    and the oldest item, or the oldest item of the lowest priority is dropped from the head of a deque.
+    There are only a few priorities (e.g. the log levels), so get and drop don't depend on the queue size.
+
+    Attributes
+    ----------
+    self._priority: Callable[[Any], Optional[int]]
+        Return the priority of an item, None means the item is never dropped, e.g. a control command.
+    self._lanes: Dict[Optional[int], deque]
+        The (sequence number, item) of every priority, oldest first.
+    self._size: int
+        The number of the items.
+    self._sequence: int
+        The sequence number of the next item.
+    """
+
+    def __init__(self, maxsize: int = 0, priority: Callable[[Any], Optional[int]] = lambda item: 0):
+        """
+        :param maxsize: the maximum size of the queue, If maxsize is <= 0, the queue size is infinite.
+        :param priority: return the priority of an item, None means the item is never dropped.
+        """
+        self._priority: Callable[[Any], Optional[int]] = priority
+        super().__init__(maxsize)
+
+    def _init(self, maxsize: int) -> None:
+        self._lanes: Dict[Optional[int], deque] = {}
+        self._size: int = 0
+        self._sequence: int = 0
+
+    def _qsize(self) -> int:
+        return self._size
+
+    def _put(self, item: Any) -> None:
+        priority = self._priority(item)
+        lane = self._lanes.get(priority)
+        if lane is None:
+            lane = self._lanes[priority] = deque()
+        lane.append((self._sequence, item))
+        self._sequence += 1
+        self._size += 1
+
+    def _get(self) -> Any:
+        lane = min((lane for lane in self._lanes.values() if lane), key=lambda item: item[0][0])
+        self._size -= 1
+        return lane.popleft()[1]
+
+    def put_with_drop(self, item: Any, oldest: bool = True) -> bool:
+        """
+        Put the item into the queue without blocking, drop a queued item or the new item if the queue is full.
+        :param oldest: drop the oldest item, otherwise drop the oldest item that has the lowest priority,
+                       the new item is dropped if its priority is lower than all queued items.
+        :return: True if an item was dropped.
+        """
+        with self.not_full:
+            if 0 < self.maxsize <= self._size:
+                lanes = [(priority, lane) for priority, lane in self._lanes.items() if priority is not None and lane]
+                if not lanes:
+                    return True  # the queue is full of the items that are never dropped.
+                if oldest:
+                    _, victim = min(lanes, key=lambda item: item[1][0][0])
+                else:
+                    lowest, victim = min(lanes, key=lambda item: item[0])
+                    priority = self._priority(item)
+                    if priority is not None and priority < lowest:
+                        return True
+                victim.popleft()
+                self._size -= 1
+                self.unfinished_tasks -= 1
+                dropped = True
+            else:
+                dropped = False
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+            return dropped
+
+# -------------------------------------------------------------------------- MocaDropQueue --
@@ -1,12 +1,22 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Union, Optional
+    Union, Optional, List, Tuple, Dict, Any, Iterator
 )
 from pathlib import Path
-from threading import Thread
-from queue import Queue
+from threading import Thread, Lock
+from queue import Queue, Empty, Full
+from time import perf_counter, monotonic, time, localtime, strftime, mktime
+from os import fsync, fstat
+from struct import Struct
+from mmap import mmap, ACCESS_READ
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from bisect import bisect_left
+from re import compile, escape
+from collections import deque
 from ..moca_core import ENCODING
+from .MocaDropQueue import MocaDropQueue
+from .utils import COMPRESSED_EXTENSIONS, zstd_flag, compress_file, open_compressed_file, iter_lines_reverse
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -20,43 +30,234 @@ class MocaFileAppendController:
     データをキューに入れて、別スレッドで追記処理を行うことで、レスポンスを返す速度を速める。
     把数据放进列队里面，然后在别的线程内进行文件的IO处理，提高程序的体感速度。
 
+    The writer thread works in group-commit mode, it drains the queue until the batch budget is used up,
+    and issues one write and one flush per batch.
+    The durability policy decides when the written data will be synced to the disk.
+        none: never call fsync, the data will be written back by the operating system.
+        batch: call fsync after every batch.
+        interval: call fsync every `fsync_interval` seconds when there are unsynced data.
+        record: write and fsync every record separately.
+    When the queue is bounded (maxsize > 0), the overflow policy decides what to do if the queue is full.
+        block: wait `put_timeout` seconds for a free slot, the data will be rejected after timeout.
+        drop_oldest: drop the oldest data in the queue.
+        drop_low_level: drop the oldest data that has the lowest priority (see `_priority`), e.g. DEBUG/INFO logs first.
+        reject: reject the new data immediately.
+    The file will be rotated when it is larger than `rotate_bytes`, older than `rotate_age` seconds,
+    or when the clock passed an hourly or daily boundary (`rotate_when`).
+    The rotated segments are named `<filename>.<YYYYmmdd-HHMMSS.ffffff>`, and compressed by a background thread.
+    The writer can keep a sparse time index of every file in a sidecar file `<filename>.idx`,
+    an entry (timestamp, position) is added every `index_records` records or every `index_interval` seconds,
+    so the data of a period can be read without scanning the whole file. (see `index_ranges`)
+
     Attributes
     ----------
     self._queue: Queue
-        the task queue.
+        the task queue, a MocaDropQueue if the overflow policy drops data.
     self._filename: str
         The path of target file.
     self._encoding: str
         The encoding of the target file.
+    self._batch_size: int
+        The maximum bytes of one batch. If this value is <= 0, every data will be written separately.
+    self._batch_latency: float
+        The maximum seconds to wait for more data before writing a batch.
+    self._durability: str
+        The durability policy. none, batch, interval or record.
+    self._fsync_interval: float
+        The seconds between two fsync calls in interval mode.
+    self._overflow: str
+        The overflow policy. block, drop_oldest, drop_low_level or reject.
+    self._put_timeout: Optional[float]
+        The maximum seconds to wait for a free slot in block mode, None means wait forever.
+    self._rotate_bytes: int
+        Rotate the file when it is larger than this value, 0 means disabled.
+    self._rotate_age: float
+        Rotate the file when it is older than this value (seconds), 0 means disabled.
+    self._rotate_when: Optional[str]
+        Rotate the file at a wall-clock boundary, hourly or daily, None means disabled.
+    self._compression: Optional[str]
+        The compression method of rotated segments, gzip or zstd, None means don't compress.
+    self._backup_count: int
+        The maximum number of rotated segments, 0 means keep all.
+    self._compress_queue: Queue
+        The rotated segments waiting for compression.
+    self._segment_size: int
+        The bytes of the current segment.
+    self._segment_lines: int
+        The lines of the current segment, it is counted once when the segment is opened, and updated by every batch.
+    self._segment_start: float
+        The time when the current segment was opened.
+    self._segment_boundary: float
+        The next wall-clock boundary of the current segment.
+    self._index_interval: float
+        Add an index entry when this value (seconds) passed since the last entry, 0 means disabled.
+    self._index_records: int
+        Add an index entry when this number of records were written since the last entry, 0 means disabled.
+    self._index_file
+        The sparse index of the current segment, None if the index is disabled.
+    self._index_count: int
+        The number of records written since the last index entry.
+    self._index_last: Optional[float]
+        The time (monotonic) of the last index entry, None means the current segment has no entry.
+    self._stats: Dict[str, Any]
+        The counters of the writer thread.
+    self._stats_lock: Lock
+        The lock of the dropped and rejected counters, they are updated by the threads that put the data.
+    self._writer_thread: Optional[Thread]
+        The writer thread, None if the queue is consumed by another process.
     """
 
     CLEAR_CMD: str = '[el]#moca_clear#'  # If you put this message in the queue, The file will be cleared.
+    CLOSE_CMD: str = '[el]#moca_close#'  # If you put this message in the queue, The writer thread will stop.
+    COMMANDS: Tuple[str, ...] = (CLEAR_CMD, CLOSE_CMD)
+
+    DURABILITY_NONE: str = 'none'
+    DURABILITY_BATCH: str = 'batch'
+    DURABILITY_INTERVAL: str = 'interval'
+    DURABILITY_RECORD: str = 'record'
+    DURABILITY_MODES: Tuple[str, ...] = (DURABILITY_NONE, DURABILITY_BATCH, DURABILITY_INTERVAL, DURABILITY_RECORD)
+
+    OVERFLOW_BLOCK: str = 'block'
+    OVERFLOW_DROP_OLDEST: str = 'drop_oldest'
+    OVERFLOW_DROP_LOW_LEVEL: str = 'drop_low_level'
+    OVERFLOW_REJECT: str = 'reject'
+    OVERFLOW_POLICIES: Tuple[str, ...] = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_LOW_LEVEL, OVERFLOW_REJECT)
+
+    ROTATE_WHEN: Tuple[str, ...] = ('hourly', 'daily')
+
+    INDEX_SUFFIX: str = '.idx'
+    INDEX_ENTRY: Struct = Struct('>dQ')  # timestamp, position
+    # the timestamps in a file are not strictly ordered, e.g. the data of different threads, so the ranges are widened.
+    INDEX_SLACK: float = 1.0
+
+    # The upper bounds (seconds) of the buckets of the fsync latency histogram.
+    FSYNC_BUCKETS: Tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
 
     def __init__(
             self,
             filename: Union[str, Path],
             encoding: str = ENCODING,
             queue: Optional[Queue] = None,
-            maxsize: int = 0
+            maxsize: int = 0,
+            batch_size: int = 1048576,
+            batch_latency: float = 0.0,
+            durability: str = DURABILITY_NONE,
+            fsync_interval: float = 1.0,
+            overflow: str = OVERFLOW_BLOCK,
+            put_timeout: Optional[float] = None,
+            rotate_bytes: int = 0,
+            rotate_age: float = 0.0,
+            rotate_when: Optional[str] = None,
+            compression: Optional[str] = None,
+            backup_count: int = 0,
+            index_interval: float = 0.0,
+            index_records: int = 0,
+            writer_thread: bool = True
     ):
         """
         :param filename: The path of target file.
         :param encoding: The encoding of the target file.
-        :param queue: a instance of Queue class.
+        :param queue: a instance of Queue class, drop_oldest and drop_low_level policies need MocaDropQueue.
         :param maxsize: the maximum size of the queue, If maxsize is <= 0, the queue size is infinite.
+        :param batch_size: the maximum bytes of one batch, If batch_size is <= 0, group-commit is disabled.
+        :param batch_latency: the maximum seconds to wait for more data before writing a batch.
+        :param durability: the durability policy, none, batch, interval or record.
+        :param fsync_interval: the seconds between two fsync calls in interval mode.
+        :param overflow: the overflow policy of a bounded queue, block, drop_oldest, drop_low_level or reject.
+        :param put_timeout: the maximum seconds to wait for a free slot in block mode, None means wait forever.
+        :param rotate_bytes: rotate the file when it is larger than this value, 0 means disabled.
+        :param rotate_age: rotate the file when it is older than this value (seconds), 0 means disabled.
+        :param rotate_when: rotate the file at a wall-clock boundary, hourly or daily, None means disabled.
+        :param compression: the compression method of rotated segments, gzip or zstd, None means don't compress.
+        :param backup_count: the maximum number of rotated segments, 0 means keep all.
+        :param index_interval: add a sparse index entry every this seconds, 0 means disabled.
+        :param index_records: add a sparse index entry every this number of records, 0 means disabled.
+                              the index is disabled when both of index_interval and index_records are 0.
+        :param writer_thread: start the writer thread, False means the queue is consumed by another process,
+                              and this instance only puts data into the queue and reads the file.
         """
+        if durability not in self.DURABILITY_MODES:
+            raise ValueError('durability parameter only supports none, batch, interval or record.')
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError('overflow parameter only supports block, drop_oldest, drop_low_level or reject.')
+        if rotate_when is not None and rotate_when not in self.ROTATE_WHEN:
+            raise ValueError('rotate_when parameter only supports hourly or daily.')
+        if compression is not None and compression not in COMPRESSED_EXTENSIONS:
+            raise ValueError('compression parameter only supports gzip or zstd.')
+        if compression == 'zstd' and not zstd_flag:
+            raise ValueError('zstd compression need zstandard module.')
+        drop = overflow in (self.OVERFLOW_DROP_OLDEST, self.OVERFLOW_DROP_LOW_LEVEL)
+        if drop and queue is not None and not isinstance(queue, MocaDropQueue):
+            raise ValueError('drop_oldest and drop_low_level overflow policies only support MocaDropQueue.')
         # set queue
-        self._queue: Queue = queue if queue is not None else Queue(maxsize=maxsize)
+        if queue is not None:
+            self._queue: Queue = queue
+        elif drop:
+            self._queue: Queue = MocaDropQueue(maxsize, self._drop_priority)
+        else:
+            self._queue: Queue = Queue(maxsize=maxsize)
         # set filename
         self._filename: str = str(filename)
         # set encoding
         self._encoding: str = encoding
+        # set group-commit budget
+        self._batch_size: int = batch_size
+        self._batch_latency: float = batch_latency
+        # set durability policy
+        self._durability: str = durability
+        self._fsync_interval: float = fsync_interval
+        # set overflow policy
+        self._overflow: str = overflow
+        self._put_timeout: Optional[float] = put_timeout
+        # set rotation
+        self._rotate_bytes: int = rotate_bytes
+        self._rotate_age: float = rotate_age
+        self._rotate_when: Optional[str] = rotate_when
+        self._compression: Optional[str] = compression
+        self._backup_count: int = backup_count
+        if 0 < rotate_bytes < batch_size:
+            self._batch_size = rotate_bytes  # a batch is never split, so keep it smaller than a segment.
+        self._segment_pattern = compile(
+            escape(Path(self._filename).name) + r'\.\d{8}-\d{6}\.\d{6}(\.gz|\.zst)?$'
+        )
+        self._compress_queue: Queue = Queue()
+        self._generation: int = 0  # increased by clear, to discard the segments compressed after clear.
+        self._segment_size: int = 0
+        self._segment_lines: int = 0
+        self._segment_start: float = 0.0
+        self._segment_boundary: float = float('inf')
+        # set sparse index
+        self._index_interval: float = index_interval
+        self._index_records: int = index_records
+        self._index_file = None
+        self._index_count: int = 0
+        self._index_last: Optional[float] = None
+        # writer counters
+        self._stats: Dict[str, Any] = {
+            'batches': 0,
+            'records': 0,
+            'bytes': 0,
+            'max_batch_records': 0,
+            'max_batch_bytes': 0,
+            'flush_time': 0.0,
+            'max_flush_time': 0.0,
+            'fsyncs': 0,
+            'fsync_time': 0.0,
+            'max_fsync_time': 0.0,
+            'fsync_histogram': [0] * (len(self.FSYNC_BUCKETS) + 1),
+            'dropped': 0,
+            'rejected': 0,
+            'rotations': 0,
+            'compressed': 0,
+        }
+        self._stats_lock: Lock = Lock()
         # start the loop thread.
-        Thread(
-            target=MocaFileAppendController._write_loop,
-            args=(self._queue, self._filename, self._encoding),
-            daemon=True
-        ).start()
+        self._writer_thread: Optional[Thread] = None
+        if writer_thread:
+            self._writer_thread = Thread(target=self._write_loop, daemon=True)
+            self._writer_thread.start()
+            if self._compression is not None:
+                Thread(target=self._compress_loop, daemon=True).start()
 
     def __str__(self) -> str:
         return f'MocaFileAppendController: {self._filename}'
@@ -65,28 +266,727 @@ class MocaFileAppendController:
     def filename(self) -> str:
         return self._filename
 
+    @property
+    def encoding(self) -> str:
+        return self._encoding
+
+    def _get_batch(self, timeout: Optional[float] = None) -> Tuple[List[bytes], Optional[str]]:
+        """
+        Wait for data, and drain the queue until the batch budget is used up or a command is found.
+        :param timeout: the maximum seconds to wait for the first data, None means wait forever.
+        :return: encoded data, the command after the data (CLEAR_CMD or CLOSE_CMD), None means no command.
+        """
+        try:
+            text = self._queue.get(timeout=timeout)
+        except Empty:
+            return [], None
+        if text in self.COMMANDS:
+            return [], text
+        data = [self._encode(text)]
+        size = len(data[0])
+        deadline = monotonic() + self._batch_latency
+        while size < self._batch_size:
+            try:
+                if self._batch_latency > 0:
+                    timeout = deadline - monotonic()
+                    if timeout <= 0:
+                        break
+                    text = self._queue.get(timeout=timeout)
+                else:
+                    text = self._queue.get_nowait()
+            except Empty:
+                break
+            if text in self.COMMANDS:
+                return data, text
+            data.append(self._encode(text))
+            size += len(data[-1])
+        return data, None
+
+    def _encode(self, data: Any) -> bytes:
+        """
+        Convert the data in the queue to bytes, this method runs in the writer thread.
+        Subclasses can override this method to put other objects into the queue.
+        """
+        return data.encode(self._encoding)
+
+    def _pack(self, data: List[bytes]) -> bytes:
+        """
+        Convert the encoded data to the bytes written to the file, this method runs in the writer thread.
+        Subclasses can override this method to compress or frame a batch.
+        """
+        return b''.join(data)
+
+    def _fsync(self, file) -> None:
+        """Sync the file to the disk, and record the latency."""
+        start = perf_counter()
+        fsync(file.fileno())
+        elapsed = perf_counter() - start
+        stats = self._stats
+        stats['fsyncs'] += 1
+        stats['fsync_time'] += elapsed
+        stats['fsync_histogram'][bisect_left(self.FSYNC_BUCKETS, elapsed)] += 1
+        if elapsed > stats['max_fsync_time']:
+            stats['max_fsync_time'] = elapsed
+
+    def _commit(self, file, data: List[bytes]) -> Tuple[int, int]:
+        """
+        Write one batch to the file.
+        :return: the written bytes, the written lines.
+        """
+        start = perf_counter()
+        if self._durability == self.DURABILITY_RECORD:
+            written = 0
+            lines = 0
+            for item in data:
+                buffer = self._pack([item])
+                file.write(buffer)
+                file.flush()
+                self._fsync(file)
+                written += len(buffer)
+                lines += self._count_lines([item])
+        else:
+            buffer = self._pack(data)
+            written = len(buffer)
+            lines = self._count_lines(data)
+            file.write(buffer)
+            file.flush()
+            if self._durability == self.DURABILITY_BATCH:
+                self._fsync(file)
+        elapsed = perf_counter() - start
+        stats = self._stats
+        stats['batches'] += 1
+        stats['records'] += len(data)
+        stats['bytes'] += written
+        stats['flush_time'] += elapsed
+        if len(data) > stats['max_batch_records']:
+            stats['max_batch_records'] = len(data)
+        if written > stats['max_batch_bytes']:
+            stats['max_batch_bytes'] = written
+        if elapsed > stats['max_flush_time']:
+            stats['max_flush_time'] = elapsed
+        return written, lines
+
+    def _next_boundary(self, timestamp: float) -> float:
+        """Return the next wall-clock boundary after the timestamp."""
+        if self._rotate_when is None:
+            return float('inf')
+        t = localtime(timestamp)
+        if self._rotate_when == 'hourly':
+            return mktime((t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour + 1, 0, 0, 0, 0, -1))
+        else:
+            return mktime((t.tm_year, t.tm_mon, t.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+
+    def _count_lines(self, data: List[bytes]) -> int:
+        """
+        Return the number of the lines of the encoded data, it is added to the file_lines counter.
+        Subclasses can override this method if the data is not text, e.g. count the records of a binary format.
+        """
+        return sum([item.count(b'\n') for item in data])
+
+    def _count_file_lines(self, path: Path, chunk_size: int = 1048576) -> int:
+        """
+        Count the lines of the file when it is opened, same as `wc -l`.
+        Subclasses that override _count_lines should override this method too.
+        """
+        lines = 0
+        with open(str(path), mode='rb') as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    return lines
+                lines += chunk.count(b'\n')
+
+    def _open(self):
+        """Open the current segment, and reset the rotation state and the file counters."""
+        file = open(self._filename, mode='ab')
+        self._segment_size = fstat(file.fileno()).st_size
+        self._segment_lines = self._count_file_lines(Path(self._filename)) if self._segment_size > 0 else 0
+        self._segment_start = time()
+        self._segment_boundary = self._next_boundary(self._segment_start)
+        self._open_index()
+        return file
+
+    def _index_path(self, path: Path) -> Path:
+        """Return the path of the sparse index of the current file or a rotated segment."""
+        name = path.name
+        for extension in COMPRESSED_EXTENSIONS.values():
+            if name.endswith(extension):
+                name = name[:-len(extension)]
+        return path.with_name(name + self.INDEX_SUFFIX)
+
+    def _index_timestamp(self, data: bytes) -> Optional[float]:
+        """
+        Return the timestamp of the encoded data, it is saved in the sparse index with the position of the data.
+        Subclasses can override this method to use the timestamp in the data, the write time is used by default.
+        None means the data has no timestamp, and it will not be indexed.
+        """
+        return time()
+
+    def _scan_index(self, path: Path, offset: int) -> Iterator[Tuple[float, int, int]]:
+        """
+        Read the file from the offset, and yield (timestamp, position, the number of the records) of the indexable data.
+        It is used to index the data written without the index, for example, before a restart.
+        Subclasses can override this method, the generic data can't be indexed after it was written.
+        """
+        return iter(())
+
+    def _open_index(self) -> None:
+        """
+        Open the sparse index of the current segment, remove the broken entries,
+        and index the data written after the last entry, so the index is rebuilt incrementally after a restart.
+        """
+        path = self._index_path(Path(self._filename))
+        self._index_file = None
+        self._index_count = 0
+        self._index_last = None
+        if self._index_interval <= 0 and self._index_records <= 0:
+            path.unlink(missing_ok=True)  # it may be a stale index of another file.
+            return None
+        entry = self.INDEX_ENTRY
+        index = open(str(path), mode='ab')
+        length = fstat(index.fileno()).st_size // entry.size * entry.size
+        last: Optional[Tuple[float, int]] = None
+        if length > 0:
+            with open(str(path), mode='rb') as file:
+                file.seek(length - entry.size)
+                last = entry.unpack(file.read(entry.size))
+            if last[1] >= self._segment_size:  # the index doesn't belong to this file.
+                length, last = 0, None
+        index.truncate(length)  # a partially written entry, or a stale index.
+        self._index_file = index
+        entries: List[bytes] = []
+        last_offset, last_time = (-1, None) if last is None else (last[1], last[0])
+        for timestamp, position, records in self._scan_index(Path(self._filename), max(last_offset, 0)):
+            if position > last_offset and (
+                    last_time is None or 0 < self._index_records <= self._index_count
+                    or 0 < self._index_interval <= timestamp - last_time
+            ):
+                entries.append(entry.pack(timestamp, position))
+                self._index_count, last_time = 0, timestamp
+            self._index_count += records
+        index.write(b''.join(entries))
+        index.flush()
+        if last_time is not None:
+            self._index_last = monotonic()
+
+    def _close_index(self) -> None:
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+    def _index_batch(self, data: List[bytes], offset: int) -> None:
+        """Add an index entry of the batch, every `index_records` records or every `index_interval` seconds."""
+        if self._index_file is None:
+            return None
+        now = monotonic()
+        if self._index_last is None or 0 < self._index_records <= self._index_count \
+                or 0 < self._index_interval <= now - self._index_last:
+            timestamp = self._index_timestamp(data[0])
+            if timestamp is not None:
+                self._index_file.write(self.INDEX_ENTRY.pack(timestamp, offset))
+                self._index_file.flush()
+                self._index_count = 0
+                self._index_last = now
+        self._index_count += len(data)
+
+    def _should_rotate(self, size: int) -> bool:
+        """Return True if the current segment should be rotated before writing `size` bytes."""
+        if self._segment_size == 0:
+            return False
+        if 0 < self._rotate_bytes < self._segment_size + size:
+            return True
+        now = time()
+        return (0 < self._rotate_age <= now - self._segment_start) or now >= self._segment_boundary
+
+    def _rotate(self, file):
+        """
+        Rename the current segment, and open a new one.
+        If the segment can't be renamed, the current file is opened again, and it will be rotated later.
+        """
+        if self._durability != self.DURABILITY_NONE:
+            self._fsync(file)
+        file.close()
+        self._close_index()
+        now = time()
+        segment = Path(f'{self._filename}.{strftime("%Y%m%d-%H%M%S", localtime(now))}.{int(now % 1 * 1000000):06d}')
+        try:
+            Path(self._filename).rename(segment)
+        except (PermissionError, OSError):
+            return self._open()
+        try:
+            self._index_path(Path(self._filename)).rename(self._index_path(segment))
+        except FileNotFoundError:
+            pass  # the index is disabled.
+        self._stats['rotations'] += 1
+        if self._compression is not None:
+            self._compress_queue.put((segment, self._generation))
+        if self._backup_count > 0:
+            for old in self.segment_files()[:-self._backup_count]:
+                old.unlink(missing_ok=True)
+                self._index_path(old).unlink(missing_ok=True)
+        return self._open()
+
+    def _compress_loop(self) -> None:
+        while True:
+            segment, generation = self._compress_queue.get()
+            try:
+                compressed = compress_file(segment, self._compression)
+                if generation != self._generation:
+                    compressed.unlink(missing_ok=True)  # the file was cleared during compression.
+                else:
+                    self._stats['compressed'] += 1
+            except (PermissionError, OSError):
+                pass  # the segment was removed by clear or backup_count.
+
+    def segment_files(self) -> List[Path]:
+        """Return the rotated segments, oldest first. The current file is not included."""
+        files: Dict[str, Path] = {}
+        for path in Path(self._filename).parent.iterdir():
+            match = self._segment_pattern.match(path.name)
+            if match is None:
+                continue
+            name = path.name if match.group(1) is None else path.name[:match.start(1)]
+            # while a segment is being compressed, both files exist, and the original file is complete.
+            if match.group(1) is None or name not in files:
+                files[name] = path
+        return [files[name] for name in sorted(files)]
+
+    def _iter_file_chunks(self, path: Path, chunk_size: int, skip: int = 0) -> Iterator[bytes]:
+        """
+        Read a file of the segment set, compressed segments are decompressed.
+        Subclasses can override this method to read other formats.
+        :param skip: the bytes to skip, it is only used when `_file_size` returns the size of the file.
+        """
+        with open_compressed_file(path) as file:
+            if skip > 0:
+                file.seek(skip)
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def _file_size(self, path: Path) -> Optional[int]:
+        """
+        Return the size of the data read by `_iter_file_chunks`, None if it is unknown without reading the file.
+        Subclasses must override this method if they override `_iter_file_chunks`.
+        """
+        if path.name.endswith(tuple(COMPRESSED_EXTENSIONS.values())):
+            return None
+        return path.stat().st_size
+
+    def iter_chunks(self, chunk_size: int = 1048576) -> Iterator[bytes]:
+        """Read all segments and the current file, oldest first."""
+        for filename in self.segment_files() + [Path(self._filename)]:
+            try:
+                yield from self._iter_file_chunks(filename, chunk_size)
+            except FileNotFoundError:
+                pass  # the segment was compressed or removed.
+
+    def total_size(self) -> Optional[int]:
+        """Return the total bytes of iter_chunks, None if it is unknown without reading the files."""
+        total = 0
+        for filename in self.segment_files() + [Path(self._filename)]:
+            try:
+                size = self._file_size(filename)
+            except FileNotFoundError:
+                continue
+            if size is None:
+                return None
+            total += size
+        return total
+
+    def iter_range(self, offset: int = 0, limit: Optional[int] = None, chunk_size: int = 1048576) -> Iterator[bytes]:
+        """
+        Read a range of the data of iter_chunks, the memory usage is bounded by chunk_size.
+        The files before the offset are skipped without reading them if their sizes are known.
+        :param offset: the start position.
+        :param limit: the maximum bytes to read, None means read to the end.
+        :param chunk_size: the maximum bytes of a chunk.
+        """
+        for filename in self.segment_files() + [Path(self._filename)]:
+            if limit is not None and limit <= 0:
+                return None
+            try:
+                skip = 0
+                if offset > 0:
+                    size = self._file_size(filename)
+                    if size is not None and offset >= size:
+                        offset -= size
+                        continue
+                    elif size is not None:
+                        skip, offset = offset, 0
+                for chunk in self._iter_file_chunks(filename, chunk_size, skip):
+                    if offset > 0:  # the size of the file is unknown, so read and discard.
+                        if len(chunk) <= offset:
+                            offset -= len(chunk)
+                            continue
+                        chunk, offset = chunk[offset:], 0
+                    if limit is not None:
+                        if len(chunk) >= limit:
+                            yield chunk[:limit]
+                            return None
+                        limit -= len(chunk)
+                    yield chunk
+            except FileNotFoundError:
+                pass  # the segment was compressed or removed.
+
+    def _first_index_time(self, path: Path) -> Optional[float]:
+        """Return the timestamp of the first index entry of the file, None if the file has no index."""
+        try:
+            with open(str(self._index_path(path)), mode='rb') as file:
+                data = file.read(self.INDEX_ENTRY.size)
+        except FileNotFoundError:
+            return None
+        return self.INDEX_ENTRY.unpack(data)[0] if len(data) == self.INDEX_ENTRY.size else None
+
+    def _search_index(
+            self, path: Path, start: Optional[float], end: Optional[float]
+    ) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        Binary search the sparse index of the file with mmap.
+        :return: (the start position, the end position), None if the file has no data in the period.
+        raise FileNotFoundError if the file has no index.
+        """
+        entry = self.INDEX_ENTRY
+        with open(str(self._index_path(path)), mode='rb') as file:
+            count = fstat(file.fileno()).st_size // entry.size
+            if count == 0:
+                raise FileNotFoundError('The index is empty.')
+            with mmap(file.fileno(), count * entry.size, access=ACCESS_READ) as index:
+
+                def bisect(timestamp: float) -> int:
+                    """Return the number of the entries whose timestamp <= timestamp."""
+                    low, high = 0, count
+                    while low < high:
+                        middle = (low + high) // 2
+                        if entry.unpack_from(index, middle * entry.size)[0] <= timestamp:
+                            low = middle + 1
+                        else:
+                            high = middle
+                    return low
+
+                first, last = 0, None
+                if start is not None:
+                    number = bisect(start - self.INDEX_SLACK)
+                    if number > 0:
+                        first = entry.unpack_from(index, (number - 1) * entry.size)[1]
+                if end is not None:
+                    number = bisect(end + self.INDEX_SLACK)
+                    if number < count:
+                        last = entry.unpack_from(index, number * entry.size)[1]
+        return (first, last) if last is None or first < last else None
+
+    def index_ranges(self, start: Optional[float], end: Optional[float]) -> List[Tuple[Path, int, Optional[int]]]:
+        """
+        Find the byte ranges of the data between start and end by the sparse indexes, oldest first.
+        The files that end before start are skipped by the first entry of the next file,
+        the files without index are read entirely, the ranges are widened by INDEX_SLACK seconds.
+        :param start: the start timestamp, None means the oldest data.
+        :param end: the end timestamp, None means the newest data.
+        :return: (path, the start position, the end position (None means the end of the file))
+        """
+        files = self.segment_files() + [Path(self._filename)]
+        first_times = [self._first_index_time(path) for path in files[1:]] + [None]
+        ranges: List[Tuple[Path, int, Optional[int]]] = []
+        for path, following in zip(files, first_times):
+            if start is not None and following is not None and following < start - self.INDEX_SLACK:
+                continue
+            try:
+                result = self._search_index(path, start, end)
+            except (FileNotFoundError, ValueError):
+                result = 0, None
+            if result is not None:
+                ranges.append((path, *result))
+        return ranges
+
+    def get_last_lines(self, number: int) -> List[bytes]:
+        """Return the last lines of the segment set, oldest first."""
+        if number < 1:
+            return []
+        lines, _ = self.get_lines_before(number)
+        return lines[::-1]
+
+    def _iter_lines_reverse(
+            self, path: Path, position: Optional[Tuple[int, ...]], limit: int
+    ) -> Iterator[Tuple[Tuple[int, ...], bytes]]:
+        """
+        Read the lines of a file backwards, and yield (the position of the line, line), newest first.
+        The position is used as the cursor of the next page, the lines before it will be read.
+        The uncompressed files are read by mmap, the compressed segments are decompressed and only the last lines are kept.
+        Subclasses can override this method to read other formats.
+        :param path: the current file or a rotated segment.
+        :param position: read the lines before this position, None means the end of the file.
+        :param limit: the maximum number of lines that the caller needs.
+        """
+        end = None if position is None else position[0]
+        if not path.name.endswith(tuple(COMPRESSED_EXTENSIONS.values())):
+            for offset, line in iter_lines_reverse(path, end):
+                yield (offset,), line
+            return None
+        lines: deque = deque(maxlen=limit)
+        offset = 0
+        with open_compressed_file(path) as file:
+            for line in file:
+                if end is not None and offset >= end:
+                    break
+                lines.append(((offset,), line.rstrip(b'\r\n')))
+                offset += len(line)
+        yield from reversed(lines)
+
+    def _cursor_files(self) -> List[Tuple[str, Path]]:
+        """
+        Return (key, path) of the current file and the segments, newest first.
+        The key of a segment is the name without the compression extension,
+        the key of the current file is '>' + the key of the newest segment, because the current file will be
+        the oldest segment after it when the file is rotated.
+        """
+        segments: List[Tuple[str, Path]] = []
+        for path in reversed(self.segment_files()):
+            match = self._segment_pattern.match(path.name)
+            segments.append((path.name if match.group(1) is None else path.name[:match.start(1)], path))
+        return [('>' + (segments[0][0] if segments else ''), Path(self._filename))] + segments
+
     @staticmethod
-    def _write_loop(queue: Queue, filename: str, encoding: str) -> None:
-        file = open(filename, mode='a', encoding=encoding)
+    def _encode_cursor(key: str, position: Tuple[int, ...]) -> str:
+        data = f'{key}/{",".join(map(str, position))}'
+        return urlsafe_b64encode(data.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str, files: List[Tuple[str, Path]]) -> Tuple[int, Tuple[int, ...]]:
+        """
+        Find the file of the cursor.
+        :return: the index of the file, the position in the file.
+        """
+        try:
+            key, position = urlsafe_b64decode(cursor.encode()).decode().split('/')
+            position = tuple(int(item) for item in position.split(','))
+        except ValueError:
+            raise ValueError('Invalid cursor.')
+        if key.startswith('>'):  # the current file, it may be rotated after the cursor was returned.
+            for index in range(len(files) - 1, 0, -1):
+                if files[index][0] > key[1:]:
+                    return index, position
+            return 0, position
+        for index, (name, _) in enumerate(files):
+            if name == key:
+                return index, position
+        raise ValueError('The cursor is expired, the file was cleared or removed.')
+
+    def get_lines_before(self, number: int, cursor: Optional[str] = None) -> Tuple[List[bytes], Optional[str]]:
+        """
+        Return the lines of the segment set before the cursor, newest first, to read the file backwards page by page.
+        :param number: the maximum number of lines.
+        :param cursor: the cursor returned by the previous call, None means the end of the file.
+        :return: the lines, the cursor of the next page (None means there are no more lines).
+        raise ValueError if the cursor is invalid, or the segment of the cursor was removed.
+        """
+        if number < 1:
+            raise ValueError('number parameter must be greater than 0.')
+        files = self._cursor_files()
+        index, position = self._decode_cursor(cursor, files) if cursor is not None else (0, None)
+        lines: List[bytes] = []
+        for key, path in files[index:]:
+            try:
+                for position, line in self._iter_lines_reverse(path, position, number - len(lines)):
+                    lines.append(line)
+                    if len(lines) >= number:
+                        return lines, self._encode_cursor(key, position)
+            except FileNotFoundError:
+                pass  # the segment was compressed or removed.
+            position = None
+        return lines, None
+
+    def _write_loop(self) -> None:
+        file = self._open()
+        interval = self._durability == self.DURABILITY_INTERVAL
+        rotation = self._rotate_bytes > 0 or self._rotate_age > 0 or self._rotate_when is not None
+        dirty = False  # interval mode only, there are some unsynced data.
+        dirty_since = 0.0
         while True:
-            text = queue.get()
-            if text == MocaFileAppendController.CLEAR_CMD:
-                file.close()
-                Path(filename).unlink(missing_ok=True)
-                file = open(filename, mode='a', encoding=encoding)
-            else:
+            data, command = self._get_batch(
+                max(self._fsync_interval - (monotonic() - dirty_since), 0.0) if dirty else None
+            )
+            if data:
+                try:
+                    if file.closed:  # the file could not be opened again after a rotation or a clear.
+                        file = self._open()
+                    if rotation and self._should_rotate(sum(map(len, data))):
+                        file = self._rotate(file)
+                        dirty = False
+                    offset = self._segment_size
+                    written, lines = self._commit(file, data)
+                    self._segment_size += written
+                    self._segment_lines += lines
+                    self._index_batch(data, offset)
+                    if interval and not dirty:
+                        dirty = True
+                        dirty_since = monotonic()
+                except (PermissionError, OSError):
+                    pass
+            if dirty and monotonic() - dirty_since >= self._fsync_interval:
                 try:
-                    file.write(text)
-                    file.flush()
+                    if not file.closed:  # a closed file was synced before it was closed.
+                        self._fsync(file)
                 except (PermissionError, OSError):
                     pass
+                dirty = False
+            if command == self.CLOSE_CMD:
+                if dirty and not file.closed:
+                    try:
+                        self._fsync(file)
+                    except (PermissionError, OSError):
+                        pass
+                file.close()
+                self._close_index()
+                return None
+            if command == self.CLEAR_CMD:
+                dirty = False
+                self._generation += 1
+                file.close()
+                self._close_index()
+                for segment in self.segment_files():
+                    segment.unlink(missing_ok=True)
+                    self._index_path(segment).unlink(missing_ok=True)
+                Path(self._filename).unlink(missing_ok=True)
+                self._index_path(Path(self._filename)).unlink(missing_ok=True)
+                try:
+                    file = self._open()
+                except (PermissionError, OSError):
+                    pass  # it will be opened before the next batch.
+
+    def _priority(self, data: Any) -> int:
+        """
+        Return the priority of the data in the queue, drop_low_level policy drops the lowest priority first.
+        Subclasses can override this method, all data have the same priority by default.
+        """
+        return 0
+
+    def _count_overflow(self, key: str, count: int = 1) -> None:
+        """Add the count to the dropped or rejected counter."""
+        with self._stats_lock:
+            self._stats[key] += count
+
+    def _put_with_drop(self, data: Any) -> None:
+        """Put the data into the queue, drop a queued data or the new data if the queue is full. (see MocaDropQueue)"""
+        if self._queue.put_with_drop(data, self._overflow == self.OVERFLOW_DROP_OLDEST):
+            self._count_overflow('dropped')
+
+    def _drop_priority(self, data: Any) -> Optional[int]:
+        """The priority of MocaDropQueue, the commands are never dropped."""
+        if data in self.COMMANDS:
+            return None
+        return 0 if self._overflow == self.OVERFLOW_DROP_OLDEST else self._priority(data)
+
+    def _put(self, data: Any) -> bool:
+        """
+        Put the data into the queue, follow the overflow policy.
+        :return: False if the data was rejected, the caller should retry later.
+        """
+        if self._overflow == self.OVERFLOW_BLOCK:
+            try:
+                self._queue.put(data, timeout=self._put_timeout)
+                return True
+            except Full:
+                self._count_overflow('rejected')
+                return False
+        elif self._overflow == self.OVERFLOW_REJECT:
+            try:
+                self._queue.put_nowait(data)
+                return True
+            except Full:
+                self._count_overflow('rejected')
+                return False
+        else:
+            self._put_with_drop(data)
+            return True
+
+    def _put_many(self, items: List[Any]) -> bool:
+        """
+        Put the items into the queue as separate items, so the queue size and the counters are the number of items.
+        block and reject policies put all of the items or nothing, the items more than maxsize are always rejected.
+        The queue that isn't a queue.Queue must have put_many. (see MocaLogChannel)
+        :return: False if the items were rejected, the caller should retry later.
+        """
+        if self._overflow in (self.OVERFLOW_DROP_OLDEST, self.OVERFLOW_DROP_LOW_LEVEL):
+            for item in items:
+                self._put_with_drop(item)
+            return True
+        block = self._overflow == self.OVERFLOW_BLOCK
+        queue = self._queue
+        if not isinstance(queue, Queue):
+            try:
+                queue.put_many(items, block, self._put_timeout)
+                return True
+            except Full:
+                self._count_overflow('rejected', len(items))
+                return False
+        with queue.not_full:
+            if queue.maxsize > 0:
+                deadline = None if self._put_timeout is None else monotonic() + self._put_timeout
+                while queue.maxsize - queue._qsize() < len(items):
+                    remaining = None if deadline is None else deadline - monotonic()
+                    if not block or len(items) > queue.maxsize or (remaining is not None and remaining <= 0):
+                        self._count_overflow('rejected', len(items))
+                        return False
+                    queue.not_full.wait(remaining)
+            for item in items:
+                queue._put(item)
+            queue.unfinished_tasks += len(items)
+            queue.not_empty.notify()
+        return True
+
+    def write(self, text: str) -> bool:
+        """
+        Add the text to the queue.
+        :return: False if the text was rejected by the overflow policy.
+        """
+        return self._put(text)
 
-    def write(self, text: str) -> None:
-        """Add the text to the queue."""
-        self._queue.put(text)
+    def clear(self) -> None:
+        """Clear the file, this command will never be dropped by the overflow policy."""
+        self._queue.put(self.CLEAR_CMD)
+
+    def close(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Write the data in the queue, close the file and stop the writer thread,
+        this command will never be dropped by the overflow policy. The data put after this method are not written.
+        :return: False if timeout.
+        """
+        if self._writer_thread is None:
+            return True
+        self._queue.put(self.CLOSE_CMD)
+        self._writer_thread.join(timeout)
+        return not self._writer_thread.is_alive()
 
     @property
     def size(self) -> int:
         return self._queue.qsize()
 
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the counters of the writer thread.
+        batches, records, bytes: the total count of written batches, records and bytes.
+        max_batch_records, max_batch_bytes: the largest batch.
+        flush_time, max_flush_time: the total and the maximum seconds of write + flush (+ fsync in record mode).
+        fsyncs, fsync_time, max_fsync_time: the total count, the total and the maximum seconds of fsync.
+        fsync_histogram: the count of fsync calls per latency bucket, the upper bound is the key. (seconds)
+        dropped, rejected: the count of data dropped or rejected by the overflow policy.
+        rotations, compressed: the count of rotated segments, and compressed segments.
+        file_size, file_lines: the bytes and the lines of the current file, they are maintained by the writer thread,
+                               so the file is not read. (see _count_lines, e.g. the records of a binary log.)
+        """
+        stats = dict(self._stats)
+        stats['file_size'] = self._segment_size
+        stats['file_lines'] = self._segment_lines
+        stats['durability'] = self._durability
+        stats['overflow'] = self._overflow
+        stats['queue_size'] = self._queue.qsize()
+        stats['queue_maxsize'] = self._queue.maxsize
+        stats['fsync_histogram'] = {
+            str(bound): count for bound, count in zip(self.FSYNC_BUCKETS + ('inf',), self._stats['fsync_histogram'])
+        }
+        return stats
+
 # -------------------------------------------------------------------------- MocaFileAppendController --
@@ -1,11 +1,13 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Union, Optional
+    Union, Optional, Dict, Tuple, List, Set, Any
 )
 from pathlib import Path
 from threading import Thread
-from queue import Queue
+from queue import Queue, Empty
+from collections import OrderedDict
+from time import monotonic
 from ..moca_core import ENCODING
 from ..moca_encrypt import MocaAES
 
@@ -20,10 +22,24 @@ class MocaWriteFileController:
     データをキューに入れて、別スレッドで書き込み処理を行うことで、レスポンスを返す速度を速める。
     把数据放进列队里面，然后在别的线程内进行文件的IO处理，提高程序的体感速度。
 
+    The writer thread keeps a LRU pool of files opened in append mode, keyed by (filename, mode, encoding).
+    It drains the queue, and writes the consecutive appended data of the same file in one write and one flush.
+    The opened files will be closed after `idle_timeout` seconds without writing.
+    The data written in w or wb mode overwrites the file, so only the last one of a batch is written,
+    and the file is opened (truncated) for every write.
+
     Attributes
     ----------
     self._queue: Queue
         the task queue.
+    self._max_open: int
+        The maximum number of opened files.
+    self._idle_timeout: float
+        The opened files will be closed after `idle_timeout` seconds without writing.
+    self._batch_count: int
+        The maximum number of data in one batch.
+    self._stats: Dict[str, int]
+        The counters of the file pool.
     """
 
     DEL_CMD: str = '[el]#moca_delete#'  # If you put this message in the queue, The file will be cleared.
@@ -31,48 +47,129 @@ class MocaWriteFileController:
     def __init__(
             self,
             queue: Optional[Queue] = None,
-            maxsize: int = 0
+            maxsize: int = 0,
+            max_open: int = 32,
+            idle_timeout: float = 5.0,
+            batch_count: int = 1024
     ):
         """
         :param queue: a instance of Queue class.
         :param maxsize: the maximum size of the queue, If maxsize is <= 0, the queue size is infinite.
+        :param max_open: the maximum number of opened files.
+        :param idle_timeout: the opened files will be closed after `idle_timeout` seconds without writing.
+        :param batch_count: the maximum number of data in one batch.
         """
         # set queue
         self._queue: Queue = queue if queue is not None else Queue(maxsize=maxsize)
+        # set file pool
+        self._max_open: int = max(max_open, 1)
+        self._idle_timeout: float = idle_timeout
+        self._batch_count: int = max(batch_count, 1)
+        self._stats: Dict[str, int] = {
+            'writes': 0,
+            'hits': 0,
+            'opens': 0,
+            'reopens': 0,
+            'evictions': 0,
+            'idle_closes': 0,
+        }
         # start the loop thread.
-        Thread(target=MocaWriteFileController._write_loop, args=(self._queue,), daemon=True).start()
+        Thread(target=self._write_loop, daemon=True).start()
 
     def __str__(self) -> str:
         return 'MocaWriteFileController'
 
-    @staticmethod
-    def _write_loop(queue: Queue) -> None:
-        file = None
-        latest_name = None
-        latest_encoding = None
-        latest_mode = None
-        while True:
-            filename, mode, encoding, data = queue.get()
-            if data == MocaWriteFileController.DEL_CMD:
-                if file is not None and file.name == filename:
-                    file.close()
-                    file = None
-                Path(filename).unlink(missing_ok=True)
-            else:
+    def _open(self, seen: Set[Tuple[str, str, str]], key: Tuple[str, str, str]):
+        filename, mode, encoding = key
+        file = open(filename, mode=mode) if 'b' in mode else open(filename, mode=mode, encoding=encoding)
+        self._stats['opens'] += 1
+        if key in seen:
+            self._stats['reopens'] += 1
+        seen.add(key)
+        return file
+
+    def _get_file(self, pool: 'OrderedDict[Tuple[str, str, str], Any]', seen: Set[Tuple[str, str, str]],
+                  key: Tuple[str, str, str]):
+        """
+        Return the opened file from the pool, open it if it is not in the pool.
+        The file opened with other mode or encoding is closed, so a file has only one position.
+        """
+        try:
+            file, _ = pool.pop(key)
+            self._stats['hits'] += 1
+        except KeyError:
+            self._close_files(pool, filename=key[0])
+            if len(pool) >= self._max_open:
+                _, (old, _) = pool.popitem(last=False)
+                old.close()
+                self._stats['evictions'] += 1
+            file = self._open(seen, key)
+        pool[key] = (file, monotonic())
+        return file
+
+    def _write_pending(self, pool: 'OrderedDict[Tuple[str, str, str], Any]', seen: Set[Tuple[str, str, str]],
+                       pending: Dict[str, List[Tuple[Tuple[str, str, str], List[Union[str, bytes]]]]]) -> None:
+        """Write the pending data of every file in order."""
+        for writes in pending.values():
+            for key, data in writes:
                 try:
-                    if filename != latest_name or encoding != latest_encoding or mode != latest_mode:
-                        if file is not None:
-                            file.close()
-                        file = open(filename, mode=mode, encoding=encoding)
-                        latest_name = filename
-                        latest_encoding = encoding
-                        latest_mode = mode
-                    if file is not None:
-                        file.write(data)
+                    if key[1] == 'a':
+                        file = self._get_file(pool, seen, key)
+                        file.write(''.join(data))
                         file.flush()
+                    else:  # overwrite, open the file again to truncate it.
+                        self._close_files(pool, filename=key[0])
+                        with self._open(seen, key) as file:
+                            file.write(data[-1])
+                    self._stats['writes'] += 1
                 except (PermissionError, OSError):
                     pass
 
+    @staticmethod
+    def _close_files(pool: 'OrderedDict[Tuple[str, str, str], Any]', filename: Optional[str] = None,
+                     idle_before: Optional[float] = None) -> int:
+        """Close the opened files of the target file, or the files that are idle since `idle_before`."""
+        count = 0
+        for key in list(pool):
+            file, last_used = pool[key]
+            if (filename is not None and key[0] == filename) or (idle_before is not None and last_used < idle_before):
+                del pool[key]
+                file.close()
+                count += 1
+        return count
+
+    def _write_loop(self) -> None:
+        pool: 'OrderedDict[Tuple[str, str, str], Any]' = OrderedDict()
+        seen: Set[Tuple[str, str, str]] = set()
+        while True:
+            try:
+                items = [self._queue.get(timeout=self._idle_timeout if pool else None)]
+            except Empty:
+                items = []
+            while len(items) < self._batch_count:
+                try:
+                    items.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            # the writes of every file in order, (key, data), consecutive appended data are coalesced.
+            pending: Dict[str, List[Tuple[Tuple[str, str, str], List[Union[str, bytes]]]]] = {}
+            for filename, mode, encoding, data in items:
+                if data == MocaWriteFileController.DEL_CMD:
+                    pending.pop(filename, None)  # the file will be deleted, don't write it.
+                    self._close_files(pool, filename=filename)
+                    Path(filename).unlink(missing_ok=True)
+                elif mode == 'a':
+                    writes = pending.setdefault(filename, [])
+                    key = (filename, mode, encoding)
+                    if writes and writes[-1][0] == key:
+                        writes[-1][1].append(data)
+                    else:
+                        writes.append((key, [data]))
+                else:
+                    pending[filename] = [((filename, mode, encoding), [data])]  # overwrite the previous writes.
+            self._write_pending(pool, seen, pending)
+            self._stats['idle_closes'] += self._close_files(pool, idle_before=monotonic() - self._idle_timeout)
+
     def write(self, filename: Union[str, Path], mode: str, data: Union[bytes, str], encoding: str = ENCODING) -> None:
         """
         Write data into the file on other thread.
@@ -88,6 +185,21 @@ class MocaWriteFileController:
     def size(self) -> int:
         return self._queue.qsize()
 
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the counters of the file pool.
+        writes: the count of writes, the coalesced data are counted once.
+        hits, opens: the count of writes that used an opened file, and the count of opened files.
+        reopens: the count of files opened again after they were closed.
+        evictions, idle_closes: the count of files closed by the pool size limit, and by the idle timeout.
+        hit_rate, reopen_rate: hits / writes, reopens / writes.
+        """
+        stats: Dict[str, Any] = dict(self._stats)
+        stats['hit_rate'] = stats['hits'] / stats['writes'] if stats['writes'] else 0.0
+        stats['reopen_rate'] = stats['reopens'] / stats['writes'] if stats['writes'] else 0.0
+        return stats
+
 # -------------------------------------------------------------------------- MocaWriteFileController --
 
 # -- MocaWriteEncryptedFileController --------------------------------------------------------------------------
@@ -1,6 +1,7 @@
 # -- Imports --------------------------------------------------------------------------
 
 from .MocaDirectoryCache import MocaDirectoryCache
+from .MocaDropQueue import MocaDropQueue
 from .MocaFileAppendController import MocaFileAppendController
 from .MocaFileCacheController import MocaFileCacheController
 from .MocaSynchronizedBinaryFile import MocaSynchronizedBinaryFile
@@ -15,7 +16,8 @@ from .utils import (
     aio_get_bytes_from_file, aio_get_bytes_from_file_with_cache, write_str_to_file, aio_write_str_to_file,
     write_bytes_to_file, aio_write_bytes_to_file, append_str_to_file, aio_append_str_to_file, load_json_from_file,
     load_json_from_file_with_cache, aio_load_json_from_file, aio_load_json_from_file_with_cache,
-    dump_json_to_file, aio_dump_json_to_file, get_last_line, get_str_from_end_of_file
+    dump_json_to_file, aio_dump_json_to_file, get_last_line, get_str_from_end_of_file, open_compressed_file,
+    compress_file, iter_lines_reverse
 )
 
 # -------------------------------------------------------------------------- Imports --
@@ -44,4 +46,6 @@ python-magic
         pip install python-magic-bin
     macOS
         brew install libmagic 
+zstandard (optional)
+    Zstandard bindings for Python, only required by zstd compression.
 """
@@ -1,13 +1,21 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Union, Optional, Any, List
+    Union, Optional, Any, List, BinaryIO, Iterator, Tuple
 )
 from async_lru import alru_cache
 from functools import lru_cache
 from pathlib import Path
 from aiofiles import open as aio_open
-from os import stat, SEEK_END
+from os import stat, fstat, SEEK_END
+from mmap import mmap, ACCESS_READ
+from gzip import open as gzip_open
+from shutil import copyfileobj
+try:
+    from zstandard import ZstdCompressor, ZstdDecompressor
+    zstd_flag = True
+except (ImportError, ModuleNotFoundError):
+    zstd_flag = False
 try:
     from magic import from_file
     libmagic_flag = True
@@ -45,6 +53,12 @@ from ..moca_core import ENCODING, NEW_LINE
 
 MAXSIZE = 1024
 
+# compression method -> file extension
+COMPRESSED_EXTENSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
 # -------------------------------------------------------------------------- Variables --
 
 # -- Utils --------------------------------------------------------------------------
@@ -181,7 +195,7 @@ async def aio_dump_json_to_file(obj: Any, filename: Union[str, Path], encoding:
 
 
 def get_last_line(file, number: int = 1, chunk_size: int = 1024, newline: bytes = b'\n'):
-    """The file must be opened as binary mode"""
+    """The file must be opened as binary mode, iter_lines_reverse is faster for a large file."""
     end: List[bytes] = []
     index = 0
     count = 0
@@ -192,15 +206,15 @@ def get_last_line(file, number: int = 1, chunk_size: int = 1024, newline: bytes
         try:
             file.seek(-index - chunk_size, SEEK_END)
         except OSError:
-            return b''.join(end)
+            return b''.join(reversed(end))
         chunk = file.read(chunk_size)
-        end.insert(0, chunk)
+        end.append(chunk)  # newest first, joined only once.
         index += chunk_size
         count += chunk.count(newline)
         if count < number:
             continue
         else:
-            return newline.join(b''.join(end).split(newline)[-number:])
+            return newline.join(b''.join(reversed(end)).split(newline)[-number:])
 
 
 def get_str_from_end_of_file(
@@ -215,4 +229,78 @@ def get_str_from_end_of_file(
         return data.decode(encoding)
 
 
+def iter_lines_reverse(
+        filename: Union[str, Path],
+        end: Optional[int] = None,
+        newline: bytes = b'\n'
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Read the lines of the file backwards with mmap, and yield (offset, line), newest first.
+    The offset is the start position of the line, the line doesn't contain the newline.
+    Only the yielded lines are copied, so the memory usage doesn't depend on the file size.
+    :param filename: the path of the file, the file must not be compressed.
+    :param end: read the lines that start before this position, None means the end of the file.
+                the offset of a yielded line can be used as the end of the next call.
+    :param newline: the line separator.
+    """
+    with open(str(filename), mode='rb') as file:
+        size = fstat(file.fileno()).st_size
+        stop = size if end is None else min(end, size)
+        if stop <= 0:
+            return None
+        with mmap(file.fileno(), size, access=ACCESS_READ) as data:
+            # the newline at the end of the last line is not a separator of an empty line.
+            line_end = stop - len(newline) if data[stop - len(newline):stop] == newline else stop
+            while True:
+                index = data.rfind(newline, 0, line_end)
+                start = index + len(newline) if index >= 0 else 0
+                yield start, data[start:line_end].rstrip(b'\r')
+                if start == 0:
+                    return None
+                line_end = start - len(newline)
+
+
+def open_compressed_file(filename: Union[str, Path]) -> BinaryIO:
+    """
+    Open the file as binary mode for reading, .gz and .zst files will be decompressed.
+    zstd compression need zstandard module.
+    """
+    filename = str(filename)
+    if filename.endswith(COMPRESSED_EXTENSIONS['gzip']):
+        return gzip_open(filename, mode='rb')
+    elif filename.endswith(COMPRESSED_EXTENSIONS['zstd']):
+        if not zstd_flag:
+            raise ValueError('zstd compression need zstandard module.')
+        return ZstdDecompressor().stream_reader(open(filename, mode='rb'), closefd=True)
+    else:
+        return open(filename, mode='rb')
+
+
+def compress_file(filename: Union[str, Path], method: str = 'gzip') -> Path:
+    """
+    Compress the file, and remove the original file.
+    The compressed data will be written to a temporary file at first, so the original file is always complete.
+    :param filename: the path of the file.
+    :param method: gzip or zstd, zstd compression need zstandard module.
+    :return: the path of the compressed file.
+    """
+    if method not in COMPRESSED_EXTENSIONS:
+        raise ValueError('method parameter only supports gzip or zstd.')
+    if method == 'zstd' and not zstd_flag:
+        raise ValueError('zstd compression need zstandard module.')
+    src = Path(filename)
+    dst = src.with_name(src.name + COMPRESSED_EXTENSIONS[method])
+    tmp = src.with_name(dst.name + '.tmp')
+    with open(str(src), mode='rb') as reader:
+        if method == 'gzip':
+            with gzip_open(str(tmp), mode='wb') as writer:
+                copyfileobj(reader, writer)
+        else:
+            with open(str(tmp), mode='wb') as file:
+                ZstdCompressor().copy_stream(reader, file)
+    tmp.rename(dst)
+    src.unlink(missing_ok=True)
+    return dst
+
+
 # -------------------------------------------------------------------------- Utils --
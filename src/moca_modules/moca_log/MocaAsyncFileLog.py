@@ -1,16 +1,19 @@
 # -- Import --------------------------------------------------------------------------
 
 from typing import (
-    Optional, Union
+    Optional, Union, Dict, Any, Tuple
 )
 from aiofiles import open as aio_open
+from asyncio import Event, Lock, Task, TimeoutError, wait_for, get_event_loop
 from pathlib import Path
+from collections import deque
+from time import time, monotonic
 from traceback import format_exc, print_exc
-from datetime import datetime
 from .LogLevel import LogLevel
-from ..moca_core import tz, ENCODING, NEW_LINE
+from ..moca_core import ENCODING, NEW_LINE
 from ..moca_utils import (
-    get_my_pid, get_my_tid, location, print_debug, print_info, print_warning, print_error, print_critical
+    format_timestamp, get_my_pid, get_my_tid, location, print_debug, print_info, print_warning, print_error,
+    print_critical
 )
 
 # -------------------------------------------------------------------------- Import --
@@ -24,6 +27,12 @@ class MocaAsyncFileLog:
     ログの非同期書き込み用クラス。
     异步化处理日志文件。
 
+    In buffered mode, write_log only appends the log message to an in-memory buffer,
+    and a background task writes the buffer to the file when the buffer is larger than `buffer_size`,
+    or every `flush_interval` seconds. Please call `aclose` before the event loop stops.
+    The buffer keeps at most `max_buffer` log messages, when the file can't be written (e.g. the disk is full),
+    the oldest log message is dropped, or the new log message is rejected.
+
     Attributes
     ----------
     self._filename: str
@@ -38,25 +47,90 @@ class MocaAsyncFileLog:
         The flag of debug mode.
     self._file
         The file object of log file.
+    self._buffered: bool
+        The flag of buffered mode.
+    self._buffer_size: int
+        The buffer will be flushed when it contains more characters than this value.
+    self._flush_interval: float
+        The buffer will be flushed every `flush_interval` seconds.
+    self._max_buffer: int
+        The maximum number of log messages in the buffer, 0 means unlimited.
+    self._overflow: str
+        The overflow policy of the buffer, drop_oldest or reject.
+    self._buffer: deque
+        The log messages waiting for the background task.
+    self._buffer_times: deque
+        The time when each log message was added to the buffer.
+    self._buffer_length: int
+        The total characters in the buffer.
+    self._flush_task: Optional[Task]
+        The background task.
+    self._flush_event: Optional[Event]
+        Wake up the background task.
+    self._lock: Optional[Lock]
+        The lock of the file object.
+    self._closing: bool
+        Stop the background task after the next flush.
+    self._generation: int
+        Increased by clear_log, a failed flush doesn't put back the cleared log messages.
+    self._stats: Dict[str, Any]
+        The counters of buffered mode.
     """
 
+    OVERFLOW_DROP_OLDEST: str = 'drop_oldest'
+    OVERFLOW_REJECT: str = 'reject'
+    OVERFLOW_POLICIES: Tuple[str, ...] = (OVERFLOW_DROP_OLDEST, OVERFLOW_REJECT)
+
     def __init__(
             self,
             filename: Union[str, Path],
             log_level: int = 1,
             encoding: str = ENCODING,
+            buffered: bool = False,
+            buffer_size: int = 65536,
+            flush_interval: float = 0.5,
+            max_buffer: int = 100000,
+            overflow: str = OVERFLOW_DROP_OLDEST,
     ):
         """
         :param filename: The path of target file.
         :param log_level: The log level of this instance.
         :param encoding: The encoding of the target file.
+        :param buffered: write logs to an in-memory buffer, and flush it in a background task.
+        :param buffer_size: the buffer will be flushed when it contains more characters than this value.
+        :param flush_interval: the buffer will be flushed every `flush_interval` seconds.
+        :param max_buffer: the maximum number of log messages in the buffer, 0 means unlimited.
+        :param overflow: the overflow policy of the full buffer, drop_oldest or reject.
         """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError('overflow parameter only supports drop_oldest or reject.')
         self._filename: str = str(filename)
         self._encoding: str = encoding
         self._log_level: int = log_level
         self._pid: Optional[int] = get_my_pid()
         self._debug: bool = False
         self._file = None
+        self._buffered: bool = buffered
+        self._buffer_size: int = buffer_size
+        self._flush_interval: float = flush_interval
+        self._max_buffer: int = max(max_buffer, 0)
+        self._overflow: str = overflow
+        self._buffer: deque = deque()
+        self._buffer_times: deque = deque()
+        self._buffer_length: int = 0
+        self._flush_task: Optional[Task] = None
+        self._flush_event: Optional[Event] = None
+        self._lock: Optional[Lock] = None
+        self._closing: bool = False
+        self._generation: int = 0
+        self._stats: Dict[str, Any] = {
+            'records': 0,
+            'flushes': 0,
+            'wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'dropped': 0,
+            'rejected': 0,
+        }
 
     @property
     def log_level(self) -> int:
@@ -80,17 +154,15 @@ class MocaAsyncFileLog:
         ----------
         [loglevel](time)<filename|caller|line number|process id|thread id> message
         """
-        if self._file is None:
+        if self._file is None and not self._buffered:
             self._file = await aio_open(self._filename, mode='a', encoding=self._encoding)
         if self._log_level <= level:
             filename, caller, line = location()
-            current_time = datetime.now(tz=tz)
-            msg = f"[{LogLevel.int_to_str(level)}]({str(current_time)})" \
+            current_time = format_timestamp(time())
+            msg = f"[{LogLevel.int_to_str(level)}]({current_time})" \
                   f"<{filename}|{caller}|{line}|{self._pid or 0}|{get_my_tid()}>" \
                   f"{message}{NEW_LINE}"
-            if self._file is not None:  # to pass mypy check
-                await self._file.write(msg)
-                await self._file.flush()
+            await self._append(msg)
             if self._debug:
                 self._print_log(msg, level)
         else:
@@ -100,16 +172,117 @@ class MocaAsyncFileLog:
         msg = "-- Exception -------------------------------------" \
               f"{format_exc()}" \
               f"------------------------------------- Exception --{NEW_LINE}"
-        if self._file is None:
-            self._file = await aio_open(self._filename, mode='a', encoding=self._encoding)
-        if self._file is not None:  # to pass mypy check
-            await self._file.write(msg)
-            await self._file.flush()
+        await self._append(msg)
         if self._debug:
             print("-- Exception -------------------------------------")
             print_exc()
             print("------------------------------------- Exception --")
 
+    async def _append(self, msg: str) -> None:
+        """Write the message to the file, or add it to the buffer in buffered mode."""
+        if self._buffered:
+            if self._flush_task is None:
+                self._lock = Lock()
+                self._flush_event = Event()
+                self._flush_task = get_event_loop().create_task(self._flush_loop())
+            if 0 < self._max_buffer <= len(self._buffer):
+                if self._overflow == self.OVERFLOW_REJECT:
+                    self._stats['rejected'] += 1
+                    return None
+                self._drop_oldest()
+            self._buffer.append(msg)
+            self._buffer_times.append(monotonic())
+            self._buffer_length += len(msg)
+            if self._buffer_length >= self._buffer_size and self._flush_event is not None:
+                self._flush_event.set()
+        else:
+            if self._file is None:
+                self._file = await aio_open(self._filename, mode='a', encoding=self._encoding)
+            if self._file is not None:  # to pass mypy check
+                await self._file.write(msg)
+                await self._file.flush()
+
+    def _drop_oldest(self) -> None:
+        """Drop the oldest log message in the buffer."""
+        self._buffer_length -= len(self._buffer.popleft())
+        self._buffer_times.popleft()
+        self._stats['dropped'] += 1
+
+    async def _flush_loop(self) -> None:
+        """The background task of buffered mode."""
+        while not self._closing:
+            try:
+                await wait_for(self._flush_event.wait(), self._flush_interval)
+            except TimeoutError:
+                pass
+            self._flush_event.clear()
+            try:
+                await self.flush()
+            except (PermissionError, OSError):
+                pass
+
+    async def flush(self) -> None:
+        """
+        Write all log messages in the buffer to the file.
+        If the write failed, the log messages are put back at the front of the buffer, and the error is raised.
+        The log messages more than `max_buffer` are dropped, the oldest first.
+        """
+        if not self._buffer or self._lock is None:
+            return None
+        async with self._lock:
+            buffer, times, length = self._buffer, self._buffer_times, self._buffer_length
+            self._buffer, self._buffer_times, self._buffer_length = deque(), deque(), 0
+            if not buffer:
+                return None
+            generation = self._generation
+            try:
+                if self._file is None:
+                    self._file = await aio_open(self._filename, mode='a', encoding=self._encoding)
+                await self._file.write(''.join(buffer))
+                await self._file.flush()
+            except (PermissionError, OSError):
+                if generation == self._generation:
+                    # the log messages added during the write follow the unwritten ones.
+                    self._buffer.extendleft(reversed(buffer))
+                    self._buffer_times.extendleft(reversed(times))
+                    self._buffer_length += length
+                    while 0 < self._max_buffer < len(self._buffer):
+                        self._drop_oldest()
+                raise
+            now = monotonic()
+            stats = self._stats
+            stats['records'] += len(buffer)
+            stats['flushes'] += 1
+            stats['wait_time'] += now * len(times) - sum(times)
+            if now - times[0] > stats['max_wait_time']:
+                stats['max_wait_time'] = now - times[0]
+
+    async def aclose(self) -> None:
+        """Drain the buffer, stop the background task and close the file."""
+        if self._flush_task is not None:
+            self._closing = True
+            self._flush_event.set()
+            await self._flush_task
+            self._flush_task = None
+            self._closing = False
+        await self.flush()
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the counters of buffered mode.
+        records, flushes: the total count of flushed log messages and flushes.
+        wait_time, max_wait_time: the total and the maximum seconds that log messages waited in the buffer.
+        pending: the count of log messages in the buffer.
+        dropped, rejected: the count of log messages dropped or rejected because the buffer was full.
+        """
+        stats = dict(self._stats)
+        stats['pending'] = len(self._buffer)
+        return stats
+
     def start_dev_mode(self) -> None:
         """Show all logs on the console."""
         self._debug = True
@@ -122,8 +295,8 @@ class MocaAsyncFileLog:
         """Print a log message."""
         if self._log_level <= level:
             filename, caller, line = location()
-            current_time = datetime.now(tz=tz)
-            msg = f"[{LogLevel.int_to_str(level)}]({str(current_time)})" \
+            current_time = format_timestamp(time())
+            msg = f"[{LogLevel.int_to_str(level)}]({current_time})" \
                   f"<{filename}|{caller}|{line}|{self._pid or 0}|{get_my_tid()}>" \
                   f"{message}"
             self._print_log(msg, level)
@@ -145,10 +318,22 @@ class MocaAsyncFileLog:
             print_critical(message)
 
     async def clear_log(self) -> None:
+        if self._buffered:
+            self._buffer, self._buffer_times, self._buffer_length = deque(), deque(), 0
+            self._generation += 1
+        if self._lock is not None:
+            async with self._lock:
+                await self._clear_log()
+        else:
+            await self._clear_log()
+
+    async def _clear_log(self) -> None:
         if self._file is not None:
             await self._file.close()
             Path(self._filename).unlink(missing_ok=True)
             self._file = await aio_open(self._filename, mode='a', encoding=self._encoding)
+        elif self._buffered:  # the file is not opened yet in buffered mode.
+            Path(self._filename).unlink(missing_ok=True)
 
     async def get_all_log(self) -> str:
         async with aio_open(self._filename, mode='r', encoding=self._encoding) as file:
@@ -0,0 +1,189 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Optional, Tuple, List, Dict, Iterable
+)
+from asyncio import (
+    AbstractEventLoop, Event, Task, TimeoutError, wait_for, sleep, get_running_loop, gather
+)
+from time import monotonic
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, ClientError
+from .MocaLogClient import MocaLogClientBase
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaAsyncLogClient --------------------------------------------------------------------------
+
+
+class MocaAsyncLogClient(MocaLogClientBase):
+    """
+    The asyncio version of MocaLogClient, the requests are sent by the background tasks with aiohttp.
+    write_log is a normal method, it can be called in the event loop or from other threads.
+    The background tasks are started by the first write_log in the event loop, or `start`.
+    Please call `aclose` before the event loop stops.
+
+    Attributes
+    ----------
+    self._loop: Optional[AbstractEventLoop]
+        The event loop of the background tasks.
+    self._session: Optional[ClientSession]
+        The HTTP session, it has a connection pool of `pool_size` connections.
+    self._tasks: List[Task]
+        The background tasks.
+    self._ready: Optional[Event]
+        Wake up the background tasks.
+    self._idle: Optional[Event]
+        Set when all buffered logs are sent or dropped.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            api_key: Optional[str] = None,
+            batch_size: int = 500,
+            flush_interval: float = 1.0,
+            buffer_size: int = 100000,
+            max_retries: int = 5,
+            retry_interval: float = 0.5,
+            timeout: float = 5.0,
+            pool_size: int = 1,
+            gzip: bool = False,
+    ):
+        """Please refer to MocaLogClientBase."""
+        super().__init__(
+            url, api_key, batch_size, flush_interval, buffer_size, max_retries, retry_interval, timeout, pool_size, gzip
+        )
+        self._loop: Optional[AbstractEventLoop] = None
+        self._session: Optional[ClientSession] = None
+        self._tasks: List[Task] = []
+        self._ready: Optional[Event] = None
+        self._idle: Optional[Event] = None
+
+    async def __aenter__(self) -> 'MocaAsyncLogClient':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    def _start(self) -> None:
+        self._loop = get_running_loop()
+        self._ready = Event()
+        self._idle = Event()
+        self._session = ClientSession(
+            connector=TCPConnector(limit=self._pool_size),
+            timeout=ClientTimeout(total=self._timeout),
+        )
+        self._tasks = [self._loop.create_task(self._send_loop()) for _ in range(self._pool_size)]
+
+    async def start(self) -> None:
+        """Start the background tasks in the current event loop."""
+        if self._loop is None:
+            self._start()
+
+    def _wakeup(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    def write_logs(self, records: Iterable[Tuple[int, str]]) -> bool:
+        if self._loop is None:
+            try:
+                self._start()
+            except RuntimeError:
+                pass  # not in the event loop, the logs are buffered until start.
+        return super().write_logs(records)
+
+    def _done(self, batch: List[Tuple[int, str]], sent: bool) -> None:
+        super()._done(batch, sent)
+        with self._condition:
+            if self._is_idle():
+                self._idle.set()
+
+    async def _post(self, body: bytes, headers: Dict[str, str]) -> Tuple[Optional[int], Optional[str]]:
+        """:return: the status code (None means a network error), the value of Retry-After header."""
+        try:
+            async with self._session.post(f'{self._url}/save-logs', data=body, headers=headers) as res:
+                await res.read()
+                return res.status, res.headers.get('Retry-After')
+        except (ClientError, TimeoutError):
+            return None, None
+
+    async def _send(self, batch: List[Tuple[int, str]]) -> None:
+        body, headers = self._payload(batch)
+        attempt = 0
+        while True:
+            status, retry_after = await self._post(body, headers)
+            with self._condition:
+                self._stats['requests'] += 1
+            if status == 200:
+                return self._done(batch, True)
+            delay = self._retry_delay(status, retry_after, attempt)
+            if delay is None:
+                return self._done(batch, False)
+            with self._condition:
+                self._stats['retries'] += 1
+            attempt += 1
+            await sleep(delay)
+
+    async def _send_loop(self) -> None:
+        while True:
+            with self._condition:
+                ready = self._is_ready()
+            if not ready:
+                try:
+                    await wait_for(self._ready.wait(), self._flush_interval)
+                except TimeoutError:
+                    pass
+                self._ready.clear()
+            with self._condition:
+                if self._closed and not self._buffer:
+                    return None
+                batch = self._take_batch()
+            if batch:
+                await self._send(batch)
+
+    async def _wait_idle(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            with self._condition:
+                if self._is_idle():
+                    return True
+            self._idle.clear()
+            try:
+                await wait_for(self._idle.wait(), None if deadline is None else max(deadline - monotonic(), 0))
+            except TimeoutError:
+                return False
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send the buffered logs now, and wait until they are sent or dropped.
+        :return: False if timeout.
+        """
+        await self.start()
+        with self._condition:
+            self._flushing += 1
+        self._ready.set()
+        try:
+            return await self._wait_idle(timeout)
+        finally:
+            with self._condition:
+                self._flushing -= 1
+
+    async def aclose(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Send the buffered logs, and stop the background tasks. the logs written after this method are dropped.
+        :return: False if timeout, the remaining logs are dropped.
+        """
+        await self.start()
+        with self._condition:
+            self._closed = True
+        self._ready.set()
+        idle = await self._wait_idle(timeout)
+        for task in self._tasks:
+            task.cancel()
+        await gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._session.close()
+        return idle
+
+# -------------------------------------------------------------------------- MocaAsyncLogClient --
@@ -1,18 +1,28 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Optional, Union
+    Optional, Union, Any, Tuple, Dict, List, Iterator, Iterable
 )
+from collections import deque
+from io import BufferedReader, BytesIO
+from itertools import chain
+from datetime import datetime
+from re import compile
 from pathlib import Path
+from os.path import basename
+from sys import _getframe
+from types import CodeType
 from queue import Queue
-from datetime import datetime
+from time import time
 from traceback import format_exc, print_exc
-from ..moca_core import tz, ENCODING, NEW_LINE
-from ..moca_file import MocaFileAppendController
+from ..moca_core import ENCODING, NEW_LINE
+from ..moca_file import MocaFileAppendController, open_compressed_file
 from ..moca_utils import (
-    location, get_my_pid, get_my_tid, print_debug, print_info, print_warning, print_error, print_critical
+    format_timestamp, get_my_pid, get_my_tid, print_debug, print_info, print_warning, print_error, print_critical
 )
 from .LogLevel import LogLevel
+from .MocaLogRecord import MocaLogRecord
+from .MocaLogCodec import MocaLogCodec
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -40,27 +50,100 @@ class MocaFileLog(MocaFileAppendController):
         The process id of this process.
     self._debug: bool
         The flag of debug mode.
+    self._deferred: bool
+        The flag of deferred mode, put MocaLogRecord into the queue and render it in the writer thread.
+    self._location_mode: str
+        How to capture the location of the caller.
+        off: don't capture the location.
+        static: capture the location once per code object, and reuse it. (the line number of the first call.)
+        full: capture the location of every call.
+    self._location_cache: Dict[CodeType, Tuple[str, str, int]]
+        The location cache of static mode.
+    self._log_format: str
+        The format of the log file.
+        text: the text log format.
+        binary: compressed blocks of binary records, please refer to MocaLogCodec.
+                The read methods decode it to the text log format.
     """
 
+    LOCATION_OFF: str = 'off'
+    LOCATION_STATIC: str = 'static'
+    LOCATION_FULL: str = 'full'
+    LOCATION_MODES: Tuple[str, ...] = (LOCATION_OFF, LOCATION_STATIC, LOCATION_FULL)
+    UNKNOWN_LOCATION: Tuple[str, str, int] = ('unknown', 'unknown', -1)
+    FORMAT_TEXT: str = 'text'
+    FORMAT_BINARY: str = 'binary'
+    LOG_FORMATS: Tuple[str, ...] = (FORMAT_TEXT, FORMAT_BINARY)
+    TIMESTAMP_PATTERN = compile(rb'\[[A-Z]+\]\(([^)]+)\)')  # [loglevel](time)
+
     def __init__(
             self,
             filename: Union[str, Path],
             log_level: int = 1,
             encoding: str = ENCODING,
             queue: Optional[Queue] = None,
-            maxsize: int = 0
+            maxsize: int = 0,
+            batch_size: int = 1048576,
+            batch_latency: float = 0.0,
+            durability: str = MocaFileAppendController.DURABILITY_NONE,
+            fsync_interval: float = 1.0,
+            overflow: str = MocaFileAppendController.OVERFLOW_BLOCK,
+            put_timeout: Optional[float] = None,
+            deferred: bool = False,
+            location_mode: str = LOCATION_FULL,
+            rotate_bytes: int = 0,
+            rotate_age: float = 0.0,
+            rotate_when: Optional[str] = None,
+            compression: Optional[str] = None,
+            backup_count: int = 0,
+            log_format: str = FORMAT_TEXT,
+            index_interval: float = 0.0,
+            index_records: int = 0,
+            writer_thread: bool = True
     ):
         """
         :param filename: The path of target file.
         :param log_level: The log level of this instance.
         :param encoding: The encoding of the target file.
-        :param queue: a instance of Queue class.
+        :param queue: a instance of Queue class, drop_oldest and drop_low_level policies need MocaDropQueue.
         :param maxsize: the maximum size of the queue, If maxsize is <= 0, the queue size is infinite.
+        :param batch_size: the maximum bytes of one batch, If batch_size is <= 0, group-commit is disabled.
+        :param batch_latency: the maximum seconds to wait for more logs before writing a batch.
+        :param durability: the durability policy, none, batch, interval or record.
+        :param fsync_interval: the seconds between two fsync calls in interval mode.
+        :param overflow: the overflow policy of a bounded queue, block, drop_oldest, drop_low_level or reject.
+        :param put_timeout: the maximum seconds to wait for a free slot in block mode, None means wait forever.
+        :param deferred: put compact records into the queue, and render them in the writer thread.
+        :param location_mode: how to capture the location of the caller, off, static or full.
+        :param rotate_bytes: rotate the file when it is larger than this value, 0 means disabled.
+        :param rotate_age: rotate the file when it is older than this value (seconds), 0 means disabled.
+        :param rotate_when: rotate the file at a wall-clock boundary, hourly or daily, None means disabled.
+        :param compression: the compression method of rotated segments, gzip or zstd, None means don't compress.
+        :param backup_count: the maximum number of rotated segments, 0 means keep all.
+        :param log_format: the format of the log file, text or binary. binary format always renders in the writer thread.
+        :param index_interval: add a sparse time index entry every this seconds, 0 means disabled.
+        :param index_records: add a sparse time index entry every this number of records, 0 means disabled.
+        :param writer_thread: start the writer thread, False means the queue is consumed by another process.
         """
-        super().__init__(filename=filename, encoding=encoding, queue=queue, maxsize=maxsize)
+        if location_mode not in self.LOCATION_MODES:
+            raise ValueError('location_mode parameter only supports off, static or full.')
+        if log_format not in self.LOG_FORMATS:
+            raise ValueError('log_format parameter only supports text or binary.')
+        super().__init__(
+            filename=filename, encoding=encoding, queue=queue, maxsize=maxsize,
+            batch_size=batch_size, batch_latency=batch_latency, durability=durability, fsync_interval=fsync_interval,
+            overflow=overflow, put_timeout=put_timeout, rotate_bytes=rotate_bytes, rotate_age=rotate_age,
+            rotate_when=rotate_when, compression=compression, backup_count=backup_count,
+            index_interval=index_interval, index_records=index_records, writer_thread=writer_thread
+        )
         self._log_level: int = log_level
         self._pid: Optional[int] = get_my_pid()
         self._debug: bool = False
+        self._deferred: bool = deferred
+        self._location_mode: str = location_mode
+        self._location_cache: Dict[CodeType, Tuple[str, str, int]] = {}
+        self._log_format: str = log_format
+        self._binary: bool = log_format == self.FORMAT_BINARY
 
     @property
     def log_level(self) -> int:
@@ -74,27 +157,106 @@ class MocaFileLog(MocaFileAppendController):
         else:
             return False
 
-    def write_log(self, message: str, level: int) -> None:
+    def _location(self) -> Tuple[str, str, int]:
+        """
+        Return the location of the caller of write_log or print_log.
+        :return: filename, caller name, line number
+        """
+        if self._location_mode == self.LOCATION_OFF:
+            return self.UNKNOWN_LOCATION
+        frame = _getframe(2)
+        if self._location_mode == self.LOCATION_STATIC:
+            try:
+                return self._location_cache[frame.f_code]
+            except KeyError:
+                info = basename(frame.f_code.co_filename), frame.f_code.co_name, frame.f_lineno
+                self._location_cache[frame.f_code] = info
+                return info
+        return basename(frame.f_code.co_filename), frame.f_code.co_name, frame.f_lineno
+
+    def write_log(self, message: str, level: int) -> bool:
         """
         Add a log message into the queue.
         :param message: the log message.
         :param level: the log level.
-        :return: None
+        :return: False if the log message was rejected by the overflow policy.
         Log Format
         ----------
         [loglevel](time)<filename|caller|line number|process id|thread id> message
         """
         if self._log_level <= level:
-            filename, caller, line = location()
-            current_time = datetime.now(tz=tz)
-            msg = f"[{LogLevel.int_to_str(level)}]({str(current_time)})" \
+            filename, caller, line = self._location()
+            if self._deferred or self._binary:
+                if level not in (0, 1, 2, 3, 4):
+                    raise ValueError('Invalid integer value, only 0, 1, 2, 3, 4')
+                record = MocaLogRecord(level, time(), filename, caller, line, self._pid or 0, get_my_tid(), message)
+                if self._debug:
+                    self._print_log(self._render(record), level)
+                return self.write(record)
+            current_time = format_timestamp(time())
+            msg = f"[{LogLevel.int_to_str(level)}]({current_time})" \
                   f"<{filename}|{caller}|{line}|{self._pid or 0}|{get_my_tid()}>" \
                   f"{message}{NEW_LINE}"
-            self.write(msg)
             if self._debug:
                 self._print_log(msg, level)
+            return self.write(msg)
         else:
-            pass  # do nothing
+            return True  # do nothing
+
+    def write_logs(self, records: Iterable[Tuple[int, str]]) -> bool:
+        """
+        Add a batch of log messages into the queue, one item per log message.
+        The batch is validated at first, and all log messages share the same timestamp, location and thread id.
+        :param records: a list of (level, message).
+        :return: False if the batch was rejected by the overflow policy, no log message is written.
+                 (drop_oldest and drop_low_level policies never reject, see _put_many.)
+        """
+        records = [(level, message) for level, message in records if self._log_level <= level]
+        for level, _ in records:
+            if level not in (0, 1, 2, 3, 4):
+                raise ValueError('Invalid integer value, only 0, 1, 2, 3, 4')
+        if not records:
+            return True
+        filename, caller, line = self._location()
+        timestamp, tid = time(), get_my_tid()
+        if self._deferred or self._binary:
+            pid = self._pid or 0
+            batch = [
+                MocaLogRecord(level, timestamp, filename, caller, line, pid, tid, message) for level, message in records
+            ]
+            if self._debug:
+                for record in batch:
+                    self._print_log(self._render(record), record.level)
+            return self._put_many(batch)
+        current_time = format_timestamp(timestamp)
+        location = f"<{filename}|{caller}|{line}|{self._pid or 0}|{tid}>"
+        logs = [
+            f"[{LogLevel.int_to_str(level)}]({current_time}){location}{message}{NEW_LINE}" for level, message in records
+        ]
+        if self._debug:
+            for log, (level, _) in zip(logs, records):
+                self._print_log(log, level)
+        return self._put_many(logs)
+
+    def _render(self, record: MocaLogRecord) -> str:
+        """Render a log record to the log format."""
+        return MocaLogCodec.render(record)
+
+    def _encode(self, data: Any) -> bytes:
+        """Render the log records in the writer thread."""
+        if self._binary:
+            if isinstance(data, MocaLogRecord):
+                return MocaLogCodec.encode_record(data)
+            return MocaLogCodec.encode_raw(data)
+        if isinstance(data, MocaLogRecord):
+            return self._render(data).encode(self._encoding)
+        return data.encode(self._encoding)
+
+    def _pack(self, data: List[bytes]) -> bytes:
+        """Compress a batch to a block in binary format."""
+        if self._binary:
+            return MocaLogCodec.pack(data)
+        return b''.join(data)
 
     def write_exception(self) -> None:
         msg = "-- Exception -------------------------------------" \
@@ -117,9 +279,9 @@ class MocaFileLog(MocaFileAppendController):
     def print_log(self, message: str, level: int) -> None:
         """Print a log message."""
         if self._log_level <= level:
-            filename, caller, line = location()
-            current_time = datetime.now(tz=tz)
-            msg = f"[{LogLevel.int_to_str(level)}]({str(current_time)})" \
+            filename, caller, line = self._location()
+            current_time = format_timestamp(time())
+            msg = f"[{LogLevel.int_to_str(level)}]({current_time})" \
                   f"<{filename}|{caller}|{line}|{self._pid or 0}|{get_my_tid()}>" \
                   f"{message}"
             self._print_log(msg, level)
@@ -140,11 +302,190 @@ class MocaFileLog(MocaFileAppendController):
         elif level == LogLevel.CRITICAL:
             print_critical(message)
 
+    def _count_lines(self, data: List[bytes]) -> int:
+        """Binary format counts the records, the header of a block has the same count."""
+        if self._binary:
+            return len(data)
+        return super()._count_lines(data)
+
+    def _count_file_lines(self, path: Path, chunk_size: int = 1048576) -> int:
+        """Binary format counts the records by the block headers."""
+        with open(str(path), mode='rb') as file:
+            if file.read(len(MocaLogCodec.MAGIC)) == MocaLogCodec.MAGIC:
+                file.seek(0)
+                return MocaLogCodec.count_records(file)
+        return super()._count_file_lines(path, chunk_size)
+
+    def _priority(self, data: Any) -> int:
+        """
+        Use the log level as the priority, drop_low_level policy drops DEBUG/INFO logs first.
+        """
+        if isinstance(data, MocaLogRecord):
+            return data.level
+        if data.startswith('['):
+            try:
+                return LogLevel.str_to_int(data[1:data.find(']')])
+            except ValueError:
+                pass
+        return LogLevel.ERROR  # exceptions.
+
     def clear_log(self) -> None:
-        self.write(self.CLEAR_CMD)
+        self.clear()
+
+    @property
+    def log_format(self) -> str:
+        return self._log_format
+
+    def _iter_file_chunks(self, path: Path, chunk_size: int, skip: int = 0) -> Iterator[bytes]:
+        """Binary format is decoded to the text log format."""
+        if not self._binary:
+            yield from super()._iter_file_chunks(path, chunk_size, skip)
+            return None
+        with open_compressed_file(path) as file:
+            yield from MocaLogCodec.iter_chunks(file, chunk_size, self._encoding)
+
+    def _file_size(self, path: Path) -> Optional[int]:
+        """The size of the decoded binary format is unknown."""
+        return None if self._binary else super()._file_size(path)
+
+    def _iter_lines_reverse(
+            self, path: Path, position: Optional[Tuple[int, ...]], limit: int
+    ) -> Iterator[Tuple[Tuple[int, ...], bytes]]:
+        """
+        Binary format is decoded to the text log format.
+        The position of a line is (the end position of the block, the number of the lines after it in the block).
+        """
+        if not self._binary:
+            yield from super()._iter_lines_reverse(path, position, limit)
+            return None
+        with open_compressed_file(path) as file:
+            head = file.read(len(MocaLogCodec.MAGIC))
+            if head == MocaLogCodec.MAGIC:
+                end, skip = position if position is not None else (None, 0)
+
+                def block_lines(block_end: int, block: bytes) -> List[Tuple[Tuple[int, int], bytes]]:
+                    """The lines of a block with their positions, newest first."""
+                    lines = MocaLogCodec.to_text(block).encode(self._encoding).splitlines()
+                    lines.reverse()
+                    return [((block_end, index + 1), line) for index, line in enumerate(lines)][
+                        skip if block_end == end else 0:
+                    ]
+
+                if isinstance(file, BufferedReader):  # not compressed, we can read it backwards.
+                    for block_end, block in MocaLogCodec.iter_blocks_reverse_with_offset(file, end):
+                        yield from block_lines(block_end, block)
+                    return None
+                segment: deque = deque(maxlen=limit)
+                for block_end, block in MocaLogCodec.iter_blocks_with_offset(file, head):
+                    if end is not None and block_end > end:
+                        break
+                    segment.extend(reversed(block_lines(block_end, block)))
+                yield from reversed(segment)
+                return None
+        yield from super()._iter_lines_reverse(path, position, limit)  # a text log file.
+
+    @classmethod
+    def _parse_timestamp(cls, line: bytes) -> Optional[float]:
+        """Return the timestamp of a line of the text log format, None if it isn't the first line of a log."""
+        match = cls.TIMESTAMP_PATTERN.match(line)
+        if match is None:
+            return None
+        try:
+            return datetime.fromisoformat(match.group(1).decode()).timestamp()
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    def _index_timestamp(self, data: bytes) -> Optional[float]:
+        """Use the timestamp of the first log of the data."""
+        if self._binary:
+            return MocaLogCodec.record_timestamp(data)
+        return self._parse_timestamp(data)
+
+    def _scan_index(self, path: Path, offset: int) -> Iterator[Tuple[float, int, int]]:
+        """Index the logs by their timestamps, every block in binary format, every log in text format."""
+        with open(str(path), mode='rb') as file:
+            file.seek(offset)
+            if file.read(len(MocaLogCodec.MAGIC)) == MocaLogCodec.MAGIC:
+                file.seek(offset)
+                for position, count, timestamp in MocaLogCodec.iter_block_heads(file, offset):
+                    if timestamp is not None:
+                        yield timestamp, position, count
+                return None
+            file.seek(offset)
+            for line in file:
+                timestamp = self._parse_timestamp(line)
+                if timestamp is not None:
+                    yield timestamp, offset, 1
+                offset += len(line)
+
+    @classmethod
+    def iter_records(
+            cls, path: Path, first: int = 0, last: Optional[int] = None, encoding: str = ENCODING
+    ) -> Iterator[Tuple[Optional[float], bytes]]:
+        """
+        Read the logs of a byte range of a log file, and yield (timestamp, the text log format).
+        The timestamp is None if the log has no timestamp, for example, an exception.
+        :param path: a text or binary log file, the compressed segments are decompressed.
+        :param first: the start position, it must be the start of a log or a block.
+        :param last: stop at this position, None means the end of the file.
+        :param encoding: the encoding of the decoded binary records.
+        """
+        with open_compressed_file(path) as file:
+            file.seek(first)  # the compressed segments are decompressed and discarded.
+            head = file.read(len(MocaLogCodec.MAGIC))
+            if head == MocaLogCodec.MAGIC:
+                position = first
+                for block_end, block in MocaLogCodec.iter_blocks_with_offset(file, head, first):
+                    if last is not None and position >= last:
+                        return None
+                    for item in MocaLogCodec.decode(block):
+                        if isinstance(item, str):
+                            yield None, item.encode(encoding)
+                        else:
+                            yield item.timestamp, MocaLogCodec.render(item).encode(encoding)
+                    position = block_end
+                return None
+            position = first
+            for line in chain(BytesIO(head + file.readline()), file):
+                if last is not None and position >= last:
+                    return None
+                position += len(line)
+                yield cls._parse_timestamp(line), line
+
+    def query(
+            self, start: Optional[float] = None, end: Optional[float] = None, chunk_size: int = 1048576
+    ) -> Iterator[bytes]:
+        """
+        Read the logs between start and end, oldest first, in the text log format.
+        Only the byte ranges found by the sparse time index are read, please refer to index_ranges.
+        The logs without timestamp (e.g. exceptions) follow the previous log.
+        :param start: the start timestamp (seconds since the epoch), None means the oldest log.
+        :param end: the end timestamp (inclusive), None means the newest log.
+        :param chunk_size: the approximate bytes of a chunk.
+        """
+        chunk: List[bytes] = []
+        size = 0
+        for path, first, last in self.index_ranges(start, end):
+            matched = False
+            try:
+                for timestamp, line in self.iter_records(path, first, last, self._encoding):
+                    if timestamp is not None:
+                        if end is not None and timestamp > end + self.INDEX_SLACK:
+                            break  # the rest of the file is not indexed yet.
+                        matched = (start is None or start <= timestamp) and (end is None or timestamp <= end)
+                    if matched:
+                        chunk.append(line)
+                        size += len(line)
+                        if size >= chunk_size:
+                            yield b''.join(chunk)
+                            chunk, size = [], 0
+            except FileNotFoundError:
+                pass  # the segment was compressed or removed.
+        if chunk:
+            yield b''.join(chunk)
 
     def get_all_log(self) -> str:
-        with open(self._filename, mode='r', encoding=self._encoding) as file:
-            return file.read()
+        """Return all logs in the rotated segments and the current file."""
+        return b''.join(self.iter_chunks()).decode(self._encoding)
         
 # -------------------------------------------------------------------------- MocaFileLog --
@@ -0,0 +1,76 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Optional, Any, Dict, List
+)
+from .MocaFileLog import MocaFileLog
+from .MocaLogWriterProcess import MocaLogWriterProcess
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaFileLogClient --------------------------------------------------------------------------
+
+
+class MocaFileLogClient(MocaFileLog):
+    """
+    The MocaFileLog of a worker process, the logs are rendered in this process,
+    and written to the file by MocaLogWriterProcess.
+    The read methods read the file directly, and clear_log is sent to the writer process in order with the logs.
+    The shared queue can't drop the queued logs, so drop_oldest and drop_low_level work as reject.
+    Binary format puts the log records into the queue, they are encoded in the writer process.
+
+    Attributes
+    ----------
+    self._writer: MocaLogWriterProcess
+        The writer process.
+    """
+
+    def __init__(
+            self,
+            writer: MocaLogWriterProcess,
+            log_level: int = 1,
+            overflow: str = MocaFileLog.OVERFLOW_REJECT,
+            put_timeout: Optional[float] = None,
+            location_mode: str = MocaFileLog.LOCATION_FULL,
+    ):
+        """
+        :param writer: the writer process, it must be started before forking this process.
+        :param log_level: The log level of this instance.
+        :param overflow: the overflow policy of the shared queue, block or reject.
+                         drop_oldest and drop_low_level work as reject.
+        :param put_timeout: the maximum seconds to wait for a free slot in block mode, None means wait forever.
+        :param location_mode: how to capture the location of the caller, off, static or full.
+        """
+        if overflow in (self.OVERFLOW_DROP_OLDEST, self.OVERFLOW_DROP_LOW_LEVEL):
+            overflow = self.OVERFLOW_REJECT
+        super().__init__(
+            writer.filename,
+            log_level,
+            encoding=writer.encoding,
+            queue=writer.channel,
+            overflow=overflow,
+            put_timeout=put_timeout,
+            location_mode=location_mode,
+            log_format=writer.log_format,
+            writer_thread=False,
+        )
+        self._writer: MocaLogWriterProcess = writer
+
+    def _put(self, data: Any) -> bool:
+        if super()._put(data):
+            return True
+        self._writer.count_rejected()
+        return False
+
+    def _put_many(self, items: List[Any]) -> bool:
+        if super()._put_many(items):
+            return True
+        self._writer.count_rejected(len(items))
+        return False
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Return the counters of the writer process."""
+        return self._writer.stats
+
+# -------------------------------------------------------------------------- MocaFileLogClient --
@@ -0,0 +1,334 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Optional, Tuple, List, Dict, Iterable, Any
+)
+from collections import deque
+from threading import Thread, Condition
+from json import dumps
+from gzip import compress
+from time import sleep
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaLogClientBase --------------------------------------------------------------------------
+
+
+class MocaLogClientBase:
+    """
+    The buffer and the retry policy of the MocaFileLog clients.
+    write_log only puts the log into a bounded buffer, the logs are sent to /save-logs in batches by the sender.
+    If the buffer is full, the new log is dropped, so the memory usage is bounded while the server is down.
+
+    Attributes
+    ----------
+    self._url: str
+        The url of the log, for example http://127.0.0.1:5700/moca-file-log/sample1
+    self._api_key: Optional[str]
+        The API key.
+    self._batch_size: int
+        The maximum number of logs per request.
+    self._flush_interval: float
+        The maximum seconds to keep a log in the buffer.
+    self._buffer_size: int
+        The maximum number of logs in the buffer.
+    self._max_retries: int
+        The maximum number of retries of a batch, the batch is dropped after that.
+    self._retry_interval: float
+        The first retry interval (seconds), it is doubled after every retry, up to MAX_RETRY_INTERVAL.
+    self._timeout: float
+        The timeout of a request (seconds).
+    self._pool_size: int
+        The number of senders and keep-alive connections.
+    self._gzip: bool
+        Compress the request body. (Content-Encoding: gzip)
+    self._buffer: deque
+        The buffered logs, (level, message).
+    self._condition: Condition
+        The lock of the buffer, and the notification of the state changes.
+    self._sending: int
+        The number of batches being sent.
+    self._flushing: int
+        The number of the callers waiting for flush, the senders send the incomplete batches while flushing.
+    self._closed: bool
+        The client is closed.
+    self._stats: Dict[str, int]
+        The counters of the client.
+    """
+
+    BATCH_LIMIT: int = 1024  # the maximum length of the logs parameter of /save-logs.
+    MAX_MESSAGE_LENGTH: int = 8192
+    MAX_RETRY_INTERVAL: float = 30.0
+
+    def __init__(
+            self,
+            url: str,
+            api_key: Optional[str] = None,
+            batch_size: int = 500,
+            flush_interval: float = 1.0,
+            buffer_size: int = 100000,
+            max_retries: int = 5,
+            retry_interval: float = 0.5,
+            timeout: float = 5.0,
+            pool_size: int = 1,
+            gzip: bool = False,
+    ):
+        """
+        :param url: the url of the log, for example http://127.0.0.1:5700/moca-file-log/sample1
+        :param api_key: the API key, None means don't send the API key.
+        :param batch_size: the maximum number of logs per request, up to 1024.
+        :param flush_interval: the maximum seconds to keep a log in the buffer.
+        :param buffer_size: the maximum number of logs in the buffer, the new logs are dropped if the buffer is full.
+        :param max_retries: the maximum number of retries of a batch, the batch is dropped after that.
+        :param retry_interval: the first retry interval (seconds), it is doubled after every retry.
+        :param timeout: the timeout of a request (seconds).
+        :param pool_size: the number of senders and keep-alive connections.
+                          the order of the logs is kept only when this value is 1.
+        :param gzip: compress the request body.
+        """
+        if not 0 < batch_size <= self.BATCH_LIMIT:
+            raise ValueError(f'batch_size parameter only supports 1 to {self.BATCH_LIMIT}.')
+        if pool_size < 1:
+            raise ValueError('pool_size parameter only supports a positive integer.')
+        self._url: str = url.rstrip('/')
+        self._api_key: Optional[str] = api_key
+        self._batch_size: int = batch_size
+        self._flush_interval: float = flush_interval
+        self._buffer_size: int = max(buffer_size, batch_size)
+        self._max_retries: int = max_retries
+        self._retry_interval: float = retry_interval
+        self._timeout: float = timeout
+        self._pool_size: int = pool_size
+        self._gzip: bool = gzip
+        self._buffer: deque = deque()
+        self._condition: Condition = Condition()
+        self._sending: int = 0
+        self._flushing: int = 0
+        self._closed: bool = False
+        self._stats: Dict[str, int] = {
+            'sent': 0,
+            'dropped': 0,
+            'failed': 0,
+            'requests': 0,
+            'retries': 0,
+        }
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    def _wakeup(self) -> None:
+        """Wake up the senders, a batch is ready. the caller holds the lock."""
+        self._condition.notify_all()
+
+    def write_log(self, message: str, level: int) -> bool:
+        """
+        Put a log into the buffer, this method never waits for the network.
+        :param message: the log message, a message longer than 8192 characters is truncated.
+        :param level: the log level.
+        :return: False if the buffer is full or the client is closed, the log is dropped.
+        """
+        return self.write_logs(((level, message),))
+
+    def write_logs(self, records: Iterable[Tuple[int, str]]) -> bool:
+        """
+        Put a batch of logs into the buffer, this method never waits for the network.
+        :param records: a list of (level, message).
+        :return: False if some logs were dropped, because the buffer is full or the client is closed.
+        """
+        records = [(level, message[:self.MAX_MESSAGE_LENGTH]) for level, message in records]
+        for level, _ in records:
+            if level not in (0, 1, 2, 3, 4):
+                raise ValueError('Invalid integer value, only 0, 1, 2, 3, 4')
+        with self._condition:
+            if self._closed:
+                self._stats['dropped'] += len(records)
+                return False
+            accepted = records[:max(self._buffer_size - len(self._buffer), 0)]
+            self._stats['dropped'] += len(records) - len(accepted)
+            self._buffer.extend(accepted)
+            if len(self._buffer) - len(accepted) < self._batch_size <= len(self._buffer):
+                self._wakeup()  # the senders check the buffer again after every request, so notify only once.
+            return len(accepted) == len(records)
+
+    def _take_batch(self) -> List[Tuple[int, str]]:
+        """Take a batch from the buffer. the caller holds the lock."""
+        buffer = self._buffer
+        batch = [buffer.popleft() for _ in range(min(self._batch_size, len(buffer)))]
+        if batch:
+            self._sending += 1
+        return batch
+
+    def _done(self, batch: List[Tuple[int, str]], sent: bool) -> None:
+        """The batch was sent or dropped."""
+        with self._condition:
+            self._sending -= 1
+            self._stats['sent' if sent else 'failed'] += len(batch)
+            self._condition.notify_all()
+
+    def _payload(self, batch: List[Tuple[int, str]]) -> Tuple[bytes, Dict[str, str]]:
+        """Return the request body and headers of a batch."""
+        body: Dict[str, Any] = {'logs': [{'level': level, 'message': message} for level, message in batch]}
+        if self._api_key is not None:
+            body['api_key'] = self._api_key
+        data = dumps(body, ensure_ascii=False).encode()
+        headers = {'Content-Type': 'application/json'}
+        if self._gzip:
+            data = compress(data, 6)
+            headers['Content-Encoding'] = 'gzip'
+        return data, headers
+
+    def _retry_delay(self, status: Optional[int], retry_after: Optional[str], attempt: int) -> Optional[float]:
+        """
+        Decide whether to retry a request.
+        :param status: the status code, None means a network error.
+        :param retry_after: the value of Retry-After header.
+        :param attempt: the number of the previous retries.
+        :return: the seconds to wait before the retry, None means don't retry.
+        """
+        if status is not None and status != 429 and status < 500:
+            return None  # the batch is invalid, or the API key is not allowed.
+        if attempt >= self._max_retries:
+            return None
+        delay = min(self._retry_interval * (2 ** attempt), self.MAX_RETRY_INTERVAL)
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    def _is_ready(self) -> bool:
+        """A batch should be sent now, or the client is closed."""
+        return self._closed or (
+            len(self._buffer) > 0 and (len(self._buffer) >= self._batch_size or self._flushing > 0)
+        )
+
+    def _is_idle(self) -> bool:
+        return not self._buffer and self._sending == 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the counters.
+        buffered: the count of the logs in the buffer.
+        sent: the count of the logs saved by the server.
+        dropped: the count of the logs dropped because the buffer was full.
+        failed: the count of the logs dropped after the retries, or rejected by the server.
+        requests, retries: the count of requests and retries.
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats['buffered'] = len(self._buffer)
+        return stats
+
+# -------------------------------------------------------------------------- MocaLogClientBase --
+
+# -- MocaLogClient --------------------------------------------------------------------------
+
+
+class MocaLogClient(MocaLogClientBase):
+    """
+    Send logs to a MocaFileLog server in batches, the requests are sent by the sender threads,
+    the caller's thread only puts the logs into the buffer.
+    A batch is sent when the buffer has `batch_size` logs, or after `flush_interval` seconds.
+    The keep-alive connections are reused by requests.Session.
+
+    Attributes
+    ----------
+    self._session: Session
+        The HTTP session, it has a connection pool of `pool_size` connections.
+    self._threads: List[Thread]
+        The sender threads.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            api_key: Optional[str] = None,
+            batch_size: int = 500,
+            flush_interval: float = 1.0,
+            buffer_size: int = 100000,
+            max_retries: int = 5,
+            retry_interval: float = 0.5,
+            timeout: float = 5.0,
+            pool_size: int = 1,
+            gzip: bool = False,
+    ):
+        """Please refer to MocaLogClientBase."""
+        super().__init__(
+            url, api_key, batch_size, flush_interval, buffer_size, max_retries, retry_interval, timeout, pool_size, gzip
+        )
+        self._session: Session = Session()
+        self._session.mount(self._url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self._threads: List[Thread] = [Thread(target=self._send_loop, daemon=True) for _ in range(pool_size)]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self) -> 'MocaLogClient':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _post(self, body: bytes, headers: Dict[str, str]) -> Tuple[Optional[int], Optional[str]]:
+        """:return: the status code (None means a network error), the value of Retry-After header."""
+        try:
+            res = self._session.post(f'{self._url}/save-logs', data=body, headers=headers, timeout=self._timeout)
+            return res.status_code, res.headers.get('Retry-After')
+        except RequestException:
+            return None, None
+
+    def _send(self, batch: List[Tuple[int, str]]) -> None:
+        body, headers = self._payload(batch)
+        attempt = 0
+        while True:
+            status, retry_after = self._post(body, headers)
+            with self._condition:
+                self._stats['requests'] += 1
+            if status == 200:
+                return self._done(batch, True)
+            delay = self._retry_delay(status, retry_after, attempt)
+            if delay is None:
+                return self._done(batch, False)
+            with self._condition:
+                self._stats['retries'] += 1
+            attempt += 1
+            sleep(delay)
+
+    def _send_loop(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(self._is_ready, self._flush_interval)
+                if self._closed and not self._buffer:
+                    return None
+                batch = self._take_batch()
+            if batch:
+                self._send(batch)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send the buffered logs now, and wait until they are sent or dropped.
+        :return: False if timeout.
+        """
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                return self._condition.wait_for(self._is_idle, timeout)
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Send the buffered logs, and stop the sender threads. the logs written after this method are dropped.
+        :return: False if timeout, the remaining logs are dropped.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            idle = self._condition.wait_for(self._is_idle, timeout)
+        self._session.close()
+        return idle
+
+# -------------------------------------------------------------------------- MocaLogClient --
@@ -0,0 +1,272 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    List, Tuple, Iterator, BinaryIO, Union, Optional
+)
+from math import modf
+from struct import Struct, error as StructError
+from zlib import compress, decompress, decompressobj, error as ZlibError
+from ..moca_core import ENCODING, NEW_LINE
+from ..moca_utils import format_timestamp
+from .LogLevel import LogLevel
+from .MocaLogRecord import MocaLogRecord
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaLogCodec --------------------------------------------------------------------------
+
+
+class MocaLogCodec:
+    """
+    The binary log format of MocaFileLog.
+
+    File Format
+    -----------
+    file: block, block, ...
+    block: magic(4 bytes) | payload length(uint32) | record count(uint32) | zlib(records) | payload length(uint32)
+        The trailing payload length is used to read the file backwards.
+    record: record length(varint) | level(int8) | timestamp(int64, microseconds since the epoch)
+            | pid(varint) | tid(varint) | line(zigzag varint) | filename | caller | message
+        The strings are encoded as length(varint) + UTF-8 bytes.
+    raw record: record length(varint) | -1(int8) | text
+        The exception messages are saved as raw records.
+
+    A file that doesn't start with the magic bytes is read as a text log file.
+    """
+
+    MAGIC: bytes = b'MLB1'
+    RAW_LEVEL: bytes = b'\xff'  # -1 as int8
+    HEADER: Struct = Struct('>4sII')
+    TRAILER: Struct = Struct('>I')
+    RECORD_HEAD: Struct = Struct('>bq')
+
+    @staticmethod
+    def _varint(value: int) -> bytes:
+        buffer = bytearray()
+        while value > 0x7f:
+            buffer.append((value & 0x7f) | 0x80)
+            value >>= 7
+        buffer.append(value)
+        return bytes(buffer)
+
+    @staticmethod
+    def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+        """:return: value, next offset"""
+        value = shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value, offset
+            shift += 7
+
+    @classmethod
+    def _string(cls, text: str) -> bytes:
+        data = text.encode(ENCODING, errors='surrogatepass')
+        return cls._varint(len(data)) + data
+
+    @classmethod
+    def _read_string(cls, data: bytes, offset: int) -> Tuple[str, int]:
+        length, offset = cls._read_varint(data, offset)
+        return data[offset:offset + length].decode(ENCODING, errors='surrogatepass'), offset + length
+
+    @classmethod
+    def encode_record(cls, record: MocaLogRecord) -> bytes:
+        """Encode a log record."""
+        # round the fraction like format_timestamp, so the decoded record is rendered to the same text.
+        fraction, second = modf(record.timestamp)
+        body = b''.join((
+            cls.RECORD_HEAD.pack(record.level, int(second) * 1000000 + round(fraction * 1000000)),
+            cls._varint(record.pid),
+            cls._varint(record.tid),
+            cls._varint((record.line << 1) ^ (record.line >> 63)),
+            cls._string(record.filename),
+            cls._string(record.caller),
+            cls._string(record.message),
+        ))
+        return cls._varint(len(body)) + body
+
+    @classmethod
+    def encode_raw(cls, text: str) -> bytes:
+        """Encode a text that isn't a log record, for example, an exception message."""
+        body = cls.RAW_LEVEL + text.encode(ENCODING, errors='surrogatepass')
+        return cls._varint(len(body)) + body
+
+    @classmethod
+    def pack(cls, records: List[bytes], level: int = 6) -> bytes:
+        """Compress the encoded records to a block."""
+        payload = compress(b''.join(records), level)
+        return cls.HEADER.pack(cls.MAGIC, len(payload), len(records)) + payload + cls.TRAILER.pack(len(payload))
+
+    @classmethod
+    def decode(cls, block: bytes) -> Iterator[Union[MocaLogRecord, str]]:
+        """
+        Decode the decompressed payload of a block.
+        :return: a log record or the text of a raw record.
+        """
+        offset, end = 0, len(block)
+        while offset < end:
+            length, offset = cls._read_varint(block, offset)
+            stop = offset + length
+            if block[offset] == cls.RAW_LEVEL[0]:
+                yield block[offset + 1:stop].decode(ENCODING, errors='surrogatepass')
+            else:
+                level, micros = cls.RECORD_HEAD.unpack_from(block, offset)
+                pid, position = cls._read_varint(block, offset + cls.RECORD_HEAD.size)
+                tid, position = cls._read_varint(block, position)
+                line, position = cls._read_varint(block, position)
+                filename, position = cls._read_string(block, position)
+                caller, position = cls._read_string(block, position)
+                message, position = cls._read_string(block, position)
+                yield MocaLogRecord(
+                    level, micros / 1000000, filename, caller, (line >> 1) ^ -(line & 1), pid, tid, message
+                )
+            offset = stop
+
+    @classmethod
+    def record_timestamp(cls, data: bytes) -> Optional[float]:
+        """Return the timestamp of the first encoded record, None if it is a raw record or incomplete."""
+        try:
+            _, offset = cls._read_varint(data, 0)
+            level, micros = cls.RECORD_HEAD.unpack_from(data, offset)
+        except (IndexError, StructError):
+            return None
+        return None if level == -1 else micros / 1000000
+
+    @classmethod
+    def iter_block_heads(cls, file: BinaryIO, offset: int = 0) -> Iterator[Tuple[int, int, Optional[float]]]:
+        """
+        Read the blocks from the current position, and yield (the start position, the record count,
+        the timestamp of the first record), only the first bytes of the payloads are decompressed.
+        :param file: a file object, the file don't need to be seekable.
+        :param offset: the current position.
+        """
+        while True:
+            head = file.read(cls.HEADER.size)
+            if len(head) < cls.HEADER.size:
+                return None
+            magic, length, count = cls.HEADER.unpack(head)
+            payload = file.read(length)
+            if magic != cls.MAGIC or len(payload) < length or len(file.read(cls.TRAILER.size)) < cls.TRAILER.size:
+                return None  # a broken or partially written block.
+            try:
+                # a varint and RECORD_HEAD, the head of the first record.
+                timestamp = cls.record_timestamp(decompressobj().decompress(payload, 10 + cls.RECORD_HEAD.size))
+            except ZlibError:
+                return None
+            yield offset, count, timestamp
+            offset += cls.HEADER.size + length + cls.TRAILER.size
+
+    @classmethod
+    def count_records(cls, file: BinaryIO) -> int:
+        """
+        Count the records of the blocks from the current position by the block headers, nothing is decompressed.
+        :param file: a file object, the file don't need to be seekable.
+        """
+        count = 0
+        while True:
+            head = file.read(cls.HEADER.size)
+            if len(head) < cls.HEADER.size:
+                return count
+            magic, length, records = cls.HEADER.unpack(head)
+            if magic != cls.MAGIC or len(file.read(length + cls.TRAILER.size)) < length + cls.TRAILER.size:
+                return count  # a broken or partially written block.
+            count += records
+
+    @staticmethod
+    def render(record: MocaLogRecord) -> str:
+        """Render a log record to the text log format."""
+        return f"[{LogLevel.int_to_str(record.level)}]({format_timestamp(record.timestamp)})" \
+               f"<{record.filename}|{record.caller}|{record.line}|{record.pid}|{record.tid}>" \
+               f"{record.message}{NEW_LINE}"
+
+    @classmethod
+    def to_text(cls, block: bytes) -> str:
+        """Decode the decompressed payload of a block to the text log format."""
+        return ''.join(
+            item if isinstance(item, str) else cls.render(item) for item in cls.decode(block)
+        )
+
+    @classmethod
+    def iter_blocks(cls, file: BinaryIO, head: bytes = b'') -> Iterator[bytes]:
+        """
+        Read the blocks from the current position, and yield the decompressed payloads, oldest first.
+        :param file: a file object, the file don't need to be seekable.
+        :param head: the bytes already read from the file.
+        """
+        for _, block in cls.iter_blocks_with_offset(file, head):
+            yield block
+
+    @classmethod
+    def iter_blocks_with_offset(cls, file: BinaryIO, head: bytes = b'', offset: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """
+        Read the blocks from the current position, and yield (the end position of the block, the decompressed payload).
+        :param file: a file object, the file don't need to be seekable.
+        :param head: the bytes already read from the file.
+        :param offset: the position of the head.
+        """
+        while True:
+            head += file.read(cls.HEADER.size - len(head))
+            if len(head) < cls.HEADER.size:
+                return None
+            magic, length, _ = cls.HEADER.unpack(head)
+            payload = file.read(length)
+            if magic != cls.MAGIC or len(payload) < length or len(file.read(cls.TRAILER.size)) < cls.TRAILER.size:
+                return None  # a broken or partially written block.
+            offset += cls.HEADER.size + length + cls.TRAILER.size
+            try:
+                yield offset, decompress(payload)
+            except ZlibError:
+                return None
+            head = b''
+
+    @classmethod
+    def iter_chunks(cls, file: BinaryIO, chunk_size: int = 1048576, encoding: str = ENCODING) -> Iterator[bytes]:
+        """
+        Read a binary log file or a text log file, and yield the text log format.
+        :param file: a file object, the file don't need to be seekable.
+        :param chunk_size: the chunk size of a text log file.
+        :param encoding: the encoding of the decoded binary records, a text log file is returned as it is.
+        """
+        head = file.read(len(cls.MAGIC))
+        if head == cls.MAGIC:
+            for block in cls.iter_blocks(file, head):
+                yield cls.to_text(block).encode(encoding)
+        else:
+            while head:
+                yield head
+                head = file.read(chunk_size)
+
+    @classmethod
+    def iter_blocks_reverse(cls, file: BinaryIO) -> Iterator[bytes]:
+        """Read the blocks of a seekable file, and yield the decompressed payloads, newest first."""
+        for _, block in cls.iter_blocks_reverse_with_offset(file):
+            yield block
+
+    @classmethod
+    def iter_blocks_reverse_with_offset(cls, file: BinaryIO, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """
+        Read the blocks of a seekable file, and yield (the end position of the block, the decompressed payload),
+        newest first.
+        :param end: read the blocks that end at or before this position, None means the end of the file.
+        """
+        size = file.seek(0, 2)
+        end = size if end is None else min(end, size)
+        while end > cls.HEADER.size + cls.TRAILER.size:
+            file.seek(end - cls.TRAILER.size)
+            try:
+                length = cls.TRAILER.unpack(file.read(cls.TRAILER.size))[0]
+                start = end - cls.TRAILER.size - length - cls.HEADER.size
+                if start < 0:
+                    return None
+                file.seek(start)
+                magic, _, _ = cls.HEADER.unpack(file.read(cls.HEADER.size))
+                if magic != cls.MAGIC:
+                    return None
+                yield end, decompress(file.read(length))
+            except (StructError, ZlibError):
+                return None
+            end = start
+
+# -------------------------------------------------------------------------- MocaLogCodec --
@@ -0,0 +1,63 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Optional, Union
+)
+from logging import Handler, LogRecord, NOTSET
+from .MocaLogClient import MocaLogClient
+from .MocaAsyncLogClient import MocaAsyncLogClient
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaLogHandler --------------------------------------------------------------------------
+
+
+class MocaLogHandler(Handler):
+    """
+    A handler of the logging module, send the logs to a MocaFileLog server through MocaLogClient.
+    The handler never waits for the network, the logs are sent by the client in background.
+
+    Attributes
+    ----------
+    self._client: Union[MocaLogClient, MocaAsyncLogClient]
+        The client.
+    self._close_timeout: Optional[float]
+        The maximum seconds to send the buffered logs when the handler is closed. (MocaLogClient only)
+    """
+
+    def __init__(
+            self,
+            client: Union[MocaLogClient, MocaAsyncLogClient],
+            level: int = NOTSET,
+            close_timeout: Optional[float] = 5.0,
+    ):
+        """
+        :param client: the client, MocaAsyncLogClient must be closed by `aclose` before the event loop stops.
+        :param level: the level of this handler.
+        :param close_timeout: the maximum seconds to send the buffered logs when the handler is closed.
+        """
+        super().__init__(level)
+        self._client: Union[MocaLogClient, MocaAsyncLogClient] = client
+        self._close_timeout: Optional[float] = close_timeout
+
+    @property
+    def client(self) -> Union[MocaLogClient, MocaAsyncLogClient]:
+        return self._client
+
+    @staticmethod
+    def to_log_level(levelno: int) -> int:
+        """Convert the level of the logging module to LogLevel. DEBUG(10) -> 0, ... CRITICAL(50) -> 4"""
+        return min(max(levelno // 10 - 1, 0), 4)
+
+    def emit(self, record: LogRecord) -> None:
+        try:
+            self._client.write_log(self.format(record), self.to_log_level(record.levelno))
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        if isinstance(self._client, MocaLogClient):
+            self._client.close(self._close_timeout)
+        super().close()
+
+# -------------------------------------------------------------------------- MocaLogHandler --
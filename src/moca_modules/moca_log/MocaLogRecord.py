@@ -0,0 +1,42 @@
+# -- MocaLogRecord --------------------------------------------------------------------------
+
+
+class MocaLogRecord:
+    """
+    A compact log record, MocaFileLog puts this object into the queue in deferred mode,
+    and renders it in the writer thread.
+
+    Attributes
+    ----------
+    self.level: int
+        The log level.
+    self.timestamp: float
+        The time of the log, seconds since the epoch.
+    self.filename: str
+        The filename of the caller.
+    self.caller: str
+        The name of the caller.
+    self.line: int
+        The line number of the caller.
+    self.pid: int
+        The process id of the caller, it is captured when the record is created, not by the writer.
+    self.tid: int
+        The thread id of the caller.
+    self.message: str
+        The log message.
+    """
+    __slots__ = ('level', 'timestamp', 'filename', 'caller', 'line', 'pid', 'tid', 'message')
+
+    def __init__(
+            self, level: int, timestamp: float, filename: str, caller: str, line: int, pid: int, tid: int, message: str
+    ):
+        self.level = level
+        self.timestamp = timestamp
+        self.filename = filename
+        self.caller = caller
+        self.line = line
+        self.pid = pid
+        self.tid = tid
+        self.message = message
+
+# -------------------------------------------------------------------------- MocaLogRecord --
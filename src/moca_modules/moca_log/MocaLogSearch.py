@@ -0,0 +1,264 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Optional, List, Tuple, Iterator
+)
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, get_all_start_methods
+from threading import Lock
+from os import cpu_count, fstat
+from mmap import mmap, ACCESS_READ
+from re import compile, escape, MULTILINE, IGNORECASE, error as RegexError
+from ..moca_core import ENCODING
+from ..moca_file.utils import COMPRESSED_EXTENSIONS
+from .LogLevel import LogLevel
+from .MocaLogCodec import MocaLogCodec
+from .MocaFileLog import MocaFileLog
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaLogSearch --------------------------------------------------------------------------
+
+
+class MocaLogSearch:
+    """
+    Search the logs of MocaFileLog by the log level, substrings, regular expressions and a time range,
+    the files are scanned by the worker processes in parallel.
+    The uncompressed text files are split into line-aligned chunks, and every chunk is scanned with mmap and a bytes
+    regular expression, so only the matched lines are copied. The compressed segments and binary log files are decoded
+    by the workers, one task per file. The files and the byte ranges out of the time range are skipped by the sparse
+    time index. (see MocaFileAppendController.index_ranges)
+    The tasks are submitted oldest first, and the search stops when `limit` logs are found.
+
+    Attributes
+    ----------
+    self._workers: int
+        The number of the worker processes.
+    self._chunk_size: int
+        The approximate bytes of a chunk of an uncompressed text file.
+    self._executor: Optional[ProcessPoolExecutor]
+        The worker processes, they are started by the first search.
+        They are started by a fork server if it is available, forking a multithreaded server is not safe.
+    self._executor_lock: Lock
+        The lock to start and stop the worker processes.
+    """
+
+    LOG_HEAD: bytes = rb'^\[[A-Z]+\]\('  # [loglevel](
+    LINE_HEAD: bytes = rb'^'
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 8388608):
+        """
+        :param workers: the number of the worker processes, None means the number of CPU cores.
+        :param chunk_size: the approximate bytes of a chunk of an uncompressed text file.
+        """
+        if workers is not None and workers < 1:
+            raise ValueError('workers parameter only supports a positive integer.')
+        self._workers: int = workers or cpu_count() or 1
+        self._chunk_size: int = max(chunk_size, 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock: Lock = Lock()
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Return the worker processes, start them if they are not started."""
+        with self._executor_lock:
+            if self._executor is None:
+                if 'forkserver' in get_all_start_methods():
+                    context = get_context('forkserver')
+                    # the workers are forked from the fork server that has imported this module.
+                    context.set_forkserver_preload([__name__])
+                else:
+                    context = get_context()
+                self._executor = ProcessPoolExecutor(max_workers=self._workers, mp_context=context)
+            return self._executor
+
+    @staticmethod
+    def _accept(
+            line: bytes, timestamp: Optional[float], regexes: list, prefixes: Optional[Tuple[bytes, ...]],
+            start: Optional[float], end: Optional[float]
+    ) -> bool:
+        """Check the filters, the logs without timestamp don't match the time range."""
+        if prefixes is not None and not line.startswith(prefixes):
+            return False
+        for regex in regexes:
+            if regex.search(line) is None:
+                return False
+        if start is not None or end is not None:
+            if timestamp is None:
+                return False
+            return (start is None or start <= timestamp) and (end is None or timestamp <= end)
+        return True
+
+    @staticmethod
+    def _search_task(
+            path: str, first: int, last: Optional[int], mapped: bool, encoding: str, patterns: List[bytes],
+            flags: int, level: Optional[int], start: Optional[float], end: Optional[float], limit: int
+    ) -> List[Tuple[Optional[float], bytes]]:
+        """
+        Search a byte range of a file, this method runs in a worker process.
+        :param mapped: scan an uncompressed text file with mmap, otherwise decode the file.
+        :return: the matched logs, (timestamp, line).
+        """
+        regexes = [compile(pattern, flags | MULTILINE) for pattern in patterns]
+        prefixes = None if level is None else tuple(
+            f'[{LogLevel.int_to_str(item)}]'.encode() for item in range(level, 5)
+        )
+        results: List[Tuple[Optional[float], bytes]] = []
+        if not mapped:
+            for timestamp, text in MocaFileLog.iter_records(Path(path), first, last, encoding):
+                for line in text.rstrip(b'\n').split(b'\n'):
+                    line = line.rstrip(b'\r')
+                    if MocaLogSearch._accept(line, timestamp, regexes, prefixes, start, end):
+                        results.append((timestamp, line))
+                        if len(results) >= limit:
+                            return results
+                    timestamp = None  # the following lines of a log that has multiple lines.
+            return results
+        # find the candidate lines by the first pattern, or the log level, or the head of a log.
+        anchored = False  # the pattern starts with the newline before the line, it is much faster than `^`.
+        if regexes:
+            primary, regexes = regexes[0], regexes[1:]
+        elif prefixes is not None:
+            primary = compile(b'\n(?:' + b'|'.join(escape(prefix) for prefix in prefixes) + b')')
+            anchored = True
+        elif start is not None or end is not None:
+            primary = compile(MocaLogSearch.LOG_HEAD, MULTILINE)
+        else:
+            primary = compile(MocaLogSearch.LINE_HEAD, MULTILINE)
+        with open(path, mode='rb') as file:
+            size = fstat(file.fileno()).st_size
+            last = size if last is None else min(last, size)
+            if first >= last:
+                return results
+            with mmap(file.fileno(), size, access=ACCESS_READ) as data:
+                position = first
+                while len(results) < limit:
+                    if anchored and position == 0:
+                        match_start = 0  # the first line of the file, it is checked by _accept.
+                    else:
+                        match = primary.search(data, position - 1 if anchored else position, last)
+                        if match is None:
+                            break
+                        match_start = match.start() + 1 if anchored else match.start()
+                    if match_start >= last:
+                        break
+                    line_start = max(data.rfind(b'\n', first, match_start) + 1, first)
+                    line_end = data.find(b'\n', match_start, last)
+                    if line_end < 0:
+                        line_end = last
+                    line = data[line_start:line_end].rstrip(b'\r')
+                    position = line_end + 1
+                    timestamp = MocaFileLog._parse_timestamp(line)
+                    if MocaLogSearch._accept(line, timestamp, regexes, prefixes, start, end):
+                        results.append((timestamp, line))
+        return results
+
+    def _tasks(
+            self, log: MocaFileLog, start: Optional[float], end: Optional[float]
+    ) -> Iterator[Tuple[str, int, Optional[int], bool]]:
+        """Split the files into tasks, oldest first. (path, the start position, the end position, mapped)"""
+        for path, first, last in log.index_ranges(start, end):
+            try:
+                with open(str(path), mode='rb') as file:
+                    if path.name.endswith(tuple(COMPRESSED_EXTENSIONS.values())) or \
+                            file.read(len(MocaLogCodec.MAGIC)) == MocaLogCodec.MAGIC:
+                        yield str(path), first, last, False
+                        continue
+                    size = fstat(file.fileno()).st_size
+                    stop = size if last is None else min(last, size)
+                    if first >= stop:
+                        continue
+                    with mmap(file.fileno(), stop, access=ACCESS_READ) as data:
+                        while first < stop:
+                            boundary = first + self._chunk_size
+                            if boundary < stop:
+                                index = data.find(b'\n', boundary - 1, stop)
+                                boundary = stop if index < 0 else index + 1
+                            else:
+                                boundary = stop
+                            yield str(path), first, boundary, True
+                            first = boundary
+            except FileNotFoundError:
+                pass  # the segment was compressed or removed.
+
+    def search(
+            self,
+            log: MocaFileLog,
+            pattern: Optional[str] = None,
+            text: Optional[str] = None,
+            level: Optional[int] = None,
+            start: Optional[float] = None,
+            end: Optional[float] = None,
+            limit: int = 100,
+            ignore_case: bool = False,
+    ) -> Iterator[List[Tuple[Optional[float], bytes]]]:
+        """
+        Search the logs, and return an iterator of the matched logs in batches, oldest first.
+        The lines of a log that has multiple lines (e.g. an exception) are matched separately.
+        raise ValueError if the regular expression or the log level is invalid, before the search starts.
+        :param log: the log to search.
+        :param pattern: a regular expression, `^` and `$` match at the start and the end of a line.
+        :param text: a substring.
+        :param level: the minimum log level.
+        :param start: the start timestamp (seconds since the epoch).
+        :param end: the end timestamp (inclusive).
+        :param limit: stop when this number of logs are found.
+        :param ignore_case: case-insensitive matching of pattern and text.
+        :return: batches of (timestamp, line), the timestamp is None if the line has no timestamp.
+        """
+        if level is not None and level not in (0, 1, 2, 3, 4):
+            raise ValueError('Invalid integer value, only 0, 1, 2, 3, 4')
+        flags = IGNORECASE if ignore_case else 0
+        patterns: List[bytes] = []
+        if pattern is not None:
+            patterns.append(pattern.encode(ENCODING))
+            try:
+                compile(patterns[0], flags | MULTILINE)
+            except RegexError as e:
+                raise ValueError(f'Invalid regular expression. {e}')
+        if text is not None:
+            patterns.append(escape(text.encode(ENCODING)))
+        return self._search(log, patterns, flags, level, start, end, limit)
+
+    def _search(
+            self, log: MocaFileLog, patterns: List[bytes], flags: int, level: Optional[int], start: Optional[float],
+            end: Optional[float], limit: int
+    ) -> Iterator[List[Tuple[Optional[float], bytes]]]:
+        executor = self._get_executor()
+        tasks = self._tasks(log, start, end)
+        pending: deque = deque()
+        found = 0
+        try:
+            while found < limit:
+                # keep the workers busy, but don't scan too far ahead of the results.
+                while len(pending) < self._workers * 2:
+                    task = next(tasks, None)
+                    if task is None:
+                        break
+                    pending.append(executor.submit(
+                        self._search_task, *task, log.encoding, patterns, flags, level, start, end, limit - found
+                    ))
+                if not pending:
+                    return None
+                results = pending.popleft().result()[:limit - found]
+                found += len(results)
+                if results:
+                    yield results
+        finally:
+            for future in pending:
+                future.cancel()
+            tasks.close()
+
+# -------------------------------------------------------------------------- MocaLogSearch --
@@ -0,0 +1,242 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Optional, Union, Any, Dict, List
+)
+from pathlib import Path
+from json import dumps, loads
+from multiprocessing import Process, Array, Value, Event, get_context
+from multiprocessing.queues import Queue as ProcessQueue
+from multiprocessing.synchronize import SEM_VALUE_MAX
+from signal import signal, SIGINT, SIG_IGN
+from time import monotonic
+from queue import Full
+from ..moca_core import ENCODING
+from ..moca_utils import set_process_name
+from .MocaFileLog import MocaFileLog
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaLogChannel --------------------------------------------------------------------------
+
+
+class MocaLogChannel(ProcessQueue):
+    """
+    A multiprocessing queue that has the maxsize attribute of queue.Queue,
+    so MocaFileLog can use it as the task queue.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        """
+        :param maxsize: the maximum size of the queue, If maxsize is <= 0, the queue size is infinite.
+        """
+        super().__init__(maxsize, ctx=get_context())
+
+    @property
+    def maxsize(self) -> int:
+        return 0 if self._maxsize == SEM_VALUE_MAX else self._maxsize
+
+    def put_many(self, items: List[Any], block: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Put the items into the queue as separate items, all or nothing.
+        raise queue.Full if there are not enough free slots, same as put.
+        """
+        if self._closed:
+            raise ValueError(f'Queue {self!r} is closed')
+        if len(items) > self.maxsize > 0:
+            raise Full
+        deadline = None if timeout is None else monotonic() + timeout
+        acquired = 0
+        try:
+            for _ in items:
+                remaining = None if deadline is None else max(deadline - monotonic(), 0.0)
+                if not self._sem.acquire(block, remaining):
+                    raise Full
+                acquired += 1
+        except Full:
+            for _ in range(acquired):
+                self._sem.release()
+            raise
+        with self._notempty:
+            if self._thread is None:
+                self._start_thread()
+            self._buffer.extend(items)
+            self._notempty.notify()
+
+# -------------------------------------------------------------------------- MocaLogChannel --
+
+# -- MocaLogWriterProcess --------------------------------------------------------------------------
+
+
+class MocaLogWriterProcess:
+    """
+    Write a log file in a dedicated process.
+    The workers of a multi-process server use MocaFileLogClient, the clients render the logs in the workers,
+    and put them into a shared queue. The MocaFileLog in the writer process consumes the queue in FIFO order,
+    so there is only one writer per file, and clear command is processed in order with the logs.
+    Please start the writer process before forking the workers, the workers inherit the shared queue.
+
+    Attributes
+    ----------
+    self._filename: str
+        The path of target file.
+    self._encoding: str
+        The encoding of the target file.
+    self._log_format: str
+        The format of the log file, text or binary.
+    self._params: Dict[str, Any]
+        The parameters of MocaFileLog in the writer process.
+    self._process_name: Optional[str]
+        The name of the writer process.
+    self._channel: MocaLogChannel
+        The shared queue.
+    self._stats
+        The shared memory, the writer process publishes the counters of MocaFileLog as JSON.
+    self._rejected
+        The shared counter of the logs rejected by the clients.
+    self._stop_event
+        Stop the writer process.
+    self._process: Optional[Process]
+        The writer process.
+    """
+
+    STATS_SIZE: int = 65536
+    STATS_INTERVAL: float = 0.5
+
+    def __init__(
+            self,
+            filename: Union[str, Path],
+            encoding: str = ENCODING,
+            maxsize: int = 0,
+            batch_size: int = 1048576,
+            batch_latency: float = 0.0,
+            durability: str = MocaFileLog.DURABILITY_NONE,
+            fsync_interval: float = 1.0,
+            rotate_bytes: int = 0,
+            rotate_age: float = 0.0,
+            rotate_when: Optional[str] = None,
+            compression: Optional[str] = None,
+            backup_count: int = 0,
+            log_format: str = MocaFileLog.FORMAT_TEXT,
+            index_interval: float = 0.0,
+            index_records: int = 0,
+            process_name: Optional[str] = None,
+    ):
+        """
+        :param filename: The path of target file.
+        :param encoding: The encoding of the target file.
+        :param maxsize: the maximum size of the shared queue, If maxsize is <= 0, the queue size is infinite.
+        :param batch_size: the maximum bytes of one batch, If batch_size is <= 0, group-commit is disabled.
+        :param batch_latency: the maximum seconds to wait for more logs before writing a batch.
+        :param durability: the durability policy, none, batch, interval or record.
+        :param fsync_interval: the seconds between two fsync calls in interval mode.
+        :param rotate_bytes: rotate the file when it is larger than this value, 0 means disabled.
+        :param rotate_age: rotate the file when it is older than this value (seconds), 0 means disabled.
+        :param rotate_when: rotate the file at a wall-clock boundary, hourly or daily, None means disabled.
+        :param compression: the compression method of rotated segments, gzip or zstd, None means don't compress.
+        :param backup_count: the maximum number of rotated segments, 0 means keep all.
+        :param log_format: the format of the log file, text or binary.
+        :param index_interval: add a sparse time index entry every this seconds, 0 means disabled.
+        :param index_records: add a sparse time index entry every this number of records, 0 means disabled.
+        :param process_name: the name of the writer process, None means don't change the name.
+        """
+        if log_format not in MocaFileLog.LOG_FORMATS:
+            raise ValueError('log_format parameter only supports text or binary.')
+        self._filename: str = str(filename)
+        self._encoding: str = encoding
+        self._log_format: str = log_format
+        self._params: Dict[str, Any] = {
+            'encoding': encoding, 'batch_size': batch_size, 'batch_latency': batch_latency,
+            'durability': durability, 'fsync_interval': fsync_interval, 'rotate_bytes': rotate_bytes,
+            'rotate_age': rotate_age, 'rotate_when': rotate_when, 'compression': compression,
+            'backup_count': backup_count, 'log_format': log_format, 'index_interval': index_interval,
+            'index_records': index_records,
+        }
+        self._process_name: Optional[str] = process_name
+        self._channel: MocaLogChannel = MocaLogChannel(maxsize)
+        self._stats = Array('c', self.STATS_SIZE)
+        self._rejected = Value('q', 0)
+        self._stop_event = Event()
+        self._process: Optional[Process] = None
+
+    @property
+    def filename(self) -> str:
+        return self._filename
+
+    @property
+    def encoding(self) -> str:
+        return self._encoding
+
+    @property
+    def log_format(self) -> str:
+        return self._log_format
+
+    @property
+    def channel(self) -> MocaLogChannel:
+        return self._channel
+
+    def start(self) -> None:
+        """Start the writer process."""
+        if self._process is None:
+            self._process = Process(
+                target=self._run,
+                args=(
+                    self._filename, self._params, self._process_name, self._channel, self._stats, self._stop_event
+                ),
+                daemon=True,
+            )
+            self._process.start()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Write the logs in the shared queue, and stop the writer process."""
+        if self._process is not None:
+            self._stop_event.set()
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    @classmethod
+    def _run(
+            cls, filename: str, params: Dict[str, Any], process_name: Optional[str], channel: MocaLogChannel,
+            stats, stop_event
+    ) -> None:
+        """The main function of the writer process."""
+        signal(SIGINT, SIG_IGN)  # the parent process stops this process after the workers stopped.
+        if process_name is not None:
+            set_process_name(process_name)
+        moca_log = MocaFileLog(filename, 0, queue=channel, **params)
+
+        def publish() -> None:
+            data = dumps(moca_log.stats).encode()
+            if len(data) < cls.STATS_SIZE:
+                stats.value = data
+
+        while not stop_event.wait(cls.STATS_INTERVAL):
+            publish()
+        moca_log.close(None)  # write the logs in the shared queue, and wait for the writer thread.
+        publish()
+
+    def count_rejected(self, count: int = 1) -> None:
+        """Called by the clients when some logs were rejected."""
+        with self._rejected.get_lock():
+            self._rejected.value += count
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the counters of the writer process, the same keys as MocaFileLog.stats.
+        The counters are published every STATS_INTERVAL seconds, rejected is the total of all clients.
+        """
+        data = self._stats.value
+        stats = loads(data) if data else {}
+        stats['rejected'] = self._rejected.value
+        stats['queue_size'] = self._channel.qsize()
+        stats['queue_maxsize'] = self._channel.maxsize
+        return stats
+
+# -------------------------------------------------------------------------- MocaLogWriterProcess --
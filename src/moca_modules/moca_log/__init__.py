@@ -3,6 +3,14 @@
 from .LogLevel import LogLevel
 from .MocaFileLog import MocaFileLog
 from .MocaAsyncFileLog import MocaAsyncFileLog
+from .MocaLogRecord import MocaLogRecord
+from .MocaLogCodec import MocaLogCodec
+from .MocaLogWriterProcess import MocaLogWriterProcess, MocaLogChannel
+from .MocaFileLogClient import MocaFileLogClient
+from .MocaLogClient import MocaLogClientBase, MocaLogClient
+from .MocaAsyncLogClient import MocaAsyncLogClient
+from .MocaLogHandler import MocaLogHandler
+from .MocaLogSearch import MocaLogSearch
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -10,9 +18,17 @@ from .MocaAsyncFileLog import MocaAsyncFileLog
 This is a simple logging module.
 MocaFileLog can write logs in other thread, to return the response more quickly.
 MocaAsyncFileLog can write logs use asyncio.
+MocaLogCodec is the binary log format of MocaFileLog.
+MocaLogWriterProcess writes a log file in a dedicated process, and MocaFileLogClient sends logs to it from other processes.
+MocaLogClient and MocaAsyncLogClient send logs to a MocaFileLog server in batches, MocaLogHandler is the handler of the logging module.
+MocaLogSearch searches the log files in parallel with worker processes.
 
 Requirements
 ------------
 aiofiles
     aiofiles is an Apache2 licensed library, written in Python, for handling local disk files in asyncio applications.
+requests
+    Requests is an elegant and simple HTTP library for Python, used by MocaLogClient.
+aiohttp
+    Asynchronous HTTP Client/Server for asyncio and Python, used by MocaAsyncLogClient.
 """
\ No newline at end of file
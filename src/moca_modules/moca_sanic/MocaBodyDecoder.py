@@ -0,0 +1,127 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Iterator
+)
+from zlib import decompressobj, MAX_WBITS, error as ZlibError
+from sanic.exceptions import abort
+try:
+    from zstandard import ZstdDecompressor, ZstdError
+    zstd_flag = True
+    DECOMPRESS_ERRORS = (ZlibError, ZstdError)
+except (ImportError, ModuleNotFoundError):
+    zstd_flag = False
+    DECOMPRESS_ERRORS = (ZlibError,)
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- MocaBodyDecoder --------------------------------------------------------------------------
+
+
+class MocaBodyDecoder:
+    """
+    Decompress a request body incrementally, the body is compressed by gzip, deflate or zstd. (Content-Encoding)
+    The decompressed data is returned as small pieces, and the total size is limited to protect the memory.
+    zstd need zstandard module.
+
+    Attributes
+    ----------
+    self._encoding: str
+        The content encoding.
+    self._max_size: int
+        The maximum size of the decompressed body, 0 means unlimited.
+    self._piece_size: int
+        The maximum size of a decompressed piece.
+    self._size: int
+        The size of the decompressed data.
+    self._decompressor
+        The decompress object.
+    self._started: bool
+        Received some data or not.
+    """
+
+    ENCODINGS = ('gzip', 'x-gzip', 'deflate', 'zstd')
+    # zstd can't limit the output size, so feed the compressed data slowly.
+    ZSTD_INPUT_SIZE: int = 1024
+    ZSTD_BLOCK_SIZE: int = 131072  # the maximum output of a zstd block.
+    ZSTD_MIN_BLOCK_SIZE: int = 4  # the minimum input of a zstd block, a RLE block is decompressed to 128KB.
+
+    def __init__(self, encoding: str, max_size: int = 0, piece_size: int = 65536):
+        """
+        :param encoding: the value of Content-Encoding header, gzip, x-gzip, deflate or zstd.
+        :param max_size: the maximum size of the decompressed body, 0 means unlimited.
+        :param piece_size: the maximum size of a decompressed piece.
+        """
+        self._encoding: str = encoding.strip().lower()
+        self._max_size: int = max_size
+        self._piece_size: int = piece_size
+        self._size: int = 0
+        self._started: bool = False
+        if self._encoding in ('gzip', 'x-gzip'):
+            self._decompressor = decompressobj(16 + MAX_WBITS)
+        elif self._encoding == 'deflate':
+            self._decompressor = decompressobj(MAX_WBITS)
+        elif self._encoding == 'zstd' and zstd_flag:
+            self._decompressor = ZstdDecompressor().decompressobj()
+        else:
+            abort(415, f'Content-Encoding: {encoding} is not supported.')
+
+    def _count(self, piece: bytes) -> bytes:
+        self._size += len(piece)
+        if 0 < self._max_size < self._size:
+            abort(413, 'The decompressed request body is too large.')
+        return piece
+
+    def _zstd_input_size(self) -> int:
+        """
+        Limit the input of a zstd decompress call by the remaining size,
+        so the output never exceeds max_size by more than two blocks.
+        """
+        if self._max_size <= 0:
+            return self.ZSTD_INPUT_SIZE
+        blocks = max((self._max_size - self._size) // self.ZSTD_BLOCK_SIZE, 1)
+        return min(self.ZSTD_MIN_BLOCK_SIZE * blocks, self.ZSTD_INPUT_SIZE)
+
+    def decode(self, data: bytes) -> Iterator[bytes]:
+        """Decompress a chunk of the body, and yield the decompressed pieces."""
+        try:
+            if not self._started and self._encoding == 'deflate' and data:
+                # some clients send the raw deflate stream without zlib header.
+                if (data[0] & 0x0f) != 8 or int.from_bytes(data[:2], 'big') % 31 != 0:
+                    self._decompressor = decompressobj(-MAX_WBITS)
+            self._started = True
+            if self._encoding == 'zstd':
+                index = 0
+                while index < len(data):
+                    size = self._zstd_input_size()
+                    piece = self._decompressor.decompress(data[index:index + size])
+                    index += size
+                    if piece:
+                        yield self._count(piece)
+                return None
+            while data:
+                piece = self._decompressor.decompress(data, self._piece_size)
+                data = self._decompressor.unconsumed_tail
+                if piece:
+                    yield self._count(piece)
+        except DECOMPRESS_ERRORS:
+            abort(400, 'Can not decompress the request body.')
+
+    def flush(self) -> bytes:
+        """Return the remaining data, call this method after the last chunk."""
+        if not self._decompressor.eof and self._started:
+            abort(400, 'The compressed request body is incomplete.')
+        if self._encoding == 'zstd':
+            return b''
+        return self._count(self._decompressor.flush())
+
+    def decode_all(self, data: bytes) -> bytes:
+        """Decompress the whole body."""
+        return b''.join(self.decode(data)) + self.flush()
+
+    @property
+    def size(self) -> int:
+        """The size of the decompressed data."""
+        return self._size
+
+# -------------------------------------------------------------------------- MocaBodyDecoder --
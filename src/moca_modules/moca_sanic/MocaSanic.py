@@ -15,8 +15,9 @@ from logging import INFO
 from copy import copy
 from ssl import SSLContext, Purpose, create_default_context
 from pprint import pprint
-from os import unlink
-from socket import AF_INET6, SOCK_STREAM, socket, AF_UNIX
+from os import unlink, chmod
+from stat import S_ISSOCK
+from socket import AF_INET, AF_INET6, SOCK_STREAM, SOL_SOCKET, SO_REUSEADDR, socket, AF_UNIX
 from multiprocessing import current_process
 from datetime import datetime
 from time import time
@@ -49,6 +50,8 @@ class MocaSanic:
         the port number.
     self._unix: Optional[str]
         use unix socket.
+    self._unix_mode: Optional[int]
+        the permissions of the unix socket.
     self._ssl: Optional[SSLContext]
         ssl context for this server.
     self._certfile: Optional[Union[str, Path]]
@@ -87,6 +90,14 @@ class MocaSanic:
         the process id of the main process.
     self._running_lock: bool
         If sanic server is running, this flag will be set to True.
+    self._listener_list: List[Tuple[Optional[str], Optional[int], bool, Optional[str], Optional[int]]]
+        the additional listeners, (host, port, use_ipv6, unix, unix_mode).
+    self._listener_sockets: List[socket]
+        the sockets of the additional listeners, they are bound before the workers are forked.
+    self._listener_servers: list
+        the servers of the additional listeners in this worker.
+    self._starting_listeners: bool
+        If the additional listeners are being started, this flag will be set to True.
     self._env_prefix: str
         The prefix for the environment variables.
     """
@@ -110,6 +121,7 @@ class MocaSanic:
             host: Optional[str] = None,
             port: Optional[int] = None,
             unix: Optional[str] = None,
+            unix_mode: Optional[int] = None,
             ssl: Optional[SSLContext] = None,
             certfile: Optional[Union[str, Path]] = None,
             keyfile: Optional[Union[str, Path]] = None,
@@ -132,6 +144,7 @@ class MocaSanic:
         :param host: the host address of the sanic server.
         :param port: the port of the sanic server.
         :param unix: use unix socket.
+        :param unix_mode: the permissions of the unix socket, for example 0o660. None means use the umask.
         :param ssl: the ssl context of the sanic server.
         :param certfile: the path to ssl certificate file.
         :param keyfile: the path to ssl key file.
@@ -158,6 +171,7 @@ class MocaSanic:
         self._port: Optional[int] = port
         # set unix socket
         self._unix: Optional[str] = unix
+        self._unix_mode: Optional[int] = unix_mode
         # set ssl
         self._ssl: Optional[SSLContext] = ssl
         if (self._ssl is None) and (certfile is not None) and (keyfile is not None) and \
@@ -215,6 +229,11 @@ class MocaSanic:
         self._pid: Optional[int] = current_process().pid
         # set running lock
         self._running_lock: bool = False
+        # set additional listeners
+        self._listener_list: List[Tuple[Optional[str], Optional[int], bool, Optional[str], Optional[int]]] = []
+        self._listener_sockets: List[socket] = []
+        self._listener_servers: list = []
+        self._starting_listeners: bool = False
 
     @property
     def name(self) -> str:
@@ -236,6 +255,10 @@ class MocaSanic:
     def unix(self) -> Optional[str]:
         return self._unix
 
+    @property
+    def unix_mode(self) -> Optional[int]:
+        return self._unix_mode
+
     @property
     def ssl(self) -> Optional[SSLContext]:
         return self._ssl
@@ -292,6 +315,10 @@ class MocaSanic:
     def middleware_list(self) -> List[Tuple[str, Callable]]:
         return self._middleware_list
 
+    @property
+    def listener_list(self) -> List[Tuple[Optional[str], Optional[int], bool, Optional[str], Optional[int]]]:
+        return self._listener_list
+
     @property
     def main_pid(self) -> Optional[int]:
         return self._pid
@@ -575,18 +602,41 @@ class MocaSanic:
         """Add a route"""
         self._app.add_route(handler, uri, methods, host, strict_slashes, version, name, stream)
 
+    def add_listener(
+            self,
+            host: Optional[str] = None,
+            port: Optional[int] = None,
+            use_ipv6: bool = False,
+            unix: Optional[str] = None,
+            unix_mode: Optional[int] = None,
+    ) -> None:
+        """
+        Add a listener, all listeners serve the same application.
+        :param host: the host address.
+        :param port: the port number.
+        :param use_ipv6: use ipv6.
+        :param unix: use unix socket, if this value is not None, host and port are not used.
+        :param unix_mode: the permissions of the unix socket.
+        """
+        if self._not_lock():
+            self._listener_list.append((host, port, use_ipv6, unix, unix_mode))
+
     def static(self, uri: str, directory: Union[str, Path]) -> None:
         """Set a static directory for sanic server."""
         if self._not_lock():
             self._app.static(uri, str(directory))
 
     async def _before_server_start(self, app: Sanic, loop) -> None:
+        if self._starting_listeners:
+            return None  # create_server triggers the listeners again.
         await self.before_server_start(app, loop)
 
     async def _after_server_start(self, app: Sanic, loop) -> None:
+        await self._start_listeners()
         await self.after_server_start(app, loop)
 
     async def _before_server_stop(self, app: Sanic, loop) -> None:
+        self._stop_listeners()
         await self.before_server_stop(app, loop)
 
     async def _after_server_stop(self, app: Sanic, loop) -> None:
@@ -612,17 +662,103 @@ class MocaSanic:
         """Override this method to add listener."""
         pass
 
+    def _bind_unix_socket(self, unix: Optional[str] = None, unix_mode: Optional[int] = None) -> socket:
+        """
+        Bind the unix socket. If the socket file is left by a stopped server, remove it.
+        If another server is listening on the socket file, raise OSError.
+        :param unix: the path of the unix socket, None means self._unix.
+        :param unix_mode: the permissions of the unix socket, only used with the unix parameter.
+        """
+        if unix is None:
+            unix, unix_mode = self._unix, self._unix_mode
+        path = Path(unix)
+        try:
+            mode = path.lstat().st_mode
+        except FileNotFoundError:
+            mode = None
+        if mode is not None:
+            if not S_ISSOCK(mode):
+                raise OSError(f'{unix} is not a unix socket.')
+            probe = socket(AF_UNIX, SOCK_STREAM)
+            try:
+                probe.connect(unix)
+            except (ConnectionRefusedError, FileNotFoundError):
+                unlink(unix)  # a stale socket.
+                print_warning(f'Removed the stale unix socket. <{unix}>')
+            else:
+                raise OSError(f'Another server is listening on {unix}.')
+            finally:
+                probe.close()
+        sock = socket(AF_UNIX, SOCK_STREAM)
+        sock.bind(unix)
+        if unix_mode is not None:
+            chmod(unix, unix_mode)  # the socket is not listening yet.
+        return sock
+
+    def _bind_listeners(self) -> None:
+        """Bind the sockets of the additional listeners, the forked workers inherit them."""
+        for host, port, use_ipv6, unix, unix_mode in self._listener_list:
+            if unix is not None:
+                sock = self._bind_unix_socket(unix, unix_mode)
+                print_info(f'MocaSanic bind to {unix}')
+            else:
+                sock = socket(AF_INET6 if use_ipv6 else AF_INET, SOCK_STREAM)
+                sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+                sock.bind((host, port))
+                print_info(f'MocaSanic Bind to {host}: {port}')
+            sock.set_inheritable(True)
+            self._listener_sockets.append(sock)
+
+    async def _start_listeners(self) -> None:
+        """Start serving the additional listeners in this worker."""
+        self._starting_listeners = True
+        try:
+            for sock in self._listener_sockets:
+                server = await self._app.create_server(
+                    sock=sock,
+                    debug=self._debug,
+                    ssl=self._ssl,
+                    protocol=HttpProtocol if not self._websocket else WebSocketProtocol,
+                    backlog=self._backlog,
+                    return_asyncio_server=True,
+                )
+                self._listener_servers.append(server)
+        finally:
+            self._starting_listeners = False
+
+    def _stop_listeners(self) -> None:
+        """Stop the additional listeners in this worker, and close the idle connections."""
+        for server in self._listener_servers:
+            server.close()
+            for connection in server.connections:
+                connection.close_if_idle()
+        self._listener_servers.clear()
+
+    def _close_listeners(self) -> None:
+        """Close the sockets of the additional listeners, and remove the unix socket files."""
+        for sock, (_, _, _, unix, _) in zip(self._listener_sockets, self._listener_list):
+            sock.close()
+            if unix is not None:
+                try:
+                    unlink(unix)
+                except FileNotFoundError:
+                    pass
+        self._listener_sockets.clear()
+
     def run(self) -> None:
         """Run Sanic server."""
         set_process_name(f'{self._name} --- main process')
         self._init_app()
+        unix_bound = False
+        sock = None
         try:
             print_info(f'uvloop: {is_uvloop()}, ujson: {is_ujson()}')
             if self._debug:
                 print_info('Running MocaSanic module on debug mode.')
+            self._bind_listeners()
             if self._unix is not None:
-                sock = socket(AF_UNIX, SOCK_STREAM)
-                sock.bind(self._unix)
+                sock = self._bind_unix_socket()
+                unix_bound = True
                 print_info(f'MocaSanic bind to {self._unix}')
                 self._app.run(
                     sock=sock,
@@ -669,9 +805,13 @@ class MocaSanic:
         except Exception as other_error:
             print_error(f'Sanic Http Server stopped, unknown error occurred. <Exception: {other_error}>')
         finally:
-            if self._unix is not None:
-                unlink(self._unix)
-            elif self._ipv6:
+            self._close_listeners()
+            if unix_bound:
+                try:
+                    unlink(self._unix)
+                except FileNotFoundError:
+                    pass
+            elif self._ipv6 and sock is not None:
                 sock.close()
 
 # -------------------------------------------------------------------------- MocaSanic --
@@ -1,7 +1,10 @@
 # -- Imports --------------------------------------------------------------------------
 
-from .utils import get_remote_address, get_args, write_cookie
+from .utils import (
+    get_remote_address, get_args, write_cookie, get_body_data, is_msgpack, accepts_msgpack, msgpack_response, msgpack_flag
+)
 from .MocaSanic import MocaSanic
+from .MocaBodyDecoder import MocaBodyDecoder
 
 # -------------------------------------------------------------------------- Imports --
 
@@ -16,4 +19,8 @@ sanic-plugins-framework
     Easily create Plugins for Sanic!
 ujson           
     UltraJSON is an ultra fast JSON encoder and decoder written in pure C with bindings for Python 3.5+.
+zstandard (optional)
+    Zstandard bindings for Python, MocaBodyDecoder need it to decompress zstd request body.
+msgpack (optional)
+    MessagePack serializer, get_args need it to decode application/msgpack request body, otherwise it returns 415.
 """
\ No newline at end of file
@@ -1,12 +1,12 @@
 # -- Imports --------------------------------------------------------------------------
 
 from typing import (
-    Any, Tuple, Optional
+    Any, Tuple, Optional, Dict
 )
 from functools import partial
 from sanic.request import Request
-from sanic.response import HTTPResponse
-from sanic.exceptions import InvalidUsage
+from sanic.response import HTTPResponse, raw
+from sanic.exceptions import InvalidUsage, abort
 from datetime import datetime
 from json import JSONDecodeError
 try:
@@ -17,11 +17,23 @@ except (ImportError, ModuleNotFoundError):
     # This is done in order to ensure that the JSON response is
     # kept consistent across both ujson and inbuilt json usage.
     dumps = partial(__dumps, separators=(",", ":"))
+try:
+    from msgpack import packb, unpackb
+    from msgpack.exceptions import UnpackException
+    msgpack_flag = True
+except (ImportError, ModuleNotFoundError):
+    msgpack_flag = False
 from ..moca_utils import try_to_bool, validate_argument
 from ..moca_el_command import el_command_parser
 
 # -------------------------------------------------------------------------- Imports --
 
+# -- Variables --------------------------------------------------------------------------
+
+MSGPACK_CONTENT_TYPES: Tuple[str, ...] = ('application/msgpack', 'application/x-msgpack')
+
+# -------------------------------------------------------------------------- Variables --
+
 # -- Private Functions --------------------------------------------------------------------------
 
 
@@ -97,6 +109,47 @@ def get_remote_address(request: Request) -> str:
     return request.remote_addr if request.remote_addr != '' else request.ip
 
 
+def is_msgpack(request: Request) -> bool:
+    """The request body is MessagePack."""
+    return request.headers.get('Content-Type', '').split(';')[0].strip().lower() in MSGPACK_CONTENT_TYPES
+
+
+def accepts_msgpack(request: Request) -> bool:
+    """The client accepts a MessagePack response, and msgpack is installed."""
+    accept = request.headers.get('Accept', '').lower()
+    return msgpack_flag and any(content_type in accept for content_type in MSGPACK_CONTENT_TYPES)
+
+
+def get_body_data(request: Request) -> Dict[str, Any]:
+    """
+    Return the request body as a dict, the body can be JSON or MessagePack (Content-Type: application/msgpack).
+    The MessagePack body is decoded only once, and cached in request.ctx.
+    If the body is not a dict, or it can't be decoded, return an empty dict.
+    Abort with 415 if the body is MessagePack and msgpack is not installed.
+    """
+    if not is_msgpack(request):
+        try:
+            return request.json if isinstance(request.json, dict) else {}
+        except InvalidUsage:
+            return {}
+    if not msgpack_flag:
+        abort(415, 'Content-Type: application/msgpack is not supported.')
+    if not hasattr(request.ctx, 'msgpack_data'):
+        data = None
+        if request.body:
+            try:
+                data = unpackb(request.body, raw=False)
+            except (ValueError, TypeError, UnpackException):
+                data = None
+        request.ctx.msgpack_data = data if isinstance(data, dict) else {}
+    return request.ctx.msgpack_data
+
+
+def msgpack_response(body: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> HTTPResponse:
+    """Return a MessagePack response, msgpack must be installed."""
+    return raw(packb(body), status=status, headers=headers, content_type=MSGPACK_CONTENT_TYPES[0])
+
+
 def get_args(request: Request, *args, from_: str = 'all') -> Tuple:
     """
     Get arguments.
@@ -112,11 +165,9 @@ def get_args(request: Request, *args, from_: str = 'all') -> Tuple:
                                             'max_length': 32,
                                          }
     The value of from_ argument can be (all, json, args, form, header, file, cookie)
+    The json means the request body, it can be JSON or MessagePack.
     """
-    try:
-        json_data = request.json if isinstance(request.json, dict) else {}
-    except InvalidUsage:
-        json_data = {}
+    json_data = get_body_data(request)
     return tuple([__get_param(json_data, request, key, from_=from_) if isinstance(key, str) else
                   __get_param(json_data, request, key[0], key[1], from_=from_) if len(key) == 2 else
                   __get_param(json_data, request, key[0], key[1], key[2], from_=from_) if len(key) == 3 else
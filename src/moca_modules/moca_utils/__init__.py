@@ -6,7 +6,7 @@ from .moca_utils import (
     aio_wget, wstatus, aio_wstatus, disk_speed, check_hash, get_time_string, print_with_color, add_extension,
     add_dot_jpg, add_dot_jpeg, add_dot_gif, add_dot_txt, add_dot_png, add_dot_csv, add_dot_rtf, add_dot_pdf,
     add_dot_md, add_dot_log, add_dot_json, add_dot_py, add_dot_cache, add_dot_pickle, add_dot_js, add_dot_css,
-    add_dot_html, set_interval, set_timeout, on_other_thread, is_hiragana, is_katakana,
+    add_dot_html, set_interval, set_timeout, on_other_thread, is_hiragana, is_katakana, format_timestamp,
     is_small_hiragana, is_small_katakana, hiragana_to_katakana, katakana_to_hiragana, check_length, dump_json_beautiful,
     dumps_json_beautiful, contains_upper, contains_lower, contains_alpha, contains_digit, contains_symbol,
     only_consist_of, to_hankaku, to_zenkaku, check_email_format, moca_dumps, moca_dump, moca_aio_dump, moca_loads,
@@ -17,6 +17,7 @@ from time import time
 from requests import get, Response, RequestException
 from hashlib import md5, sha1, sha256, sha512, sha224, sha384
 from datetime import datetime
+from math import modf
 from time import sleep
 from threading import Thread
 from aiohttp import ClientSession, ClientError
@@ -77,6 +78,10 @@ en_faker: Faker = Faker('en_US')
 jp_faker: Faker = Faker('ja_JP')
 zh_faker: Faker = Faker('zh_CN')
 
+# The cache of format_timestamp. (the second, the date and time part, the utc offset part)
+# This tuple is replaced as a whole, so the writer thread and the event loop can share it without a lock.
+_timestamp_cache: Tuple[int, str, str] = (-1, '', '')
+
 # -------------------------------------------------------------------------- Variables --
 
 # -- Utils --------------------------------------------------------------------------
@@ -348,6 +353,33 @@ def check_hash(filename: Union[str, Path], algorithm: str) -> str:
     return digest
 
 
+def format_timestamp(timestamp: float) -> str:
+    """
+    Return the timestamp as string, the same format as str(datetime.fromtimestamp(timestamp, tz)).
+    The date and time part is cached per second, only the sub-second part will be formatted every time.
+    example
+        '2019-11-08 15:12:16.036244+09:00'
+    :param timestamp: seconds since the epoch.
+    :return: time string.
+    """
+    global _timestamp_cache
+    fraction, second = modf(timestamp)
+    second, microsecond = int(second), round(fraction * 1000000)
+    if microsecond >= 1000000:
+        second, microsecond = second + 1, microsecond - 1000000
+    elif microsecond < 0:
+        second, microsecond = second - 1, microsecond + 1000000
+    cache = _timestamp_cache
+    if cache[0] != second:
+        text = str(datetime.fromtimestamp(second, tz))
+        cache = (second, text[:19], text[19:])
+        _timestamp_cache = cache
+    if microsecond:
+        return f'{cache[1]}.{microsecond:06d}{cache[2]}'
+    else:
+        return cache[1] + cache[2]
+
+
 def get_time_string(only_date: bool = False) -> str:
     """
     Return current time as string.
@@ -355,13 +387,13 @@ def get_time_string(only_date: bool = False) -> str:
         only_date == True
             '2019-11-08'
         only_date == False
-            '2019-11-08 15:12:16.036244'
+            '2019-11-08 15:12:16.036244+09:00'
     :return: time string.
     """
     if only_date:
-        return str(datetime.now(tz).date())
+        return format_timestamp(time())[:10]
     else:
-        return str(datetime.now(tz))
+        return format_timestamp(time())
 
 
 def print_with_color(msg: str,
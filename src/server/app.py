@@ -1,14 +1,19 @@
 # -- Imports --------------------------------------------------------------------------
 
+from typing import (
+    List
+)
 from sanic import Sanic, Blueprint
 from threading import Thread
-from gspread import authorize
-from oauth2client.service_account import ServiceAccountCredentials
+from asyncio import Semaphore
 from limits.strategies import FixedWindowElasticExpiryRateLimiter
 from limits.storage import MemoryStorage, RedisStorage
 from copy import copy
+from functools import partial
 from .middlewares import middlewares
 from .routes import blueprints
+from .udp import UDPLogProtocol
+from .registry import LogEntry, LogRegistry
 from .. import moca_modules as mzk
 from .. import core
 
@@ -66,7 +71,7 @@ moca_sanic: mzk.MocaSanic = mzk.MocaSanic(
     access_log=core.SERVER_CONFIG['access_log'],
     log_level=core.SERVER_CONFIG['log_level'],
     use_ipv6=None,
-    workers=1,
+    workers=core.SERVER_CONFIG.get('workers', 1),
     headers=core.SERVER_CONFIG['headers'],
     debug=core.SERVER_CONFIG['debug'],
     auto_reload=core.SERVER_CONFIG['auto_reload'],
@@ -79,23 +84,47 @@ moca_sanic.load_sanic_server_configs(core.SANIC_CONFIG)
 app: Sanic = moca_sanic.app
 
 
-def run_app(name: str, host: str, port: int, use_ipv6: bool, file: str, level: int) -> None:
-    moca_sanic.app.blueprint(Blueprint.group(*blueprints, url_prefix=f'/moca-file-log/{name}'))
-    moca_sanic._host = host
-    moca_sanic._port = port
-    moca_sanic._use_ipv6 = use_ipv6
-    moca_sanic.app._log_name = name
-    moca_sanic.app._host = host
-    moca_sanic.app._port = port
-    moca_sanic.app._use_ipv6 = use_ipv6
-    moca_sanic.app._log_file_path = file
-    moca_sanic.app._log_level = level
-    moca_sanic.run()
+def run_app(names: List[str]) -> None:
+    """
+    Run the server for the logs, all logs are served by this process.
+    The first log is served on the main listener, and the host, port or unix socket of the other logs
+    are added as additional listeners, so the clients can keep using the address of each log.
+    If the server runs multiple workers, every log is written by a dedicated writer process,
+    and the workers send the rendered logs to it.
+    :param names: the names of the logs in configs/log.json.
+    """
+    registry = LogRegistry()
+    for name in names:
+        registry.add(LogEntry(name, core.LOG_CONFIG[name]))
+    moca_sanic.app.blueprint(Blueprint.group(*blueprints, url_prefix='/moca-file-log/<log_name>'))
+    moca_sanic.app.logs = registry
+    addresses = set()
+    for entry in registry:
+        address = entry.unix if entry.unix is not None else (entry.host, entry.port)
+        if address in addresses:
+            continue  # the logs that share an address are served by the same listener.
+        if not addresses:
+            moca_sanic._host = entry.host
+            moca_sanic._port = entry.port
+            moca_sanic._use_ipv6 = entry.use_ipv6
+            moca_sanic._unix = entry.unix
+            moca_sanic._unix_mode = entry.unix_mode
+        else:
+            moca_sanic.add_listener(entry.host, entry.port, entry.use_ipv6, entry.unix, entry.unix_mode)
+        addresses.add(address)
+    if moca_sanic.workers > 1:
+        for entry in registry:
+            entry.start_writer()
+    try:
+        moca_sanic.run()
+    finally:
+        for entry in registry:
+            entry.stop_writer()
 
 
 # set event listener
 async def before_server_start(app_: Sanic, loop):
-    mzk.set_process_name(f'MocaFileLog({core.VERSION}) --- {app_._log_name}')
+    mzk.set_process_name(f'MocaFileLog({core.VERSION}) --- {", ".join(app_.logs.names)}')
     mzk.print_info(f'Starting Sanic server. -- {mzk.get_my_pid()}')
 
     app_.system_config: mzk.MocaConfig = mzk.MocaConfig(
@@ -108,31 +137,18 @@ async def before_server_start(app_: Sanic, loop):
         core.API_KEY_FILE, manual_reload=True
     )
     app_.dict_cache = {}
-    if app_._log_file_path.startswith('/'):
-        file = app_._log_file_path
-    else:
-        file = core.CLIENT_LOG_DIR.joinpath(app_._log_file_path)
-    app_.moca_log = mzk.MocaFileLog(file, app_._log_level)
+    app_.log_readers = Semaphore(core.SERVER_CONFIG.get('max_log_readers', 4))  # get-logs, download-logs.
+    app_.log_search = mzk.MocaLogSearch(core.SERVER_CONFIG.get('search_workers', 0) or None)
+    for entry in app_.logs:
+        entry.open()
     app_.secure_log = mzk.MocaFileLog(core.LOG_DIR.joinpath('secure.log'))
     app_.scheduler = mzk.MocaScheduler()
-    app_.log_list = []
     if core.SERVER_CONFIG['rate_limiter_redis_storage'] is None:
         app_._storage_for_rate_limiter = MemoryStorage()
     else:
         app_._storage_for_rate_limiter = RedisStorage(core.SERVER_CONFIG['rate_limiter_redis_storage'])
     app_.rate_limiter = FixedWindowElasticExpiryRateLimiter(app_._storage_for_rate_limiter)
 
-    if core.LOG_CONFIG[app_._log_name].get('google_spread_sheets_auth', None) is not None:
-        scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        app_._credentials = ServiceAccountCredentials.from_json_keyfile_name(
-            str(core.CONFIG_DIR.joinpath(core.LOG_CONFIG[app_._log_name].get('google_spread_sheets_auth'))),
-            scope,
-        )
-        app_._gc = authorize(app_._credentials)
-        app_.workbook = app_._gc.open_by_key(core.LOG_CONFIG[app_._log_name].get('spread_sheets_key'))
-    else:
-        app_.workbook = None
-
     def __reload_timer(application: Sanic) -> None:
         while True:
             mzk.sleep(1)
@@ -147,6 +163,16 @@ async def before_server_start(app_: Sanic, loop):
 async def after_server_start(app_: Sanic, loop):
     mzk.print_info(f'Started Sanic server. -- {mzk.get_my_pid()}')
 
+    # start UDP listeners.
+    for entry in app_.logs:
+        if entry.udp_port is not None:
+            entry.udp_transport, entry.udp_protocol = await loop.create_datagram_endpoint(
+                partial(UDPLogProtocol, app_, entry),
+                local_addr=(entry.host, entry.udp_port),
+                reuse_port=moca_sanic.workers > 1,  # the datagrams are distributed to the workers.
+            )
+            mzk.print_info(f'Started UDP listener on {entry.host}:{entry.udp_port}. -- {mzk.get_my_pid()}')
+
     # run scheduled tasks.
     def dos_detect():
         info = copy(app_.dict_cache.get('dos-detect'))
@@ -161,11 +187,11 @@ async def after_server_start(app_: Sanic, loop):
                     mzk.LogLevel.WARNING
                 )
 
-    def sync_with_spread_sheets():
-        if len(app_.log_list) == 0:
+    def sync_log_with_spread_sheets(entry: LogEntry):
+        if len(entry.log_list) == 0:
             return None
-        if app_.workbook is not None:
-            workbook = app_.workbook
+        if entry.workbook is not None:
+            workbook = entry.workbook
             if len(workbook.worksheets()) == 1 and not workbook.worksheets()[0].title.startswith('1-'):
                 workbook.add_worksheet(title='1-0', rows=5001, cols=3)
                 workbook.del_worksheet(workbook.worksheets()[0])
@@ -184,12 +210,12 @@ async def after_server_start(app_: Sanic, loop):
                     latest = workbook.worksheets()[-1]
                     start, end = int(latest.title.split('-')[0]), int(latest.title.split('-')[1])
                     index = end - start + 3
-                if (index + len(app_.log_list)) <= 5002:
-                    log_list = app_.log_list
-                    app_.log_list = []
+                if (index + len(entry.log_list)) <= 5002:
+                    log_list = entry.log_list
+                    entry.log_list = []
                 else:
-                    log_list = app_.log_list[:5002-index]
-                    app_.log_list[:5002 - index] = []
+                    log_list = entry.log_list[:5002-index]
+                    entry.log_list[:5002 - index] = []
                 cell_list = latest.range(f'A{index}:C{index + len(log_list)-1}')
                 i = 0
                 for level, timestamp, message in log_list:
@@ -199,15 +225,23 @@ async def after_server_start(app_: Sanic, loop):
                 index += len(log_list)
                 latest.update_title(f'{start}-{index + start - 3}')
 
+    def sync_with_spread_sheets():
+        for entry in app_.logs:
+            sync_log_with_spread_sheets(entry)
+
     app_.scheduler.add_event_per_second('Dos-detect', dos_detect, 5)
     app_.scheduler.add_event_per_second('Sync-With-Spread-Sheets', sync_with_spread_sheets, 5)
 
 
 async def before_server_stop(app_: Sanic, loop):
     mzk.print_info(f'Stopping Sanic server. -- {mzk.get_my_pid()}')
+    for entry in app_.logs:
+        if entry.udp_transport is not None:
+            entry.udp_transport.close()
 
 
 async def after_server_stop(app_: Sanic, loop):
+    app_.log_search.close()
     mzk.print_info(f'Stopped Sanic server. -- {mzk.get_my_pid()}')
 
 
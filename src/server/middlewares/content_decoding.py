@@ -0,0 +1,22 @@
+# -- Imports --------------------------------------------------------------------------
+
+from sanic.request import Request
+from ... import moca_modules as mzk
+from ... import core
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Middleware --------------------------------------------------------------------------
+
+
+async def content_decoding(request: Request):
+    """
+    Decompress the request body, if the request has Content-Encoding header. (gzip, deflate or zstd)
+    The streaming routes receive the body after this middleware, they decompress the body by themselves.
+    """
+    encoding = request.headers.get('Content-Encoding', 'identity')
+    if encoding.strip().lower() != 'identity' and request.body:
+        decoder = mzk.MocaBodyDecoder(encoding, core.SERVER_CONFIG.get('max_decompressed_size', 104857600))
+        request.body = decoder.decode_all(request.body)
+
+# -------------------------------------------------------------------------- Middleware --
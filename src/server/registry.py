@@ -0,0 +1,205 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Optional, Union, Dict, List, Iterator, Any
+)
+from asyncio import DatagramTransport
+from gspread import authorize
+from oauth2client.service_account import ServiceAccountCredentials
+from .. import moca_modules as mzk
+from .. import core
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Log Registry --------------------------------------------------------------------------
+
+
+class LogEntry:
+    """
+    The config and the runtime state of a log that is served by this process.
+
+    Attributes
+    ----------
+    self.name: str
+        The name of the log, the routes of this log are mounted at /moca-file-log/<name>.
+    self.host: str
+        The host address of the listener of this log.
+    self.port: int
+        The port number of the listener of this log.
+    self.use_ipv6: bool
+        Use ipv6.
+    self.unix: Optional[str]
+        The unix socket of the listener of this log, if this value is not None, host and port are not used.
+    self.unix_mode: Optional[int]
+        The permissions of the unix socket.
+    self.file: str
+        The log file path in the config, a relative path is relative to the client_logs directory.
+    self.retry_after: int
+        The value of Retry-After header, when the log queue is full.
+    self.udp_port: Optional[int]
+        The port number of the UDP listener.
+    self.udp_secret: Optional[str]
+        The shared secret of the signed UDP datagrams.
+    self.writer: Optional[MocaLogWriterProcess]
+        The dedicated writer process, it is used when the server runs multiple workers.
+    self.moca_log: Optional[Union[MocaFileLog, MocaFileLogClient]]
+        The writer of this log, created when the server is starting.
+        If the dedicated writer process is running, this is a client that sends the rendered logs to it.
+    self.log_list: List[Tuple[int, str, str]]
+        The logs to sync with google spread sheets.
+    self.workbook
+        The google spread sheets workbook, None means don't sync.
+    self.udp_transport: Optional[DatagramTransport]
+        The transport of the UDP listener.
+    self.udp_protocol: Optional[UDPLogProtocol]
+        The protocol of the UDP listener.
+    """
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        """
+        :param name: the name of the log.
+        :param config: the config of the log in configs/log.json.
+        """
+        self.name: str = name
+        self.host: str = config['host']
+        self.port: int = int(config['port'])
+        self.use_ipv6: bool = config['use_ipv6']
+        self.unix: Optional[str] = str(core.TOP_DIR.joinpath(config['unix'])) \
+            if config.get('unix') is not None else None
+        self.unix_mode: Optional[int] = int(config['unix_mode'], 8) if config.get('unix_mode') is not None else None
+        self.file: str = config['file']
+        self.level: int = config['level']
+        self.durability: str = config.get('durability', 'none')
+        self.fsync_interval: float = float(config.get('fsync_interval', 1.0))
+        self.queue_size: int = int(config.get('queue_size', 100000))
+        self.overflow: str = config.get('overflow', 'reject')
+        self.put_timeout: Optional[float] = config.get('put_timeout', 1.0)
+        self.retry_after: int = int(config.get('retry_after', 1))
+        self.deferred: bool = bool(config.get('deferred', False))
+        self.location_mode: str = config.get('location', 'static')
+        self.rotate_bytes: int = int(config.get('rotate_bytes', 0))
+        self.rotate_age: float = float(config.get('rotate_age', 0.0))
+        self.rotate_when: Optional[str] = config.get('rotate_when', None)
+        self.compression: Optional[str] = config.get('compression', 'gzip')
+        self.backup_count: int = int(config.get('backup_count', 0))
+        self.log_format: str = config.get('format', 'text')
+        self.index_interval: float = float(config.get('index_interval', 1.0))
+        self.index_records: int = int(config.get('index_records', 1000))
+        self.udp_port: Optional[int] = config.get('udp_port', None)
+        self.udp_secret: Optional[str] = config.get('udp_secret', None)
+        self.google_spread_sheets_auth: Optional[str] = config.get('google_spread_sheets_auth', None)
+        self.spread_sheets_key: Optional[str] = config.get('spread_sheets_key', None)
+        self.writer: Optional[mzk.MocaLogWriterProcess] = None
+        self.moca_log: Optional[Union[mzk.MocaFileLog, mzk.MocaFileLogClient]] = None
+        self.log_list: list = []
+        self.workbook = None
+        self.udp_transport: Optional[DatagramTransport] = None
+        self.udp_protocol = None
+
+    @property
+    def file_path(self) -> str:
+        """The absolute path of the log file."""
+        return self.file if self.file.startswith('/') else str(core.CLIENT_LOG_DIR.joinpath(self.file))
+
+    def start_writer(self) -> None:
+        """Start the dedicated writer process, call this method before forking the workers."""
+        self.writer = mzk.MocaLogWriterProcess(
+            self.file_path,
+            maxsize=self.queue_size,
+            durability=self.durability,
+            fsync_interval=self.fsync_interval,
+            rotate_bytes=self.rotate_bytes,
+            rotate_age=self.rotate_age,
+            rotate_when=self.rotate_when,
+            compression=self.compression,
+            backup_count=self.backup_count,
+            log_format=self.log_format,
+            index_interval=self.index_interval,
+            index_records=self.index_records,
+            process_name=f'MocaFileLog({core.VERSION}) --- writer {self.name}',
+        )
+        self.writer.start()
+
+    def stop_writer(self) -> None:
+        """Write the remaining logs, and stop the dedicated writer process."""
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer = None
+
+    def open(self) -> None:
+        """Create the writer (or the client of the writer process), and open the google spread sheets workbook."""
+        if self.writer is not None:
+            self.moca_log = mzk.MocaFileLogClient(
+                self.writer,
+                self.level,
+                overflow=self.overflow,
+                put_timeout=self.put_timeout,
+                location_mode=self.location_mode,
+            )
+        else:
+            self.moca_log = mzk.MocaFileLog(
+                self.file_path,
+                self.level,
+                durability=self.durability,
+                fsync_interval=self.fsync_interval,
+                maxsize=self.queue_size,
+                overflow=self.overflow,
+                put_timeout=self.put_timeout,
+                deferred=self.deferred,
+                location_mode=self.location_mode,
+                rotate_bytes=self.rotate_bytes,
+                rotate_age=self.rotate_age,
+                rotate_when=self.rotate_when,
+                compression=self.compression,
+                backup_count=self.backup_count,
+                log_format=self.log_format,
+                index_interval=self.index_interval,
+                index_records=self.index_records,
+            )
+        if self.google_spread_sheets_auth is not None:
+            scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+            credentials = ServiceAccountCredentials.from_json_keyfile_name(
+                str(core.CONFIG_DIR.joinpath(self.google_spread_sheets_auth)),
+                scope,
+            )
+            self.workbook = authorize(credentials).open_by_key(self.spread_sheets_key)
+
+
+class LogRegistry:
+    """
+    The logs that are served by this process.
+
+    Attributes
+    ----------
+    self._entries: Dict[str, LogEntry]
+        The logs, the key is the name of the log.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, LogEntry] = {}
+
+    def add(self, entry: LogEntry) -> None:
+        """Add a log, the name must be unique."""
+        if entry.name in self._entries:
+            raise ValueError(f'The log is already registered. <{entry.name}>')
+        self._entries[entry.name] = entry
+
+    def get(self, name: str) -> Optional[LogEntry]:
+        """Return the log, None if the log is not registered."""
+        return self._entries.get(name)
+
+    @property
+    def names(self) -> List[str]:
+        """The names of the registered logs."""
+        return list(self._entries)
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        return iter(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+# -------------------------------------------------------------------------- Log Registry --
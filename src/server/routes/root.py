@@ -1,42 +1,69 @@
 # -- Imports --------------------------------------------------------------------------
 
+from typing import (
+    Union, Optional, Any, Dict
+)
 from pathlib import Path
+from asyncio import get_event_loop, wait_for, TimeoutError
+from time import monotonic
 from sanic import Blueprint
 from sanic.request import Request
+from sanic.websocket import WebSocketCommonProtocol
+from websockets.exceptions import ConnectionClosed
 from sanic.exceptions import Forbidden
-from sanic.response import HTTPResponse, text, json as original_json, file
-from orjson import dumps as orjson_dumps
+from sanic.response import HTTPResponse, StreamingHTTPResponse, text, json as original_json
+from orjson import dumps as orjson_dumps, loads as orjson_loads, JSONDecodeError
 from functools import partial
 json = partial(original_json, dumps=orjson_dumps)
 from ... import moca_modules as mzk
-from .utils import check_root_pass
+from .utils import (
+    check_root_pass, get_log, busy_response, parse_log, encode_response, parse_range, parse_time, stream_logs,
+    stream_chunks, to_ndjson, LOG_CHUNK_SIZE
+)
 
 # -------------------------------------------------------------------------- Imports --
 
+# -- Variables --------------------------------------------------------------------------
+
+STREAM_MAX_LINE_SIZE: int = 16384
+STREAM_MAX_ERRORS: int = 100
+WS_ACK_RECORDS: int = 100
+WS_ACK_INTERVAL: int = 200  # milliseconds
+WS_MAX_ERRORS: int = 100
+LATEST_LOGS_LIMIT: int = 1024
+SEARCH_LIMIT: int = 10000
+
+# -------------------------------------------------------------------------- Variables --
+
 # -- Blueprint --------------------------------------------------------------------------
 
 root: Blueprint = Blueprint('root', None)
 
 
 @root.route('/details', {'GET', 'POST', 'OPTIONS'})
-async def details(request: Request) -> HTTPResponse:
+async def details(request: Request, log_name: str) -> HTTPResponse:
     check_root_pass(request)
-    size = int(mzk.check_output(f'wc -c < "{request.app.moca_log.filename}"', shell=True).decode().strip())
-    count = int(mzk.check_output(f'wc -l "{request.app.moca_log.filename}"', shell=True).decode().strip().split()[0])
-    return json({
-        'name': request.app._log_name,
-        'host': request.app._host,
-        'port': request.app._port,
-        'use_ipv6': request.app._use_ipv6,
-        'file': request.app._log_file_path,
+    entry = get_log(request, log_name)
+    stats = entry.moca_log.stats  # the size and the lines of the file are counted by the writer.
+    size = stats.get('file_size', 0)
+    count = stats.get('file_lines', 0)
+    return encode_response(request, {
+        'name': entry.name,
+        'host': entry.host,
+        'port': entry.port,
+        'use_ipv6': entry.use_ipv6,
+        'file': entry.file,
         'count': count,
         'size': size,
-        'size(MB)': round(size / 1024 / 1024, 2)
+        'size(MB)': round(size / 1024 / 1024, 2),
+        'writer': stats,
+        'udp': entry.udp_protocol.stats if entry.udp_protocol is not None else None,
     })
 
 
 @root.route('/save-log', {'GET', 'POST', 'OPTIONS'})
-async def save_log(request: Request) -> HTTPResponse:
+async def save_log(request: Request, log_name: str) -> HTTPResponse:
+    entry = get_log(request, log_name)
     level, msg = mzk.get_args(
         request,
         ('level', int, 1, {'is_in': [0, 1, 2, 3, 4]}),
@@ -44,62 +71,348 @@ async def save_log(request: Request) -> HTTPResponse:
     )
     if msg is None:
         raise Forbidden('message parameter format error.')
-    request.app.log_list.append((level, mzk.get_time_string(), msg))
-    request.app.moca_log.write_log(msg, level)
+    if not entry.moca_log.write_log(msg, level):
+        return busy_response(entry)
+    if entry.workbook is not None:
+        entry.log_list.append((level, mzk.get_time_string(), msg))
     return text('success.')
 
 
 @root.route('/save-logs', {'GET', 'POST', 'OPTIONS'})
-async def save_logs(request: Request) -> HTTPResponse:
+async def save_logs(request: Request, log_name: str) -> HTTPResponse:
+    entry = get_log(request, log_name)
     logs, *_ = mzk.get_args(
         request,
         ('logs', list, None, {'max_length': 1024}),
     )
     if logs is None:
         raise Forbidden('logs parameter format error.')
+    records = []
     for log in logs:
         try:
             level, msg = log['level'], log.get('message', log['msg'])
             if level in [0, 1, 2, 3, 4] and isinstance(msg, str) and len(msg) <= 8192:
-                request.app.log_list.append((level, mzk.get_time_string(), msg))
-                request.app.moca_log.write_log(msg, level)
+                records.append((level, msg))
             else:
                 raise Forbidden('logs parameter format error.')
-        except KeyError:
+        except (KeyError, TypeError, AttributeError):
             raise Forbidden('logs parameter format error.')
+    if not entry.moca_log.write_logs(records):
+        return busy_response(entry)
+    if entry.workbook is not None:
+        timestamp = mzk.get_time_string()
+        entry.log_list.extend([(level, timestamp, msg) for level, msg in records])
     return text('success.')
 
 
+@root.route('/save-logs-stream', {'POST', 'OPTIONS'}, stream=True)
+async def save_logs_stream(request: Request, log_name: str) -> HTTPResponse:
+    """
+    Save logs from a newline-delimited JSON body, one log per line. for example: {"level": 1, "message": "..."}
+    The logs are saved while the body is being received, so the number of logs is not limited.
+    Return the count of saved and failed lines, and the errors of the first failed lines.
+    """
+    entry = get_log(request, log_name)
+    moca_log = entry.moca_log
+    summary: Dict[str, Any] = {'lines': 0, 'saved': 0, 'failed': 0, 'busy': 0, 'errors': []}
+
+    def save(line: bytes) -> None:
+        summary['lines'] += 1
+        error: Optional[str] = None
+        try:
+            log = parse_log(orjson_loads(line))
+            if log is None:
+                error = 'logs parameter format error.'
+            elif not moca_log.write_log(log[1], log[0]):
+                summary['busy'] += 1
+                error = 'The log queue is full, please retry later.'
+            else:
+                summary['saved'] += 1
+                if entry.workbook is not None:
+                    entry.log_list.append((log[0], mzk.get_time_string(), log[1]))
+        except JSONDecodeError:
+            error = 'logs parameter format error.'
+        if error is not None:
+            summary['failed'] += 1
+            if len(summary['errors']) < STREAM_MAX_ERRORS:
+                summary['errors'].append({'line': summary['lines'], 'error': error})
+
+    def too_long() -> None:
+        summary['lines'] += 1
+        summary['failed'] += 1
+        if len(summary['errors']) < STREAM_MAX_ERRORS:
+            summary['errors'].append({'line': summary['lines'], 'error': 'the line is too long.'})
+
+    def process(chunk: bytes) -> None:
+        nonlocal skipping
+        start = 0
+        while True:
+            end = chunk.find(b'\n', start)
+            if end < 0:
+                if not skipping:
+                    pending.extend(chunk[start:])
+                    if len(pending) > STREAM_MAX_LINE_SIZE:
+                        skipping = True
+                        pending.clear()
+                break
+            if skipping:
+                too_long()
+                skipping = False
+            else:
+                pending.extend(chunk[start:end])
+                if len(pending) > STREAM_MAX_LINE_SIZE:
+                    too_long()
+                elif pending.strip():
+                    save(bytes(pending))
+            pending.clear()
+            start = end + 1
+
+    encoding = request.headers.get('Content-Encoding', 'identity')
+    decoder = None if encoding.strip().lower() == 'identity' else mzk.MocaBodyDecoder(encoding)
+    pending = bytearray()
+    skipping = False  # the current line is too long, discard it until the next new line.
+    while True:
+        body = await request.stream.read()
+        if body is None:
+            break
+        if decoder is None:
+            process(body)
+        else:
+            for piece in decoder.decode(body):
+                process(piece)
+    if decoder is not None:
+        process(decoder.flush())
+    if skipping:
+        too_long()
+    elif pending.strip():
+        save(bytes(pending))
+    return json(summary)
+
+
+@root.websocket('/ws')
+async def save_logs_ws(request: Request, ws: WebSocketCommonProtocol, log_name: str) -> None:
+    """
+    Save logs through a websocket connection, the API key is checked only once when connecting.
+    Send a log {"level": 1, "message": "..."} or a list of logs as a message.
+    The server sends a cumulative acknowledgement every `ack_records` logs or `ack_interval` milliseconds.
+    {"ack": 120, "saved": 117, "failed": 3, "busy": 1, "errors": [{"seq": 57, "error": "..."}]}
+    ack is the total count of the received logs, seq is the sequence number of the log, starts from 1.
+    errors contains the failed logs since the previous acknowledgement.
+    """
+    entry = get_log(request, log_name)
+    ack_records, ack_interval = mzk.get_args(
+        request,
+        ('ack_records', int, WS_ACK_RECORDS),
+        ('ack_interval', int, WS_ACK_INTERVAL),
+    )
+    ack_records = min(max(ack_records, 1), 100000)
+    ack_interval = min(max(ack_interval, 10), 60000) / 1000
+    moca_log = entry.moca_log
+    summary: Dict[str, Any] = {'ack': 0, 'saved': 0, 'failed': 0, 'busy': 0, 'errors': []}
+    pending = 0  # the count of the logs after the previous acknowledgement.
+    pending_since = 0.0
+
+    def fail(seq: int, error: str) -> None:
+        summary['failed'] += 1
+        if len(summary['errors']) < WS_MAX_ERRORS:
+            summary['errors'].append({'seq': seq, 'error': error})
+
+    def save(message: Union[str, bytes]) -> int:
+        start = summary['ack']
+        try:
+            data = orjson_loads(message)
+        except JSONDecodeError:
+            data = None
+        logs = data if isinstance(data, list) else [data]
+        records = []
+        for index, log in enumerate(logs, start + 1):
+            record = parse_log(log)
+            if record is None:
+                fail(index, 'logs parameter format error.')
+            else:
+                records.append(record)
+        if records:
+            if moca_log.write_logs(records):
+                summary['saved'] += len(records)
+                if entry.workbook is not None:
+                    timestamp = mzk.get_time_string()
+                    entry.log_list.extend([(level, timestamp, msg) for level, msg in records])
+            else:
+                summary['busy'] += len(records)
+                for index, log in enumerate(logs, start + 1):
+                    if parse_log(log) is not None:
+                        fail(index, 'The log queue is full, please retry later.')
+        summary['ack'] += len(logs)
+        return len(logs)
+
+    try:
+        while True:
+            try:
+                if pending:
+                    message = await wait_for(ws.recv(), max(ack_interval - (monotonic() - pending_since), 0))
+                else:
+                    message = await ws.recv()
+            except TimeoutError:
+                message = None
+            if message is not None:
+                if not pending:
+                    pending_since = monotonic()
+                pending += save(message)
+            if pending and (pending >= ack_records or monotonic() - pending_since >= ack_interval):
+                await ws.send(orjson_dumps(summary).decode())
+                summary['errors'] = []
+                pending = 0
+    except ConnectionClosed:
+        pass
+
+
 @root.route('/download-logs', {'GET', 'POST', 'OPTIONS'})
-async def download_logs(request: Request) -> HTTPResponse:
+async def download_logs(request: Request, log_name: str) -> Union[HTTPResponse, StreamingHTTPResponse]:
     check_root_pass(request)
-    return await file(
-        request.app.moca_log.filename,
-        mime_type='text/plain',
-        filename=Path(request.app.moca_log.filename).name
+    entry = get_log(request, log_name)
+    return await stream_logs(
+        request,
+        entry,
+        headers={'Content-Disposition': f'attachment; filename="{Path(entry.moca_log.filename).name}"'}
     )
 
 
 @root.route('/get-logs', {'GET', 'POST', 'OPTIONS'})
-async def get_logs(request: Request) -> HTTPResponse:
+async def get_logs(request: Request, log_name: str) -> Union[HTTPResponse, StreamingHTTPResponse]:
+    """
+    Stream the logs of the rotated segments and the current file, oldest first.
+    A part of the logs can be read by offset and limit parameters (bytes), or Range header.
+    Range header is used only when the total size is known without reading the files (text format, no compressed
+    segments), otherwise it is ignored and all logs are returned. offset and limit are always supported.
+    """
     check_root_pass(request)
-    return text(
-        await mzk.aio_get_str_from_file(request.app.moca_log.filename)
+    entry = get_log(request, log_name)
+    offset, limit = mzk.get_args(
+        request,
+        ('offset', int, 0),
+        ('limit', int, None),
+    )
+    if offset < 0:
+        raise Forbidden('offset parameter format error.')
+    if limit is not None and limit < 1:
+        raise Forbidden('limit parameter format error.')
+    byte_range = parse_range(request.headers.get('Range', ''))
+    if byte_range is None:
+        return await stream_logs(request, entry, offset, limit)
+    total = await get_event_loop().run_in_executor(None, entry.moca_log.total_size)
+    if total is None:
+        return await stream_logs(request, entry)
+    first, last = byte_range
+    if first is None:  # the last n bytes.
+        first, last = max(total - last, 0), total - 1
+    if first >= total or total == 0:
+        return text('Range Not Satisfiable.', status=416, headers={'Content-Range': f'bytes */{total}'})
+    last = total - 1 if last is None else min(last, total - 1)
+    return await stream_logs(
+        request,
+        entry,
+        first,
+        last - first + 1,
+        status=206,
+        headers={'Content-Range': f'bytes {first}-{last}/{total}', 'Accept-Ranges': 'bytes'}
     )
 
 
 @root.route('/get-latest-logs', {'GET', 'POST', 'OPTIONS'})
-async def get_latest_logs(request: Request) -> HTTPResponse:
+async def get_latest_logs(request: Request, log_name: str) -> HTTPResponse:
+    """
+    Return the latest n lines, newest first.
+    If there are older lines, the cursor of the next page is returned in Moca-Next-Cursor header,
+    send it as before parameter to get the older lines.
+    """
     check_root_pass(request)
-    res = mzk.check_output(f'cat "{request.app.moca_log.filename}" | tail -n 1024', shell=True).decode().splitlines()
-    res.reverse()
-    return json(res)
+    entry = get_log(request, log_name)
+    number, before = mzk.get_args(
+        request,
+        ('n', int, LATEST_LOGS_LIMIT),
+        ('before', str, None, {'max_length': 1024}),
+    )
+    if not 0 < number <= LATEST_LOGS_LIMIT:
+        raise Forbidden('n parameter format error.')
+    try:
+        lines, cursor = await get_event_loop().run_in_executor(
+            None, entry.moca_log.get_lines_before, number, before
+        )
+    except ValueError as e:
+        raise Forbidden(str(e))
+    response = encode_response(request, [line.decode(errors='replace') for line in lines])
+    if cursor is not None:
+        response.headers['Moca-Next-Cursor'] = cursor
+    return response
+
+
+@root.route('/query', {'GET', 'POST', 'OPTIONS'})
+async def query_logs(request: Request, log_name: str) -> Union[HTTPResponse, StreamingHTTPResponse]:
+    """
+    Stream the logs between from and to, oldest first.
+    from and to are seconds since the epoch or ISO 8601, only the byte ranges found by the sparse time index are read.
+    """
+    check_root_pass(request)
+    entry = get_log(request, log_name)
+    start, end = mzk.get_args(
+        request,
+        ('from', str, None, {'max_length': 64}),
+        ('to', str, None, {'max_length': 64}),
+    )
+    try:
+        start = parse_time(start)
+    except ValueError:
+        raise Forbidden('from parameter format error.')
+    try:
+        end = parse_time(end)
+    except ValueError:
+        raise Forbidden('to parameter format error.')
+    return await stream_chunks(request, entry, entry.moca_log.query(start, end, LOG_CHUNK_SIZE))
+
+
+@root.route('/search', {'GET', 'POST', 'OPTIONS'})
+async def search_logs(request: Request, log_name: str) -> Union[HTTPResponse, StreamingHTTPResponse]:
+    """
+    Search the logs by the log level, a substring, a regular expression and a time range, oldest first.
+    The files are scanned by the worker processes of MocaLogSearch, and the search stops when limit logs are found.
+    The matched lines are streamed as NDJSON.
+    """
+    check_root_pass(request)
+    entry = get_log(request, log_name)
+    text_, pattern, level, start, end, limit = mzk.get_args(
+        request,
+        ('q', str, None, {'max_length': 1024}),
+        ('regex', str, None, {'max_length': 1024}),
+        ('level', int, None),
+        ('from', str, None, {'max_length': 64}),
+        ('to', str, None, {'max_length': 64}),
+        ('limit', int, 100),
+    )
+    if level is not None and level not in (0, 1, 2, 3, 4):
+        raise Forbidden('level parameter format error.')
+    if not 0 < limit <= SEARCH_LIMIT:
+        raise Forbidden('limit parameter format error.')
+    try:
+        start = parse_time(start)
+    except ValueError:
+        raise Forbidden('from parameter format error.')
+    try:
+        end = parse_time(end)
+    except ValueError:
+        raise Forbidden('to parameter format error.')
+    try:
+        batches = request.app.log_search.search(entry.moca_log, pattern, text_, level, start, end, limit)
+        chunks = to_ndjson(batches)
+    except ValueError:
+        raise Forbidden('regex parameter format error.')
+    return await stream_chunks(request, entry, chunks, content_type='application/x-ndjson')
 
 
 @root.route('/clear-logs', {'GET', 'POST', 'OPTIONS'})
-async def clear_log(request: Request) -> HTTPResponse:
+async def clear_log(request: Request, log_name: str) -> HTTPResponse:
     check_root_pass(request)
-    request.app.moca_log.clear_log()
+    entry = get_log(request, log_name)
+    entry.moca_log.clear_log()
     return text('success.')
 
 # -------------------------------------------------------------------------- Blueprint --
@@ -1,11 +1,28 @@
 # -- Imports --------------------------------------------------------------------------
 
+from typing import (
+    Any, Optional, Tuple, Dict, Union, Iterator, List
+)
+from asyncio import get_event_loop, shield
+from threading import Lock
+from datetime import datetime
 from sanic.request import Request
-from sanic.exceptions import Forbidden
+from sanic.response import HTTPResponse, StreamingHTTPResponse, text, stream, json as original_json
+from sanic.exceptions import Forbidden, NotFound
+from orjson import dumps as orjson_dumps
+from functools import partial
+json = partial(original_json, dumps=orjson_dumps)
 from ... import moca_modules as mzk
+from ..registry import LogEntry
 
 # -------------------------------------------------------------------------- Imports --
 
+# -- Variables --------------------------------------------------------------------------
+
+LOG_CHUNK_SIZE: int = 262144
+
+# -------------------------------------------------------------------------- Variables --
+
 # -- Utils --------------------------------------------------------------------------
 
 
@@ -14,4 +31,152 @@ def check_root_pass(request: Request) -> None:
     if root_pass != request.app.system_config.get_config('root_pass'):
         raise Forbidden('Invalid root password.')
 
+
+def get_log(request: Request, name: str) -> LogEntry:
+    """Return the log of the request path, raise NotFound if the log is not served by this process."""
+    entry = request.app.logs.get(name)
+    if entry is None:
+        raise NotFound(f'Unknown log. <{name}>')
+    return entry
+
+
+def busy_response(entry: LogEntry) -> HTTPResponse:
+    """The log queue is full, the client should retry later."""
+    return text(
+        'The log queue is full, please retry later.',
+        status=503,
+        headers={'Retry-After': str(entry.retry_after)}
+    )
+
+
+def parse_range(header: str) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    Parse a single byte range of Range header. for example: bytes=0-1023, bytes=1024-, bytes=-1024
+    :return: (first, last), last is inclusive, first is None for a suffix range. None if the header is not supported.
+    """
+    unit, _, value = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in value:
+        return None
+    first, _, last = value.strip().partition('-')
+    if not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if not first:
+        return None, int(last)
+    if last and int(last) < int(first):
+        return None
+    return int(first), int(last) if last else None
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a time parameter, seconds since the epoch or ISO 8601. for example: 1573193536.5, 2019-11-08T15:12:16+09:00
+    A time without timezone is the local time. raise ValueError if the value is invalid.
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+async def stream_logs(
+        request: Request,
+        entry: LogEntry,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+) -> Union[HTTPResponse, StreamingHTTPResponse]:
+    """Stream the logs of the rotated segments and the current file, please refer to stream_chunks."""
+    return await stream_chunks(request, entry, entry.moca_log.iter_range(offset, limit, LOG_CHUNK_SIZE), status, headers)
+
+
+async def stream_chunks(
+        request: Request,
+        entry: LogEntry,
+        chunks: Iterator[bytes],
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        content_type: str = 'text/plain; charset=utf-8',
+) -> Union[HTTPResponse, StreamingHTTPResponse]:
+    """
+    Stream the chunks of the logs, they are read in the executor, the memory usage doesn't depend on the file size.
+    The number of the concurrent readers is limited by max_log_readers of server.json, per worker process.
+    """
+    readers = request.app.log_readers
+    if readers.locked():
+        chunks.close()
+        return text(
+            'Too many log readers, please retry later.',
+            status=503,
+            headers={'Retry-After': str(entry.retry_after)}
+        )
+    await readers.acquire()
+
+    lock = Lock()
+    state = {'reading': False, 'closed': False}
+
+    def read_chunk() -> Optional[bytes]:
+        try:
+            return next(chunks, None)
+        finally:
+            with lock:
+                state['reading'] = False
+                if state['closed']:
+                    chunks.close()  # the stream was cancelled while reading.
+
+    async def streaming_fn(response):
+        try:
+            loop = get_event_loop()
+            while True:
+                with lock:
+                    state['reading'] = True
+                # shield the executor call, it can't be interrupted, read_chunk closes the generator after it returns.
+                chunk = await shield(loop.run_in_executor(None, read_chunk))
+                if chunk is None:
+                    break
+                await response.write(chunk)
+        finally:
+            readers.release()
+            with lock:
+                state['closed'] = True
+                if not state['reading']:
+                    chunks.close()
+
+    return stream(streaming_fn, status=status, headers=headers, content_type=content_type)
+
+
+def to_ndjson(batches: Iterator[List[Tuple[Optional[float], bytes]]]) -> Iterator[bytes]:
+    """Convert the batches of MocaLogSearch to NDJSON, one JSON object per line. {"timestamp": ..., "log": ...}"""
+    try:
+        for batch in batches:
+            yield b''.join([
+                orjson_dumps({'timestamp': timestamp, 'log': line.decode(errors='replace')}) + b'\n'
+                for timestamp, line in batch
+            ])
+    finally:
+        batches.close()
+
+
+def encode_response(request: Request, body: Any) -> HTTPResponse:
+    """Return a MessagePack response if the client accepts it (Accept: application/msgpack), otherwise JSON."""
+    if mzk.accepts_msgpack(request):
+        return mzk.msgpack_response(body)
+    return json(body)
+
+
+def parse_log(log: Any) -> Optional[Tuple[int, str]]:
+    """
+    Validate a log of the request. for example: {"level": 1, "message": "..."}
+    :return: (level, message), None if the log is invalid.
+    """
+    try:
+        level, msg = log['level'], log['message'] if 'message' in log else log['msg']
+    except (KeyError, TypeError, IndexError):
+        return None
+    if level in [0, 1, 2, 3, 4] and isinstance(msg, str) and len(msg) <= 8192:
+        return level, msg
+    return None
+
 # -------------------------------------------------------------------------- Utils --
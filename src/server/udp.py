@@ -0,0 +1,134 @@
+# -- Imports --------------------------------------------------------------------------
+
+from typing import (
+    Optional, Dict, Tuple, Any
+)
+from asyncio import DatagramProtocol
+from hmac import new as hmac_new, compare_digest
+from hashlib import sha256
+from sanic import Sanic
+from orjson import loads as orjson_loads, JSONDecodeError
+from .routes.utils import parse_log
+from .registry import LogEntry
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- UDP Listener --------------------------------------------------------------------------
+
+
+class UDPLogProtocol(DatagramProtocol):
+    """
+    Receive logs from UDP datagrams, and put them into the queue of MocaFileLog.
+
+    Datagram Format
+    ---------------
+    {"api_key": "...", "level": 1, "message": "..."}
+    {"api_key": "...", "logs": [{"level": 1, "message": "..."}, ...]}
+    If the shared secret is set, the datagram can be signed instead of the API key.
+    <hex digest of HMAC-SHA256(secret, json)>\\n<json>
+
+    Attributes
+    ----------
+    self._app: Sanic
+        The sanic application.
+    self._entry: LogEntry
+        The log that receives the datagrams.
+    self._secret: Optional[bytes]
+        The shared secret of HMAC.
+    self._path: str
+        The API key must be allowed to access this path.
+    self._stats: Dict[str, int]
+        The counters of datagrams.
+    """
+
+    MAX_LOGS: int = 1024
+    DIGEST_SIZE: int = 64
+
+    def __init__(self, app: Sanic, entry: LogEntry):
+        """
+        :param app: the sanic application.
+        :param entry: the log that receives the datagrams, if the udp_secret of the log is None,
+                      only API key can be used.
+        """
+        self._app: Sanic = app
+        self._entry: LogEntry = entry
+        self._secret: Optional[bytes] = entry.udp_secret.encode() if entry.udp_secret is not None else None
+        self._path: str = f'/moca-file-log/{entry.name}/udp'
+        self._stats: Dict[str, int] = {
+            'received': 0,
+            'saved': 0,
+            'malformed': 0,
+            'unauthorized': 0,
+            'dropped': 0,
+        }
+
+    def _is_signed(self, data: bytes) -> bool:
+        """Return True if the datagram has a signature."""
+        return self._secret is not None and data[self.DIGEST_SIZE:self.DIGEST_SIZE + 1] == b'\n'
+
+    def _check_signature(self, data: bytes) -> bool:
+        """Return True if the datagram is signed by the shared secret."""
+        digest = hmac_new(self._secret, data[self.DIGEST_SIZE + 1:], sha256).hexdigest().encode()
+        return compare_digest(digest, data[:self.DIGEST_SIZE])
+
+    def _check_api_key(self, key: Any, ip: str) -> bool:
+        """The same rules as api_key_checker middleware, except the rate limits."""
+        for api_key_info in self._app.api_key_config.list:
+            if api_key_info.get('key') == key:
+                if not api_key_info.get('status', False):
+                    return False
+                if not any(self._path.startswith(path.split(':')[0]) for path in api_key_info.get('allowed_path')):
+                    return False
+                return api_key_info.get('ip') == '*' or ip in api_key_info.get('ip')
+        return False
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        stats = self._stats
+        stats['received'] += 1
+        ip = addr[0]
+        if self._app.ip_blacklist.is_in(ip):
+            stats['unauthorized'] += 1
+            return None
+        signed = self._is_signed(data)
+        if signed and not self._check_signature(data):
+            stats['unauthorized'] += 1
+            return None
+        try:
+            body = orjson_loads(data[self.DIGEST_SIZE + 1:] if signed else data)
+        except JSONDecodeError:
+            stats['malformed'] += 1
+            return None
+        if not isinstance(body, dict):
+            stats['malformed'] += 1
+            return None
+        if not signed and not self._check_api_key(body.get('api_key'), ip):
+            stats['unauthorized'] += 1
+            return None
+        logs = body['logs'] if 'logs' in body else [body]
+        if not isinstance(logs, list) or len(logs) > self.MAX_LOGS:
+            stats['malformed'] += 1
+            return None
+        records = [parse_log(log) for log in logs]
+        if None in records:
+            stats['malformed'] += 1
+            return None
+        if not self._entry.moca_log.write_logs(records):
+            stats['dropped'] += 1
+            return None
+        stats['saved'] += len(records)
+
+    def error_received(self, exc: Exception) -> None:
+        pass  # UDP is fire-and-forget, don't stop the listener.
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the counters.
+        received: the count of received datagrams.
+        saved: the count of saved logs.
+        malformed, unauthorized, dropped: the count of datagrams that were invalid, not authorized,
+                                          or rejected by the full log queue.
+        """
+        return dict(self._stats)
+
+# -------------------------------------------------------------------------- UDP Listener --
@@ -0,0 +1,31 @@
+# -- Imports --------------------------------------------------------------------------
+
+import sys
+from pathlib import Path
+from types import ModuleType
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Packages --------------------------------------------------------------------------
+
+# load the modules without the side effects of the package __init__ files (the console, the server app),
+# so every module can be tested in isolation.
+
+SRC: Path = Path(__file__).resolve().parent.parent / 'src'
+
+
+def _package(name: str, path: Path) -> ModuleType:
+    if name not in sys.modules:
+        module = ModuleType(name)
+        module.__path__ = [str(path)]
+        sys.modules[name] = module
+    return sys.modules[name]
+
+
+_package('src', SRC)
+_package('src.moca_modules', SRC / 'moca_modules')
+_package('src.moca_modules.moca_sanic', SRC / 'moca_modules' / 'moca_sanic')  # without MocaSanic and its plugins.
+_package('src.server', SRC / 'server')
+_package('src.server.routes', SRC / 'server' / 'routes')
+
+# -------------------------------------------------------------------------- Packages --
@@ -0,0 +1,75 @@
+# -- Imports --------------------------------------------------------------------------
+
+from asyncio import run
+import pytest
+from src.moca_modules.moca_log.MocaAsyncFileLog import MocaAsyncFileLog
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Tests --------------------------------------------------------------------------
+
+
+class BrokenFile:
+    """The disk is full."""
+
+    async def write(self, data: str) -> None:
+        raise OSError(28, 'No space left on device')
+
+    async def flush(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+def test_flush_failure_keeps_logs(tmp_path):
+    filename = tmp_path / 'async.log'
+
+    async def main():
+        log = MocaAsyncFileLog(filename, 0, buffered=True, flush_interval=60)
+        for index in range(3):
+            await log.write_log(f'message {index}', 1)
+        log._file = BrokenFile()
+        with pytest.raises(OSError):
+            await log.flush()
+        assert log.stats['pending'] == 3
+        await log.write_log('message 3', 1)
+        log._file = None  # the disk is available again.
+        await log.aclose()
+        lines = filename.read_text().splitlines()
+        assert [line.split('>')[-1] for line in lines] == [f'message {index}' for index in range(4)]
+        assert log.stats['records'] == 4
+
+    run(main())
+
+
+@pytest.mark.parametrize('overflow', [MocaAsyncFileLog.OVERFLOW_DROP_OLDEST, MocaAsyncFileLog.OVERFLOW_REJECT])
+def test_buffer_is_bounded_while_flush_fails(tmp_path, overflow):
+    filename = tmp_path / 'async.log'
+
+    async def main():
+        log = MocaAsyncFileLog(filename, 0, buffered=True, flush_interval=60, max_buffer=3, overflow=overflow)
+        log._file = BrokenFile()
+        for index in range(5):
+            await log.write_log(f'message {index}', 1)
+        with pytest.raises(OSError):
+            await log.flush()
+        assert log.stats['pending'] == 3
+        log._file = None  # the disk is available again.
+        await log.aclose()
+        lines = filename.read_text().splitlines()
+        if overflow == MocaAsyncFileLog.OVERFLOW_DROP_OLDEST:
+            assert [line.split('>')[-1] for line in lines] == [f'message {index}' for index in range(2, 5)]
+            assert log.stats['dropped'] == 2
+        else:
+            assert [line.split('>')[-1] for line in lines] == [f'message {index}' for index in range(3)]
+            assert log.stats['rejected'] == 2
+
+    run(main())
+
+
+def test_invalid_overflow(tmp_path):
+    with pytest.raises(ValueError):
+        MocaAsyncFileLog(tmp_path / 'async.log', overflow='block')
+
+# -------------------------------------------------------------------------- Tests --
@@ -0,0 +1,48 @@
+# -- Imports --------------------------------------------------------------------------
+
+from gzip import compress as gzip_compress
+import pytest
+from sanic.exceptions import SanicException
+from src.moca_modules.moca_sanic.MocaBodyDecoder import MocaBodyDecoder
+try:
+    from zstandard import ZstdCompressor
+    ENCODINGS = ['gzip', 'zstd']
+except (ImportError, ModuleNotFoundError):
+    ENCODINGS = ['gzip']
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Tests --------------------------------------------------------------------------
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    return gzip_compress(data) if encoding == 'gzip' else ZstdCompressor().compress(data)
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_decode(encoding):
+    data = b''.join(f'log message {index}\n'.encode() for index in range(10000))
+    body = compress(encoding, data)
+    decoder = MocaBodyDecoder(encoding, 1048576)
+    pieces = [piece for index in range(0, len(body), 1000) for piece in decoder.decode(body[index:index + 1000])]
+    assert b''.join(pieces) + decoder.flush() == data
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_decompression_bomb(encoding):
+    decoder = MocaBodyDecoder(encoding, 1048576)
+    with pytest.raises(SanicException) as info:
+        for _ in decoder.decode(compress(encoding, b'a' * 104857600)):
+            pass
+    assert info.value.status_code == 413
+    assert decoder.size <= 1048576 + 2 * MocaBodyDecoder.ZSTD_BLOCK_SIZE
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_truncated_body(encoding):
+    decoder = MocaBodyDecoder(encoding, 1048576)
+    with pytest.raises(SanicException) as info:
+        decoder.decode_all(compress(encoding, b'log message\n' * 1000)[:-8])
+    assert info.value.status_code == 400
+
+# -------------------------------------------------------------------------- Tests --
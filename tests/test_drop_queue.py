@@ -0,0 +1,74 @@
+# -- Imports --------------------------------------------------------------------------
+
+from threading import Thread
+from src.moca_modules.moca_file.MocaDropQueue import MocaDropQueue
+from src.moca_modules.moca_log.MocaFileLog import MocaFileLog
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Tests --------------------------------------------------------------------------
+
+
+def priority(item):
+    return None if item == 'command' else item[0]
+
+
+def drain(queue: MocaDropQueue) -> list:
+    return [queue.get_nowait() for _ in range(queue.qsize())]
+
+
+def test_fifo_order():
+    queue = MocaDropQueue(0, priority)
+    items = [(1, 0), (3, 1), (0, 2), 'command', (3, 4), (1, 5), (4, 6)]
+    for item in items:
+        queue.put(item)
+    assert drain(queue) == items
+
+
+def test_drop_oldest():
+    queue = MocaDropQueue(3, priority)
+    for item in [(1, 0), (3, 1), (0, 2)]:
+        assert not queue.put_with_drop(item)
+    assert queue.put_with_drop((2, 3))
+    assert drain(queue) == [(3, 1), (0, 2), (2, 3)]
+
+
+def test_drop_low_level():
+    queue = MocaDropQueue(3, priority)
+    for item in [(1, 0), (3, 1), (1, 2)]:
+        queue.put_with_drop(item, oldest=False)
+    assert queue.put_with_drop((2, 3), oldest=False)  # the oldest item of the lowest priority.
+    assert queue.put_with_drop((0, 4), oldest=False)  # the new item has the lowest priority.
+    assert drain(queue) == [(3, 1), (1, 2), (2, 3)]
+
+
+def test_commands_are_never_dropped():
+    queue = MocaDropQueue(2, priority)
+    queue.put('command')
+    queue.put('command')
+    assert queue.put_with_drop((4, 0))
+    assert drain(queue) == ['command', 'command']
+
+
+def test_file_log_drop_low_level(tmp_path):
+    log = MocaFileLog(
+        tmp_path / 'drop.log', 0, maxsize=3, overflow=MocaFileLog.OVERFLOW_DROP_LOW_LEVEL, writer_thread=False
+    )
+    for level in (1, 3, 0, 4):
+        assert log.write_log('message', level)
+    assert [log._priority(item) for item in drain(log._queue)] == [1, 3, 4]
+    assert log.stats['dropped'] == 1
+
+
+def test_file_log_dropped_count_with_threads(tmp_path):
+    log = MocaFileLog(
+        tmp_path / 'drop.log', 0, maxsize=10, overflow=MocaFileLog.OVERFLOW_DROP_OLDEST, writer_thread=False
+    )
+    threads = [Thread(target=lambda: [log.write_log('message', 1) for _ in range(2000)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert log.stats['dropped'] == 8 * 2000 - 10
+
+# -------------------------------------------------------------------------- Tests --
@@ -0,0 +1,114 @@
+# -- Imports --------------------------------------------------------------------------
+
+from time import sleep
+from queue import Full
+from pathlib import Path
+import pytest
+from src.moca_modules.moca_log.MocaFileLog import MocaFileLog
+from src.moca_modules.moca_log.MocaLogCodec import MocaLogCodec
+from src.moca_modules.moca_log.MocaLogWriterProcess import MocaLogChannel
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Tests --------------------------------------------------------------------------
+
+
+def wait(log: MocaFileLog) -> None:
+    """Wait for the writer thread."""
+    for _ in range(500):
+        if log.size == 0:
+            break
+        sleep(0.01)
+    sleep(0.1)
+
+
+def test_binary_file_lines(tmp_path):
+    # /details shows file_lines as the count of the logs.
+    filename = tmp_path / 'binary.log'
+    log = MocaFileLog(filename, 0, log_format=MocaFileLog.FORMAT_BINARY)
+    for index in range(202):
+        log.write_log(f'message {index}', index % 5)
+    wait(log)
+    assert log.stats['file_lines'] == 202
+    # the counter is restored from the block headers after a restart.
+    log = MocaFileLog(filename, 0, log_format=MocaFileLog.FORMAT_BINARY)
+    log.write_log('after restart', 1)
+    wait(log)
+    assert log.stats['file_lines'] == 203
+
+
+@pytest.mark.parametrize('log_format', MocaFileLog.LOG_FORMATS)
+def test_write_logs_counts_every_log(tmp_path, log_format):
+    filename = tmp_path / 'batch.log'
+    log = MocaFileLog(filename, 0, log_format=log_format)
+    assert log.write_logs([(1, 'first')])
+    assert log.write_logs([(index % 5, f'message {index}') for index in range(201)])
+    wait(log)
+    stats = log.stats
+    assert stats['records'] == 202
+    assert stats['file_lines'] == 202
+    if log_format == MocaFileLog.FORMAT_BINARY:
+        with open(filename, mode='rb') as file:
+            assert MocaLogCodec.count_records(file) == 202  # the block headers.
+
+
+@pytest.mark.parametrize('overflow', [MocaFileLog.OVERFLOW_REJECT, MocaFileLog.OVERFLOW_BLOCK])
+def test_write_logs_all_or_nothing(tmp_path, overflow):
+    log = MocaFileLog(tmp_path / 'bound.log', 0, maxsize=10, overflow=overflow, put_timeout=0.1, writer_thread=False)
+    assert not log.write_logs([(1, 'message')] * 11)
+    assert log.write_logs([(1, 'message')] * 6)
+    assert not log.write_logs([(1, 'message')] * 6)
+    assert log.size == 6
+    assert log.stats['rejected'] == 17
+
+
+def test_channel_put_many():
+    channel = MocaLogChannel(5)
+    channel.put_many([1, 2, 3])
+    with pytest.raises(Full):
+        channel.put_many([4, 5, 6], block=False)
+    with pytest.raises(Full):
+        channel.put_many([4, 5, 6], timeout=0.1)
+    channel.put_many([4, 5], block=False)
+    assert [channel.get(timeout=1) for _ in range(5)] == [1, 2, 3, 4, 5]
+
+def test_close_writes_queued_logs(tmp_path):
+    filename = tmp_path / 'close.log'
+    log = MocaFileLog(filename, 0, durability=MocaFileLog.DURABILITY_INTERVAL)
+    for index in range(5000):
+        log.write_log(f'message {index}', 1)
+    assert log.close()
+    assert log.stats['records'] == 5000
+    assert len(filename.read_bytes().splitlines()) == 5000
+
+
+@pytest.mark.parametrize('target', ['rename', 'open'])
+def test_rotate_failure_keeps_writing(tmp_path, monkeypatch, target):
+    filename = tmp_path / 'rotate.log'
+    log = MocaFileLog(filename, 0, durability=MocaFileLog.DURABILITY_BATCH, rotate_bytes=1024)
+    failures = [OSError(28, 'No space left on device')]
+    if target == 'rename':
+        rename = Path.rename
+
+        def failing(self, *args):
+            if failures:
+                raise failures.pop()
+            return rename(self, *args)
+        monkeypatch.setattr(Path, 'rename', failing)
+    else:
+        open_ = log._open
+
+        def failing():
+            if failures and log._segment_size > 0:
+                raise failures.pop()
+            return open_()
+        monkeypatch.setattr(log, '_open', failing)
+    for index in range(100):
+        log.write_log(f'message {index}', 1)
+        sleep(0.001)
+    assert log.close()
+    assert not failures
+    assert log.stats['rotations'] > 0
+    assert 'message 99' in filename.read_text()  # the writer thread is still alive after the failure.
+
+# -------------------------------------------------------------------------- Tests --
@@ -0,0 +1,20 @@
+# -- Imports --------------------------------------------------------------------------
+
+from types import SimpleNamespace
+import pytest
+from sanic.exceptions import SanicException
+from src.moca_modules.moca_sanic import utils
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Tests --------------------------------------------------------------------------
+
+
+def test_msgpack_body_without_msgpack(monkeypatch):
+    monkeypatch.setattr(utils, 'msgpack_flag', False)
+    request = SimpleNamespace(headers={'Content-Type': 'application/msgpack'}, body=b'\x80', ctx=SimpleNamespace())
+    with pytest.raises(SanicException) as info:
+        utils.get_body_data(request)
+    assert info.value.status_code == 415
+
+# -------------------------------------------------------------------------- Tests --
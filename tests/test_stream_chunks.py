@@ -0,0 +1,67 @@
+# -- Imports --------------------------------------------------------------------------
+
+import sys
+from asyncio import Semaphore, CancelledError, ensure_future, sleep as async_sleep, run
+from threading import Event
+from types import ModuleType, SimpleNamespace
+import pytest
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Tests --------------------------------------------------------------------------
+
+
+@pytest.fixture
+def utils(monkeypatch):
+    registry = ModuleType('src.server.registry')
+    registry.LogEntry = object  # the real registry connects to the services.
+    monkeypatch.setitem(sys.modules, 'src.server.registry', registry)
+    monkeypatch.delitem(sys.modules, 'src.server.routes.utils', raising=False)
+    from src.server.routes import utils
+    return utils
+
+
+def test_cancel_stream_while_reading(utils):
+    reading, resume, closed = Event(), Event(), Event()
+
+    def chunks():
+        try:
+            yield b'first'
+            reading.set()
+            resume.wait(5)
+            yield b'second'
+            yield b'third'
+        finally:
+            closed.set()
+
+    class Response:
+        def __init__(self):
+            self.written = []
+
+        async def write(self, data):
+            self.written.append(data)
+
+    async def main():
+        readers = Semaphore(1)
+        request = SimpleNamespace(app=SimpleNamespace(log_readers=readers))
+        streaming = await utils.stream_chunks(request, SimpleNamespace(retry_after=1), chunks())
+        response = Response()
+        task = ensure_future(streaming.streaming_fn(response))
+        while not reading.is_set():
+            await async_sleep(0.01)
+        task.cancel()  # the client disconnected, the generator is still running in the executor.
+        with pytest.raises(CancelledError):
+            await task
+        assert not readers.locked()
+        assert not closed.is_set()
+        resume.set()
+        for _ in range(500):
+            if closed.is_set():
+                break
+            await async_sleep(0.01)
+        assert closed.is_set()
+        assert response.written == [b'first']
+
+    run(main())
+
+# -------------------------------------------------------------------------- Tests --
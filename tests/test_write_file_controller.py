@@ -0,0 +1,50 @@
+# -- Imports --------------------------------------------------------------------------
+
+from time import sleep
+from queue import Queue
+from src.moca_modules.moca_file.MocaWriteFileController import MocaWriteFileController
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Tests --------------------------------------------------------------------------
+
+
+def wait(controller: MocaWriteFileController) -> None:
+    """Wait for the writer thread."""
+    for _ in range(500):
+        if controller.size == 0:
+            break
+        sleep(0.01)
+    sleep(0.1)
+
+
+def test_interleaved_overwrite(tmp_path):
+    a, b = tmp_path / 'a.txt', tmp_path / 'b.txt'
+    controller = MocaWriteFileController()
+    for filename, data in ((a, 'x'), (b, 'y'), (a, 'z')):
+        controller.write(filename, 'w', data)
+        wait(controller)
+    assert a.read_text() == 'z'
+    assert b.read_text() == 'y'
+
+
+def test_overwrite_in_one_batch(tmp_path):
+    a, b = tmp_path / 'a.bin', tmp_path / 'b.txt'
+    queue = Queue()
+    for filename, mode, data in ((a, 'wb', b'x'), (b, 'a', '1'), (a, 'wb', b'z'), (b, 'w', '2'), (b, 'a', '3')):
+        queue.put((str(filename), mode, 'utf-8', data))
+    controller = MocaWriteFileController(queue)  # the writer thread gets all items in one batch.
+    wait(controller)
+    assert a.read_bytes() == b'z'
+    assert b.read_text() == '23'
+
+
+def test_append_after_overwrite(tmp_path):
+    a = tmp_path / 'a.txt'
+    controller = MocaWriteFileController()
+    for mode, data in (('a', '1'), ('a', '2'), ('w', '3'), ('a', '4')):
+        controller.write(a, mode, data)
+        wait(controller)
+    assert a.read_text() == '34'
+
+# -------------------------------------------------------------------------- Tests --
@@ -0,0 +1,47 @@
+# -- Imports --------------------------------------------------------------------------
+
+from multiprocessing import Process
+import pytest
+from src.moca_modules.moca_log.MocaFileLog import MocaFileLog
+from src.moca_modules.moca_log.MocaFileLogClient import MocaFileLogClient
+from src.moca_modules.moca_log.MocaLogWriterProcess import MocaLogWriterProcess
+
+# -------------------------------------------------------------------------- Imports --
+
+# -- Tests --------------------------------------------------------------------------
+
+
+def worker(writer: MocaLogWriterProcess, count: int) -> None:
+    client = MocaFileLogClient(writer, 0, overflow=MocaFileLog.OVERFLOW_BLOCK)
+    for index in range(count):
+        client.write_log(f'message {index}', 1)
+    client.write_logs([(2, f'batch {index}') for index in range(10)])
+
+
+@pytest.mark.parametrize('log_format', MocaFileLog.LOG_FORMATS)
+def test_pid_of_worker(tmp_path, log_format):
+    filename = tmp_path / 'writer.log'
+    writer = MocaLogWriterProcess(filename, log_format=log_format)
+    writer.start()
+    process = Process(target=worker, args=(writer, 100))
+    process.start()
+    process.join()
+    writer.stop()
+    lines = MocaFileLog(filename, 0, log_format=log_format, writer_thread=False).get_all_log().splitlines()
+    assert len(lines) == 110
+    assert all(line.split('|')[3] == str(process.pid) for line in lines)
+
+def test_stop_writes_queued_logs(tmp_path):
+    filename = tmp_path / 'stop.log'
+    writer = MocaLogWriterProcess(filename, durability=MocaFileLog.DURABILITY_RECORD)
+    writer.start()
+    processes = [Process(target=worker, args=(writer, 5000)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    writer.stop()
+    assert writer.stats['records'] == 10020
+    assert len(filename.read_bytes().splitlines()) == 10020
+
+# -------------------------------------------------------------------------- Tests --